@@ -0,0 +1,289 @@
+"""asyncio access to the Arduino for headless scripts and test harnesses.
+
+AsyncSerialTransport reads and writes the port from the event loop using reader and writer callbacks on its file
+descriptor, so no threads are needed. This relies on selector based event loops and so is POSIX only.
+SerialAdapterTransport lets ZeroWaitSerial and DummySerial be used in the same place.
+
+ArduinoController sits on top of either transport and provides awaitable commands and an async iterator of the
+messages received, decoded by protocol.decode_line. If the port is lost, e.g. the USB cable is pulled, the commands
+waiting and the iterators raise the error.
+
+    async def main():
+        controller = ArduinoController(AsyncSerialTransport("/dev/ttyACM0", 9600))
+        sync = await controller.sync()
+        await asyncio.gather(controller.throw(0), controller.throw(5))
+        async for message in controller.messages():
+            print(message)
+"""
+
+import asyncio
+import os
+import time
+import serial
+from typing import AsyncIterator, Callable, Optional, Union
+from pc_control.protocol import IdMessage, Message, PointSetMessage, SyncMessage, decode_line
+from pc_control.serial_comms import DummySerial, LineFramer, SerialLine, ZeroWaitSerial
+
+LineHandler = Callable[[SerialLine], None]
+LostHandler = Callable[[Exception], None]
+
+
+class AsyncSerialTransport:
+    """Serial port driven by the asyncio event loop."""
+
+    def __init__(self, port: str, baud: int, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Opens the port and registers it with the event loop.
+
+        Args:
+            port (str): Serial port name.
+            baud (int): Baud rate.
+            loop (Optional[asyncio.AbstractEventLoop], optional): Defaults to the running loop.
+        """
+        self.loop = loop or asyncio.get_running_loop()
+        self.serial = serial.Serial(port, baud, timeout=0)
+        self.fd = self.serial.fileno()
+        os.set_blocking(self.fd, False)
+
+        self.framer = LineFramer()
+        self.write_buffer = bytearray()
+        self.drained: Optional[asyncio.Future] = None
+        self.line_handler: Optional[LineHandler] = None
+        self.lost_handler: Optional[LostHandler] = None
+
+        self.loop.add_reader(self.fd, self.on_readable)
+
+    def set_line_handler(self, handler: LineHandler):
+        self.line_handler = handler
+
+    def set_lost_handler(self, handler: LostHandler):
+        """Called with the error once the port has failed. The transport is closed by then."""
+        self.lost_handler = handler
+
+    def on_readable(self):
+        """Called by the event loop when there are bytes to read."""
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self.connection_lost(e)
+            return
+
+        if not data:
+            self.connection_lost(serial.SerialException(f"{self.serial.port} closed"))
+            return
+
+        timestamp = time.monotonic()
+        wall_time = time.time()
+
+        lines = self.framer.feed(data)
+
+        if self.line_handler:
+            for line in lines:
+                self.line_handler(SerialLine(line, timestamp, wall_time))
+
+    async def write(self, data: bytes):
+        """Write the data, waiting without blocking the loop until the port has accepted all of it.
+
+        Raises:
+            serial.SerialException: If the transport has been closed.
+            OSError: If the port fails.
+        """
+        if not self.serial.is_open:
+            raise serial.SerialException(f"{self.serial.port} closed")
+        self.write_buffer += data
+        self.flush()
+
+        if self.write_buffer:
+            if self.drained is None:
+                self.drained = self.loop.create_future()
+                self.loop.add_writer(self.fd, self.on_writable)
+            await asyncio.shield(self.drained)
+
+    def flush(self):
+        """Write as much of the buffer as the port will take."""
+        try:
+            written = os.write(self.fd, self.write_buffer)
+        except BlockingIOError:
+            return
+        del self.write_buffer[:written]
+
+    def on_writable(self):
+        try:
+            self.flush()
+        except OSError as e:
+            self.connection_lost(e)
+            return
+        if not self.write_buffer:
+            self.loop.remove_writer(self.fd)
+            self.drained.set_result(None)
+            self.drained = None
+
+    def connection_lost(self, error: Exception):
+        """Stop watching a port which has failed, e.g. been unplugged, so the loop doesn't keep calling the reader.
+        The error is passed to any write waiting for the port and to the lost handler."""
+        if self.drained is not None:
+            self.drained.set_exception(error)
+        self.close()
+        if self.lost_handler:
+            self.lost_handler(error)
+
+    def close(self):
+        if not self.serial.is_open:
+            return
+        self.loop.remove_reader(self.fd)
+        if self.drained is not None:
+            self.loop.remove_writer(self.fd)
+            self.drained.cancel()
+            self.drained = None
+        self.serial.close()
+
+
+class SerialAdapterTransport:
+    """Adapts ZeroWaitSerial or DummySerial to the transport interface.
+
+    Lines from the reader thread are passed to the event loop with call_soon_threadsafe.
+    """
+
+    def __init__(self, ser: Union[ZeroWaitSerial, DummySerial], loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.serial = ser
+        self.line_handler: Optional[LineHandler] = None
+        ser.notify = lambda: self.loop.call_soon_threadsafe(self.on_lines)
+
+    def set_line_handler(self, handler: LineHandler):
+        self.line_handler = handler
+
+    def set_lost_handler(self, handler: LostHandler):
+        """Never called. ZeroWaitSerial's reader thread and SerialConnection deal with a lost port."""
+
+    def on_lines(self):
+        for line in self.serial.read_available_lines():
+            if self.line_handler:
+                self.line_handler(line)
+
+    async def write(self, data: bytes):
+        self.serial.write(data)
+
+    def close(self):
+        self.serial.notify = None
+        if hasattr(self.serial, "close"):
+            self.serial.close()
+
+
+Transport = Union[AsyncSerialTransport, SerialAdapterTransport]
+
+
+class ArduinoController:
+    """Awaitable commands for the Arduino command board.
+
+    Every received line is decoded once and the message copied to each subscriber, so any number of commands can wait
+    for their replies at once alongside any number of message iterators. Empty lines are skipped. If the transport
+    reports the port lost, the error is passed to every subscriber in place of a message and raised.
+    """
+
+    def __init__(self, transport: Transport, max_queued_lines: int = 1000):
+        """Sets up the controller.
+
+        Args:
+            transport (Transport): Connection to the Arduino.
+            max_queued_lines (int, optional): Messages held for each subscriber. Defaults to 1000.
+        """
+        self.transport = transport
+        self.max_queued_lines = max_queued_lines
+        self.subscribers: set[asyncio.Queue] = set()
+        self.error: Optional[Exception] = None  # why the port was lost
+        transport.set_line_handler(self.on_line)
+        transport.set_lost_handler(self.on_lost)
+
+    def on_line(self, line: SerialLine):
+        message = decode_line(line.text)
+        if message is None:
+            return
+        for subscriber in self.subscribers:
+            self.put(subscriber, message)
+
+    def on_lost(self, error: Exception):
+        self.error = error
+        for subscriber in self.subscribers:
+            self.put(subscriber, error)
+
+    @staticmethod
+    def put(subscriber: asyncio.Queue, item: Union[Message, Exception]):
+        if subscriber.full():
+            subscriber.get_nowait()  # drop the oldest for slow consumers
+        subscriber.put_nowait(item)
+
+    def subscribe(self) -> asyncio.Queue:
+        subscriber = asyncio.Queue(self.max_queued_lines)
+        if self.error is not None:
+            subscriber.put_nowait(self.error)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    @staticmethod
+    async def get(subscriber: asyncio.Queue) -> Message:
+        """The next message for a subscriber. Raises the error if the port has been lost."""
+        item = await subscriber.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def messages(self) -> AsyncIterator[Message]:
+        """Every message received from now on.
+
+        Raises:
+            serial.SerialException | OSError: If the port is lost.
+        """
+        subscriber = self.subscribe()
+        try:
+            while True:
+                yield await self.get(subscriber)
+        finally:
+            self.subscribers.discard(subscriber)
+
+    async def request(self, command: str, is_reply: Callable[[Message], bool], timeout: float) -> Message:
+        """Send a command and wait for the reply.
+
+        Args:
+            command (str): Command without the newline, e.g. "p5".
+            is_reply (Callable[[Message], bool]): Returns True for the message which answers the command.
+            timeout (float): Seconds to wait for the reply.
+
+        Raises:
+            TimeoutError: If no reply arrives in time.
+            serial.SerialException | OSError: If the port is lost.
+
+        Returns:
+            Message: The reply.
+        """
+        # subscribe before writing so a fast reply can't be missed
+        subscriber = self.subscribe()
+        try:
+            await self.transport.write(str.encode(f"{command}\n"))
+            async with asyncio.timeout(timeout):
+                while True:
+                    message = await self.get(subscriber)
+                    if is_reply(message):
+                        return message
+        finally:
+            self.subscribers.discard(subscriber)
+
+    async def throw(self, servo_index: int, timeout: float = 5.0) -> PointSetMessage:
+        """Toggle a point and wait for the Arduino to acknowledge setting it."""
+        return await self.request(
+            f"p{servo_index}",
+            lambda message: isinstance(message, PointSetMessage) and message.servo_index == servo_index,
+            timeout,
+        )
+
+    async def sync(self, timeout: float = 2.0) -> SyncMessage:
+        """Request the state of all the points."""
+        return await self.request("r", lambda message: isinstance(message, SyncMessage), timeout)
+
+    async def heartbeat(self, timeout: float = 2.0) -> IdMessage:
+        """Request the ID line with the firmware version."""
+        return await self.request("c", lambda message: isinstance(message, IdMessage), timeout)
+
+    def close(self):
+        self.transport.close()
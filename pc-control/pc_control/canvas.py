@@ -0,0 +1,92 @@
+import pygame
+import pygame.gfxdraw
+from typing import Sequence, Tuple
+from pc_control.text_cache import get_sys_font
+
+
+class Transform:
+    """Maps layout coordinates to pixels on the target surface.
+
+    The layout items keep all their positions in layout units. Only drawing and mouse input pass through the transform,
+    so the layout can be drawn crisply at any display resolution.
+    """
+
+    def __init__(self, scale: float = 1.0):
+        """Sets up the transform.
+
+        Args:
+            scale (float, optional): Pixels per layout unit. Defaults to 1.0.
+        """
+        self.scale = scale
+
+    def point(self, point: Sequence[float]) -> Tuple[int, int]:
+        """Layout coordinate to pixel coordinate."""
+        return round(point[0] * self.scale), round(point[1] * self.scale)
+
+    def length(self, length: float) -> int:
+        """Layout length to pixels. Never less than 1 pixel so thin lines don't disappear."""
+        return max(1, round(length * self.scale))
+
+    def rect(self, rect: pygame.Rect) -> pygame.Rect:
+        """Layout rect to pixel rect. The edges are rounded so neighbouring rects stay joined."""
+        left, top = self.point(rect.topleft)
+        right, bottom = self.point(rect.bottomright)
+        return pygame.Rect(left, top, right - left, bottom - top)
+
+    def to_layout(self, pixel: Sequence[float]) -> Tuple[float, float]:
+        """Pixel coordinate, e.g. the mouse position, back to layout coordinates for hit testing."""
+        return pixel[0] / self.scale, pixel[1] / self.scale
+
+
+class Canvas:
+    """A surface to draw on in layout coordinates. Wraps the pygame draw calls used by the layout items."""
+
+    def __init__(self, surface: pygame.Surface, transform: Transform):
+        """Sets up the canvas.
+
+        Args:
+            surface (pygame.Surface): Surface to draw on.
+            transform (Transform): Layout to pixel transform for the surface.
+        """
+        self.surface = surface
+        self.transform = transform
+
+    def polygon(self, points: Sequence[Sequence[float]], colour):
+        """Anti-aliased filled polygon."""
+        pixels = [self.transform.point(point) for point in points]
+        pygame.gfxdraw.filled_polygon(self.surface, pixels, colour)
+        pygame.gfxdraw.aapolygon(self.surface, pixels, colour)
+
+    def circle(self, center: Sequence[float], radius: float, colour):
+        """Anti-aliased filled circle."""
+        x, y = self.transform.point(center)
+        radius = self.transform.length(radius)
+        pygame.gfxdraw.filled_circle(self.surface, x, y, radius, colour)
+        pygame.gfxdraw.aacircle(self.surface, x, y, radius, colour)
+
+    def line(self, colour, start: Sequence[float], end: Sequence[float], width: float = 1):
+        pygame.draw.line(
+            self.surface, colour, self.transform.point(start), self.transform.point(end), self.transform.length(width)
+        )
+
+    def lines(self, colour, closed: bool, points: Sequence[Sequence[float]], width: float = 1):
+        pixels = [self.transform.point(point) for point in points]
+        pygame.draw.lines(self.surface, colour, closed, pixels, self.transform.length(width))
+
+    def rect(self, colour, rect: pygame.Rect, width: float = 0, border_radius: float = 0):
+        """Draw a rect. A width of 0 fills the rect."""
+        pygame.draw.rect(
+            self.surface,
+            colour,
+            self.transform.rect(rect),
+            self.transform.length(width) if width else 0,
+            border_radius=round(border_radius * self.transform.scale),
+        )
+
+    def blit(self, source: pygame.Surface, pos: Sequence[float]):
+        """Blit a surface which has already been rendered at the target scale, e.g. text from font()."""
+        self.surface.blit(source, self.transform.point(pos))
+
+    def font(self, name: str, size: float) -> pygame.font.Font:
+        """System font with the size scaled so text is rendered at the target resolution."""
+        return get_sys_font(name, self.transform.length(size))
@@ -0,0 +1,180 @@
+"""Finds the port the Arduino command board is on.
+
+Every serial port is probed at once with the c heartbeat command. The first to answer with the <ID: ... vX.Y> line
+sent by sendHeartBeat() is the Arduino, so finding it takes as long as the slowest probe rather than all of them.
+The port and firmware version found are cached for the next launch, and the cached port is probed before it is
+trusted in case another device has been given its name.
+
+    python -m pc_control.discovery
+"""
+
+import json
+import threading
+import time
+import tomllib
+import serial
+import serial.tools.list_ports
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, as_completed
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Sequence
+from pc_control.protocol import IdMessage, decode_line
+from pc_control.serial_comms import LineFramer, read_connection_settings
+
+cache_path = Path(__file__).parent.parent / "port_cache.json"
+
+
+def read_discovery_timeout() -> float:
+    with open(Path(__file__).parent.parent / "settings.toml", "rb") as f:
+        return tomllib.load(f)["serial"]["discovery_timeout"]
+
+
+class DiscoveredPort(NamedTuple):
+    port: str
+    version: str  # firmware version from the heartbeat, e.g. 2.3
+    date: str  # firmware date from the heartbeat
+
+
+def candidate_ports() -> list[str]:
+    return [port.device for port in serial.tools.list_ports.comports()]
+
+
+def probe_port(
+    port: str, baud: int, deadline: float, stop: Callable[[], bool], resend_interval: float = 1.0
+) -> Optional[IdMessage]:
+    """Send heartbeat requests to a port until it answers, the deadline passes or stop returns True.
+
+    Opening the port resets the Arduino, which can't answer until it has finished starting up, so the request is
+    repeated every resend_interval.
+
+    Returns:
+        Optional[IdMessage]: The heartbeat, or None if the port didn't answer or couldn't be opened.
+    """
+    try:
+        ser = serial.Serial(port, baud, timeout=0.1, write_timeout=0.5)
+    except (serial.SerialException, OSError, ValueError):
+        return None
+
+    framer = LineFramer()
+    next_request = 0.0
+
+    with ser:
+        while not stop() and time.monotonic() < deadline:
+            try:
+                if time.monotonic() >= next_request:
+                    ser.write(b"c\n")
+                    next_request = time.monotonic() + resend_interval
+                data = ser.read(max(1, ser.in_waiting))
+            except (serial.SerialException, OSError):
+                return None
+
+            for line in framer.feed(data):
+                message = decode_line(line)
+                if isinstance(message, IdMessage):
+                    return message
+
+    return None
+
+
+def discover_port(
+    baud: int, timeout: float, ports: Optional[Sequence[str]] = None, stop: Optional[threading.Event] = None
+) -> Optional[DiscoveredPort]:
+    """Probe the ports at the same time and return the first to answer.
+
+    Args:
+        baud (int): Baud rate.
+        timeout (float): Seconds to wait for an answer.
+        ports (Optional[Sequence[str]], optional): Ports to probe. Defaults to every serial port on the system.
+        stop (Optional[threading.Event], optional): Set to give up early, e.g. when the app is closing.
+
+    Returns:
+        Optional[DiscoveredPort]: None if no port answered in time or stop was set.
+    """
+    if ports is None:
+        ports = candidate_ports()
+    if not ports:
+        return None
+
+    deadline = time.monotonic() + timeout
+    found = threading.Event()
+
+    def should_stop() -> bool:
+        return found.is_set() or (stop is not None and stop.is_set())
+
+    with ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix="serial-probe") as executor:
+        futures = {executor.submit(probe_port, port, baud, deadline, should_stop): port for port in ports}
+        try:
+            for future in as_completed(futures, timeout=timeout + 1):
+                message = future.result()
+                if message:
+                    return DiscoveredPort(futures[future], message.version, message.date)
+        except TimeoutError:
+            pass
+        finally:
+            found.set()  # the remaining probes give up within a read timeout
+
+    return None
+
+
+def read_cached_port() -> Optional[DiscoveredPort]:
+    try:
+        return DiscoveredPort(**json.loads(cache_path.read_text()))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def write_cached_port(discovered: Optional[DiscoveredPort]):
+    """Cache the port for the next launch. None clears the cache."""
+    if discovered is None:
+        cache_path.unlink(missing_ok=True)
+    else:
+        cache_path.write_text(json.dumps(discovered._asdict(), indent=4))
+
+
+def find_arduino(
+    baud: int,
+    timeout: float,
+    use_cache: bool = True,
+    stop: Optional[threading.Event] = None,
+    cached_timeout: float = 5.0,
+) -> Optional[str]:
+    """The cached port if the Arduino still answers on it, otherwise discover the port and cache it.
+
+    Args:
+        baud (int): Baud rate.
+        timeout (float): Seconds to wait for an answer when discovering.
+        use_cache (bool, optional): False to ignore the cache, e.g. when the cached port didn't work. Defaults to True.
+        stop (Optional[threading.Event], optional): Set to give up early, e.g. when the app is closing.
+        cached_timeout (float, optional): Seconds to wait for the cached port to answer. Defaults to 5.0.
+
+    Returns:
+        Optional[str]: None if the Arduino wasn't found or stop was set.
+    """
+    stopped = stop.is_set if stop is not None else lambda: False
+
+    cached = read_cached_port()
+    if use_cache and cached and cached.port in candidate_ports():
+        if probe_port(cached.port, baud, time.monotonic() + min(timeout, cached_timeout), stopped):
+            return cached.port
+        if stopped():
+            return None
+        print(f"{cached.port} no longer answers as the Arduino")
+
+    discovered = discover_port(baud, timeout, stop=stop)
+    if discovered:
+        print(f"Found firmware v{discovered.version} ({discovered.date}) on {discovered.port}")
+        write_cached_port(discovered)
+        return discovered.port
+    return None
+
+
+if __name__ == "__main__":
+    _, baud = read_connection_settings()
+    start = time.monotonic()
+    discovered = discover_port(baud, read_discovery_timeout())
+
+    if discovered:
+        print(f"Found firmware v{discovered.version} ({discovered.date}) on {discovered.port}")
+        write_cached_port(discovered)
+    else:
+        print("No Arduino found")
+    print(f"Took {time.monotonic() - start:.1f}s")
@@ -0,0 +1,238 @@
+"""Emulates the Arduino command board on a pseudo-terminal so pc_control can be run and tested without hardware.
+
+The emulator follows arduino-command.ino: commands are newline terminated, each is acknowledged and echoed, points are
+toggled with a delay for the servo to travel and the state of every point is sent as a sync string. Noise, delays
+and corrupt bytes can be injected to exercise the serial handling. POSIX only.
+
+Run it and point the port in settings.toml at the device it prints:
+    python -m pc_control.emulator --servo-delay 0.2
+
+Or from a test:
+    with ArduinoEmulator(servo_delay=0) as emulator:
+        ser = ZeroWaitSerial(emulator.port, 9600)
+"""
+
+import argparse
+import os
+import random
+import re
+import select
+import termios
+import threading
+import time
+import tty
+from typing import Optional, Tuple
+
+point_count = 15  # NBR_POINTS
+
+# offset to the partner of a point pair. Both are set when either is toggled.
+point_pair = (0, 0, 0, 1, -1, 0, 0, 0, 1, -1, 0, 0, 0, 0, 0)
+
+# servo positions for state 0 and state 1
+point_pos_0 = (326, 275, 340, 350, 200, 275, 350, 362, 279, 324, 395, 350, 276, 275, 290)
+point_pos_1 = (276, 376, 278, 200, 275, 358, 285, 299, 324, 276, 275, 283, 340, 350, 340)
+
+heartbeat = "<ID: 18/01/25 v2.3>\n"
+
+
+class ArduinoEmulator:
+    """The Arduino command board on a pty.
+
+    Open the port with pyserial, or ZeroWaitSerial, just as for a COM port. The emulator runs on its own thread
+    and, like the Arduino, handles one command at a time.
+    """
+
+    def __init__(
+        self,
+        servo_delay: float = 1.0,
+        heartbeat_interval: Optional[float] = 20.0,
+        response_delay: Tuple[float, float] = (0.0, 0.0),
+        noise_rate: float = 0.0,
+        corrupt_rate: float = 0.0,
+        boot: bool = False,
+        seed: Optional[int] = None,
+    ):
+        """Opens the pty and starts the emulator.
+
+        Args:
+            servo_delay (float, optional): Seconds for each servo to travel. Defaults to 1.0 as in the sketch.
+            heartbeat_interval (Optional[float], optional): Seconds between heartbeats. None to turn them off.
+                Defaults to 20.0.
+            response_delay (Tuple[float, float], optional): Extra delay before each command is handled, picked
+                uniformly between the two values. Defaults to (0.0, 0.0).
+            noise_rate (float, optional): Chance of a line of random bytes being sent before each line. Defaults to 0.0.
+            corrupt_rate (float, optional): Chance of a byte in each line being replaced with a non ASCII byte.
+                Defaults to 0.0.
+            boot (bool, optional): Run the start up sequence, setting every point and sending a sync. Defaults to False.
+            seed (Optional[int], optional): Seed for the injected faults so a run can be repeated. Defaults to None.
+        """
+        self.servo_delay = servo_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.response_delay = response_delay
+        self.noise_rate = noise_rate
+        self.corrupt_rate = corrupt_rate
+        self.random = random.Random(seed)
+
+        self.point_status = [0] * point_count
+        self.point_pos = list(point_pos_0)
+        self.commands_handled = 0
+        self.dropped_bytes = 0  # output lost because nothing was reading the port
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave, termios.TCSANOW)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+        self.running = True
+        self.boot = boot
+        self.thread = threading.Thread(target=self.run, name="arduino-emulator", daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.running = False
+        self.thread.join()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def run(self):
+        """Emulator thread. Reads commands and sends the heartbeat until closed."""
+        if self.boot:
+            for point in range(point_count):
+                self.set_point(point, False)
+            self.sync_data()
+
+        buffer = bytearray()
+        next_heartbeat = time.monotonic() + (self.heartbeat_interval or 0)
+
+        while self.running:
+            readable, _, _ = select.select([self.master], [], [], 0.05)
+
+            if self.heartbeat_interval and time.monotonic() >= next_heartbeat:
+                next_heartbeat += self.heartbeat_interval
+                self.send(heartbeat)
+
+            if not readable:
+                continue
+
+            try:
+                buffer += os.read(self.master, 1024)
+            except (BlockingIOError, OSError):
+                continue
+
+            while self.running and b"\n" in buffer:
+                end = buffer.index(b"\n") + 1
+                command = buffer[:end].decode("ascii", errors="replace")
+                del buffer[:end]
+                self.handle_command(command)
+
+    def handle_command(self, command: str):
+        """serialEvent and parseString. command includes the newline."""
+        low, high = self.response_delay
+        if high:
+            time.sleep(self.random.uniform(low, high))
+
+        self.send("<Serial Recieved>\r\n")
+        self.send(command)
+        self.send("<Parsing Input String>\n")
+        self.commands_handled += 1
+
+        match command[0]:
+            case "p":
+                point = self.index_from_string(command)
+                if point >= point_count:
+                    return
+                if point_pair[point]:
+                    # set the pair too. Only sync on the second.
+                    self.set_point(point, False)
+                    self.set_point(point + point_pair[point], True)
+                else:
+                    self.set_point(point, True)
+            case "s":
+                self.send("<Signals...>\r\n")
+                self.sync_data()
+            case "l":
+                self.send("<Lights Toggled>\r\n")
+                self.sync_data()
+            case "c":
+                self.send(heartbeat)
+            case "r":
+                self.sync_data()
+            case "i":
+                self.adjust_position(self.index_from_string(command), 1, "Increment")
+            case "d":
+                self.adjust_position(self.index_from_string(command), -1, "Decrement")
+            case _:
+                self.send("<Command not found>\r\n")
+
+    @staticmethod
+    def index_from_string(command: str) -> int:
+        """The point number after the command letter. Like String.toInt, anything which isn't a number is 0."""
+        digits = re.match(r"\d*", command[1:3]).group()
+        return int(digits) if digits else 0
+
+    def set_point(self, point: int, sync: bool):
+        """Toggle a point and wait for the servo to travel."""
+        self.point_status[point] = 1 - self.point_status[point]
+        self.point_pos[point] = (point_pos_0, point_pos_1)[self.point_status[point]][point]
+        self.send(f"<Setting point in Arduino, Point: {point} Val: {self.point_pos[point]}>\n")
+
+        time.sleep(self.servo_delay)
+
+        if sync:
+            self.sync_data()
+
+    def adjust_position(self, point: int, change: int, name: str):
+        if point >= point_count:
+            return
+        self.point_pos[point] += change
+        self.send(f"<{name} point in Arduino, Point: {point} Val: {self.point_pos[point]}>\n")
+
+    def sync_data(self):
+        self.send("S" + "".join(str(status) for status in self.point_status) + "\r\n")
+
+    def send(self, text: str):
+        """Write to the port, injecting any faults."""
+        data = bytearray(text.encode("ascii"))
+
+        if self.noise_rate and self.random.random() < self.noise_rate:
+            noise = bytes(self.random.randrange(256) for _ in range(self.random.randint(1, 20)))
+            data[:0] = noise.replace(b"\n", b"") + b"\n"
+
+        if self.corrupt_rate and self.random.random() < self.corrupt_rate:
+            # leave the line ending alone so the rest of the framing is intact
+            data[self.random.randrange(len(data.rstrip(b"\r\n")) or 1)] = self.random.randrange(128, 256)
+
+        try:
+            written = os.write(self.master, data)
+        except BlockingIOError:
+            written = 0
+        self.dropped_bytes += len(data) - written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arduino command board emulator")
+    parser.add_argument("--servo-delay", type=float, default=1.0, help="seconds for each servo to travel")
+    parser.add_argument("--heartbeat", type=float, default=20.0, help="seconds between heartbeats, 0 for none")
+    parser.add_argument("--response-delay", type=float, nargs=2, default=(0.0, 0.0), metavar=("MIN", "MAX"))
+    parser.add_argument("--noise", type=float, default=0.0, help="chance of a noise line before each line")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="chance of a corrupt byte in each line")
+    parser.add_argument("--boot", action="store_true", help="run the start up sequence")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    emulator = ArduinoEmulator(
+        args.servo_delay, args.heartbeat or None, args.response_delay, args.noise, args.corrupt, args.boot, args.seed
+    )
+    print(f"Emulating the Arduino on {emulator.port}. Ctrl+C to stop.")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        emulator.close()
@@ -0,0 +1,98 @@
+import math
+import pygame
+from typing import Any, Optional, Tuple
+
+
+def distance_to_segment(pos: Tuple[float, float], start: Tuple[float, float], end: Tuple[float, float]) -> float:
+    """Shortest distance from pos to the line segment between start and end."""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    length_squared = dx * dx + dy * dy
+
+    if length_squared == 0:
+        return math.dist(pos, start)
+
+    # position along the segment of the closest point, clamped to the ends
+    t = ((pos[0] - start[0]) * dx + (pos[1] - start[1]) * dy) / length_squared
+    t = max(0.0, min(1.0, t))
+
+    return math.dist(pos, (start[0] + t * dx, start[1] + t * dy))
+
+
+class HitGrid:
+    """Uniform grid index over everything in the layout that can be hovered or clicked.
+
+    Each cell lists the shapes whose hit area overlaps it, so finding the item under the mouse only needs the shapes
+    in a single cell. Rects are hit if they contain the position. Segments are hit if the position is within a radius
+    of the line, which follows diagonal track exactly rather than using its bounding box.
+    """
+
+    def __init__(self, width: int, height: int, cell_size: int = 20):
+        """Sets up an empty grid.
+
+        Args:
+            width (int): Width of the area covered, in layout units.
+            height (int): Height of the area covered, in layout units.
+            cell_size (int, optional): Width and height of each cell. Defaults to 20.
+        """
+        self.cell_size = cell_size
+        self.columns = width // cell_size + 1
+        self.rows = height // cell_size + 1
+        self.cells: list[list[tuple]] = [[] for _ in range(self.columns * self.rows)]
+
+    def _add(self, shape: tuple, bounds: pygame.Rect):
+        """Add the shape to every cell its bounds overlap."""
+        first_column = max(0, bounds.left // self.cell_size)
+        last_column = min(self.columns - 1, bounds.right // self.cell_size)
+        first_row = max(0, bounds.top // self.cell_size)
+        last_row = min(self.rows - 1, bounds.bottom // self.cell_size)
+
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                self.cells[row * self.columns + column].append(shape)
+
+    def add_rect(self, item: Any, rect: pygame.Rect, priority: int = 0):
+        """Index an item with a rectangular hit area. Lower priority values win when shapes overlap."""
+        self._add((priority, item, rect, None), rect)
+
+    def add_segment(
+        self, item: Any, start: Tuple[int, int], end: Tuple[int, int], radius: float, priority: int = 1
+    ):
+        """Index an item with a hit area of radius around the segment from start to end."""
+        left, top = min(start[0], end[0]), min(start[1], end[1])
+        bounds = pygame.Rect(left, top, abs(end[0] - start[0]), abs(end[1] - start[1]))
+        margin = 2 * math.ceil(radius)  # inflate splits the margin between the sides
+        self._add((priority, item, (tuple(start), tuple(end)), radius), bounds.inflate(margin, margin))
+
+    def find(self, pos: Tuple[float, float]) -> Optional[Any]:
+        """Find the single item under pos.
+
+        Where shapes overlap, the lowest priority wins, then the closest segment.
+
+        Returns:
+            Optional[Any]: The item or None if nothing is hit.
+        """
+        column = int(pos[0] // self.cell_size)
+        row = int(pos[1] // self.cell_size)
+
+        if not (0 <= column < self.columns and 0 <= row < self.rows):
+            return None
+
+        best = None
+        best_key = None
+
+        for priority, item, shape, radius in self.cells[row * self.columns + column]:
+            if radius is None:  # rect
+                if not shape.collidepoint(pos):
+                    continue
+                distance = 0.0
+            else:  # segment
+                distance = distance_to_segment(pos, shape[0], shape[1])
+                if distance > radius:
+                    continue
+
+            if best_key is None or (priority, distance) < best_key:
+                best = item
+                best_key = (priority, distance)
+
+        return best
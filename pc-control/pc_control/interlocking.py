@@ -0,0 +1,90 @@
+"""Locks the routes which have been set so nothing can be changed underneath them.
+
+Each route is encoded as integer bitmasks: a bit for each track it occupies, and 2 bits for each point it needs, holding
+the state needed + 1 as in the route search. Two routes conflict if they share a track or need a point in different
+states, which is a few bitwise operations however large the layout.
+"""
+
+from typing import NamedTuple, Optional
+from pc_control.track_graph import Route, RouteTable
+
+
+class RouteMasks(NamedTuple):
+    tracks: int  # bit per track index occupied
+    points: int  # 0b11 in the 2 bits of each point needed
+    states: int  # state needed + 1 in the 2 bits of each point needed
+
+
+def encode_route(route: Route) -> RouteMasks:
+    tracks = 0
+    for track in route.tracks:
+        tracks |= 1 << track
+
+    points = states = 0
+    for point, state in route.point_states:
+        points |= 3 << 2 * point
+        states |= (state + 1) << 2 * point
+
+    return RouteMasks(tracks, points, states)
+
+
+class Interlocking:
+    """The routes locked and the union of their masks."""
+
+    def __init__(self, routes: RouteTable):
+        """Encodes every route in the table.
+
+        Args:
+            routes (RouteTable): Routes between destinations. Other routes are encoded when they are locked.
+        """
+        self.masks = {route: encode_route(route) for pair_routes in routes.routes.values() for route in pair_routes}
+        self.locked: list[Route] = []
+        self.locked_masks = RouteMasks(0, 0, 0)
+
+    def get_masks(self, route: Route) -> RouteMasks:
+        masks = self.masks.get(route)
+        if masks is None:
+            masks = self.masks[route] = encode_route(route)
+        return masks
+
+    def conflicts(self, route: Route) -> bool:
+        """Does the route share a track with a locked route or need a locked point in another state?"""
+        if route in self.locked:
+            return False
+        masks, locked = self.get_masks(route), self.locked_masks
+        return bool(masks.tracks & locked.tracks or (masks.states ^ locked.states) & masks.points & locked.points)
+
+    def lock(self, route: Route):
+        if route not in self.locked:
+            self.locked.append(route)
+            self.update_locked_masks()
+
+    def release(self, track: int) -> list[Route]:
+        """Release the locked routes which start or end on a track.
+
+        Returns:
+            list[Route]: The routes released.
+        """
+        released = [route for route in self.locked if track in (route.tracks[0], route.tracks[-1])]
+        if released:
+            self.locked = [route for route in self.locked if route not in released]
+            self.update_locked_masks()
+        return released
+
+    def update_locked_masks(self):
+        tracks = points = states = 0
+        for route in self.locked:
+            masks = self.get_masks(route)
+            tracks |= masks.tracks
+            points |= masks.points
+            states |= masks.states
+        self.locked_masks = RouteMasks(tracks, points, states)
+
+    def locking_route(self, point: int) -> Optional[Route]:
+        """The locked route which needs a point, so stops it moving. None if the point is free."""
+        if not self.locked_masks.points >> 2 * point & 3:
+            return None
+        for route in self.locked:
+            if self.get_masks(route).points >> 2 * point & 3:
+                return route
+        return None
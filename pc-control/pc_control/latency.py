@@ -0,0 +1,243 @@
+import json
+import math
+import time
+import tomllib
+import pygame
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Optional, Tuple
+from pc_control.protocol import (
+    IdMessage,
+    Message,
+    PointDecrementMessage,
+    PointIncrementMessage,
+    PointSetMessage,
+    StatusMessage,
+    SyncMessage,
+)
+from pc_control.text_cache import get_sys_font
+
+
+def read_latency_settings():
+    with open(Path(__file__).parent.parent / "settings.toml", "rb") as f:
+        return tomllib.load(f)["latency"]
+
+
+class LatencyHistogram:
+    """Counts latencies in fixed, logarithmically spaced buckets.
+
+    Memory and the cost of adding a sample are fixed however long the app runs. Percentiles are accurate to the
+    bucket width, 10% of the value.
+    """
+
+    min_ms = 1.0  # bucket 0 is everything up to 1 ms
+    growth = 1.1  # each bucket is 10% wider than the last
+    bucket_count = 128  # the last bucket is everything over 3 minutes
+
+    def __init__(self):
+        self.counts = array("L", bytes(array("L").itemsize * self.bucket_count))
+        self.count = 0
+        self.last_ms = 0.0
+
+    def add(self, ms: float):
+        if ms <= self.min_ms:
+            index = 0
+        else:
+            index = min(self.bucket_count - 1, math.ceil(math.log(ms / self.min_ms, self.growth)))
+        self.counts[index] += 1
+        self.count += 1
+        self.last_ms = ms
+
+    def upper_bound(self, index: int) -> float:
+        """Largest latency in ms counted in the bucket."""
+        return self.min_ms * self.growth**index
+
+    def percentile(self, fraction: float) -> float:
+        """Latency in ms which fraction of the samples are at or below, e.g. 0.99 for p99. 0 if there are no samples."""
+        if not self.count:
+            return 0.0
+
+        target = fraction * self.count
+        total = 0
+        for index, count in enumerate(self.counts):
+            total += count
+            if total >= target:
+                return self.upper_bound(index)
+        return self.upper_bound(self.bucket_count - 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "p50_ms": round(self.percentile(0.5), 1),
+            "p99_ms": round(self.percentile(0.99), 1),
+            # only the buckets with samples, keyed by their upper bound in ms
+            "buckets": {f"{self.upper_bound(i):.1f}": count for i, count in enumerate(self.counts) if count},
+        }
+
+
+def reply_key(message: Message) -> Optional[tuple]:
+    """The command a message acknowledges, in the same form as command_key. None if it doesn't acknowledge one."""
+    match message:
+        case PointSetMessage(servo_index=servo_index):
+            return ("p", servo_index)
+        case PointIncrementMessage(servo_index=servo_index):
+            return ("i", servo_index)
+        case PointDecrementMessage(servo_index=servo_index):
+            return ("d", servo_index)
+        case SyncMessage():
+            return ("r",)
+        case IdMessage():
+            return ("c",)
+        case StatusMessage(text="Lights Toggled"):
+            return ("l",)
+        case StatusMessage(text="Signals..."):
+            return ("s",)
+    return None
+
+
+def command_key(command: str) -> tuple:
+    """e.g. p5 -> ("p", 5) and r -> ("r",)"""
+    if command[0] in "pid" and command[1:].isdigit():
+        return (command[0], int(command[1:]))
+    return (command[0],)
+
+
+class LatencyTracker:
+    """Measures the time from a command being written to the Arduino acknowledging it.
+
+    Commands are matched to their acknowledgements in order, e.g. p5 to the next "<Setting point in Arduino, Point: 5".
+    Point commands are counted per servo and every command is counted in the global histogram. Commands which are
+    never acknowledged are dropped after timeout seconds.
+    """
+
+    def __init__(self, timeout: float = 10.0, warn_ms: float = 250.0, export_path: Optional[str] = None):
+        """Sets up the tracker.
+
+        Args:
+            timeout (float, optional): Seconds to wait for an acknowledgement. Defaults to 10.0.
+            warn_ms (float, optional): Servos with a p99 or last latency above this are highlighted. Defaults to 250.0.
+            export_path (Optional[str], optional): JSON file the histograms are written to on close. Defaults to None.
+        """
+        self.timeout = timeout
+        self.warn_ms = warn_ms
+        self.export_path = export_path
+
+        self.pending: dict[tuple, deque[float]] = {}  # command key -> times written, oldest first
+        self.timeouts = 0
+        self.overall = LatencyHistogram()
+        self.servos: dict[int, LatencyHistogram] = {}
+
+        self.visible = False
+        self.overlay = None
+        self.overlay_count = -1  # samples in the overlay when it was rendered
+        self.font = get_sys_font("Consolas", 12)
+
+    def commands_sent(self, data: bytes, timestamp: float):
+        """Called by CommandWriter's thread once a batch has been written."""
+        for command in data.decode("ascii").split("\n"):
+            if command:
+                self.pending.setdefault(command_key(command), deque(maxlen=64)).append(timestamp)
+
+    def message_received(self, message: Optional[Message], timestamp: float):
+        """Match a message from the Arduino with the oldest command it acknowledges.
+
+        Args:
+            message (Optional[Message]): Decoded line.
+            timestamp (float): time.monotonic() when the line arrived.
+        """
+        key = reply_key(message)
+        sent = self.pending.get(key)
+        if not sent:
+            return
+
+        # drop any commands which were never acknowledged
+        while sent and timestamp - sent[0] > self.timeout:
+            sent.popleft()
+            self.timeouts += 1
+        if not sent:
+            return
+
+        ms = (timestamp - sent.popleft()) * 1000
+        self.overall.add(ms)
+        if key[0] == "p":
+            self.servos.setdefault(key[1], LatencyHistogram()).add(ms)
+
+    def lagging_servos(self) -> list[int]:
+        """Servos whose p99 or latest acknowledgement is slower than warn_ms."""
+        return [
+            servo
+            for servo, histogram in self.servos.items()
+            if max(histogram.percentile(0.99), histogram.last_ms) > self.warn_ms
+        ]
+
+    def toggle(self):
+        """Show or hide the overlay."""
+        self.visible = not self.visible
+
+    def draw(self, screen: pygame.Surface, topright: Tuple[int, int], names: dict[int, str]) -> Optional[pygame.Rect]:
+        """Draw the overlay if it is visible. It is only rebuilt when there are new samples.
+
+        Args:
+            screen (pygame.Surface): Surface to draw on.
+            topright (Tuple[int, int]): Position of the top right corner of the overlay.
+            names (dict[int, str]): Point name for each servo index.
+
+        Returns:
+            Optional[pygame.Rect]: Area of the screen drawn to.
+        """
+        if not self.visible:
+            return None
+
+        if self.overlay is None or self.overlay_count != self.overall.count + self.timeouts:
+            self.overlay_count = self.overall.count + self.timeouts
+            self.overlay = self.render_overlay(names)
+
+        return screen.blit(self.overlay, self.overlay.get_rect(topright=topright))
+
+    def render_overlay(self, names: dict[int, str]) -> pygame.Surface:
+        rows = [(f"{'ack':<8}{'n':>6}{'p50 ms':>9}{'p99 ms':>9}{'last':>9}", (255, 255, 255))]
+
+        lagging = self.lagging_servos()
+        for servo in sorted(self.servos):
+            histogram = self.servos[servo]
+            colour = (255, 80, 80) if servo in lagging else (255, 255, 255)
+            rows.append((self.format_row(names.get(servo, f"p{servo}"), histogram), colour))
+
+        rows.append((self.format_row("all", self.overall), (255, 255, 255)))
+        rows.append((f"{'timeouts':<8}{self.timeouts:>6}", (255, 255, 255)))
+
+        line_height = self.font.get_linesize()
+        rendered = [self.font.render(text, True, colour) for text, colour in rows]
+        overlay = pygame.Surface((max(row.get_width() for row in rendered) + 10, line_height * len(rows) + 10))
+        overlay.fill((40, 40, 40))
+        for index, row in enumerate(rendered):
+            overlay.blit(row, (5, 5 + index * line_height))
+
+        return overlay
+
+    @staticmethod
+    def format_row(name: str, histogram: LatencyHistogram) -> str:
+        return (
+            f"{name:<8}{histogram.count:>6}{histogram.percentile(0.5):>9.1f}"
+            f"{histogram.percentile(0.99):>9.1f}{histogram.last_ms:>9.1f}"
+        )
+
+    def export(self, path: str):
+        """Write the histograms to a JSON file."""
+        data = {
+            "time": time.time(),
+            "timeouts": self.timeouts,
+            "overall": self.overall.to_dict(),
+            "servos": {str(servo): histogram.to_dict() for servo, histogram in sorted(self.servos.items())},
+        }
+        Path(path).write_text(json.dumps(data, indent=4))
+
+    def close(self):
+        if self.export_path and self.overall.count:
+            self.export(self.export_path)
+
+
+def create_latency_tracker() -> LatencyTracker:
+    settings = read_latency_settings()
+    return LatencyTracker(settings["timeout"], settings["warn_ms"], settings["export_path"] or None)
@@ -1,11 +1,68 @@
+import time
 import pygame
 
 from pc_control.points import StraightPoint, CrossOver, Point, Triple
 from pc_control.track import Track
 from pc_control.signals import Signal
-from typing import Tuple
+from pc_control.canvas import Canvas, Transform
+from pc_control.hit_test import HitGrid
+from pc_control.interlocking import Interlocking
+from pc_control.route_tracer import RouteTracer
+from pc_control.track_graph import Route, RouteTable, TrackGraph
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
 import serial
 
+route_cache_path = Path(__file__).parent.parent / "route_cache.bin"
+
+
+class PendingToggles:
+    """Passes commands on to the port and counts the point toggles the Arduino hasn't acknowledged yet.
+
+    The Arduino sends a sync after each toggle, so while several toggles are on their way, e.g. for a route or the
+    triple's two servos, a sync only shows the first of them done. Points still waiting for a toggle are left alone
+    when a sync arrives. If an acknowledgement is lost, the syncs are trusted again after timeout seconds.
+    """
+
+    def __init__(self, ser: serial.Serial, timeout: float = 5.0):
+        """Sets up the count.
+
+        Args:
+            ser (serial.Serial): Port to write to.
+            timeout (float, optional): Seconds without an acknowledgement before giving up on the rest. Defaults
+                to 5.0.
+        """
+        self.ser = ser
+        self.timeout = timeout
+        self.pending: dict[int, int] = {}  # servo index -> toggles written and not yet acknowledged
+        self.last_change = 0.0
+
+    def write(self, data: bytes) -> int:
+        """Write to the port, then count the toggles. Nothing is counted if the write raises."""
+        written = self.ser.write(data)
+        for command in data.decode("ascii").split("\n"):
+            if command.startswith("p") and command[1:].isdigit():
+                servo_index = int(command[1:])
+                self.pending[servo_index] = self.pending.get(servo_index, 0) + 1
+                self.last_change = time.monotonic()
+        return written
+
+    def acknowledged(self, servo_index: int):
+        """Called when the Arduino reports setting a servo. A servo moved as the pair of another isn't counted."""
+        count = self.pending.get(servo_index)
+        if count is None:
+            return
+        if count > 1:
+            self.pending[servo_index] = count - 1
+        else:
+            del self.pending[servo_index]
+        self.last_change = time.monotonic()
+
+    def is_pending(self, servo_index: int) -> bool:
+        if self.pending and time.monotonic() - self.last_change > self.timeout:
+            self.pending.clear()  # acknowledgements lost
+        return servo_index in self.pending
+
 
 class Layout(pygame.Surface):
     """Draws the bowmont water layout diagram."""
@@ -13,45 +70,67 @@ class Layout(pygame.Surface):
     width = 635
     height = 345
 
-    def __init__(self, ser: serial.Serial):
-        """Creates all the objects in the layout drawing."""
-        super().__init__((Layout.width, Layout.height))
+    def __init__(self, ser: serial.Serial, scale: float = 1.0, route_cache: Optional[Path] = None):
+        """Creates all the objects in the layout drawing.
 
-        sw_0 = StraightPoint(self, 20, 120, 0, ser, type="up_right", name="SW0")
+        Args:
+            ser (serial.Serial): Serial connection to the Arduino.
+            scale (float, optional): Pixels per layout unit. Defaults to 1.0.
+            route_cache (Optional[Path], optional): File the route table is cached in, e.g. route_cache_path.
+                Defaults to None, to build the table every time.
+        """
+        # Points write through this so the syncs sent while their toggles are on the way can be ignored
+        self.ser = ser = PendingToggles(ser)
+
+        self.transform = Transform(scale)
+        super().__init__(self.transform.point((Layout.width, Layout.height)))
+
+        # All items are positioned in layout units and drawn at the target scale through a canvas.
+        self.canvas = Canvas(self, self.transform)
+
+        # Tracks and scenery only change when a route is highlighted, so they are drawn to a cached background layer.
+        self.background = pygame.Surface(self.get_size())
+        self.background_canvas = Canvas(self.background, self.transform)
+        self.background_drawn = False
+
+        # Areas of the layout which have changed in the last call to draw.
+        self.dirty_rects: list[pygame.Rect] = []
+
+        sw_0 = StraightPoint(self.canvas, 20, 120, 0, ser, type="up_right", name="SW0")
         sw_0_enter, sw_0_exit, sw_0_diverge = sw_0.get_connections()
 
-        sw_1 = StraightPoint(self, 20, 230, 1, ser, type="up_right", name="SW1")
+        sw_1 = StraightPoint(self.canvas, 20, 230, 1, ser, type="up_right", name="SW1")
         sw_1_enter, sw_1_exit, sw_1_diverge = sw_1.get_connections()
 
-        sw_2 = StraightPoint(self, 140, 180, 2, ser, type="left_down", name="SW2")
+        sw_2 = StraightPoint(self.canvas, 140, 180, 2, ser, type="left_down", name="SW2")
         sw_2_enter, sw_2_exit, sw_2_diverge = sw_2.get_connections()
 
-        sw_3 = CrossOver(self, 140, 300, 3, ser, "top_bottom", name="SW3")
+        sw_3 = CrossOver(self.canvas, 140, 300, 3, ser, "top_bottom", name="SW3")
         sw_3_enter1, sw_3_enter2, sw_3_exit1, sw10_exit2 = sw_3.get_connections()
 
-        sw_4 = StraightPoint(self, 230, 90, 5, ser, type="right_up", name="SW4", name_pos="top")
+        sw_4 = StraightPoint(self.canvas, 230, 90, 5, ser, type="right_up", name="SW4", name_pos="top")
         sw_4_enter, sw_4_exit, sw_4_diverge = sw_4.get_connections()
 
-        sw_5 = Triple(self, 280, 250, 6, ser, name="SW5")
+        sw_5 = Triple(self.canvas, 280, 250, 6, ser, name="SW5")
         sw_5_enter, sw_5_top, sw_5_middle, sw_5_bottom = sw_5.get_connections()
 
-        sw_6 = CrossOver(self, 240, 160, 8, ser, "bottom_top", name="SW6", name_pos="top")
+        sw_6 = CrossOver(self.canvas, 240, 160, 8, ser, "bottom_top", name="SW6", name_pos="top")
         sw_6_enter1, sw_6_enter2, sw_6_exit1, sw6_exit2 = sw_6.get_connections()
 
-        sw_7 = StraightPoint(self, 310, 110, 10, ser, type="right_up", name="SW7")
+        sw_7 = StraightPoint(self.canvas, 310, 110, 10, ser, type="right_up", name="SW7")
         sw_7_enter, sw_7_exit, sw_7_diverge = sw_7.get_connections()
-        station_signal = Signal(self, 315, 60)
+        station_signal = Signal(self.canvas, 315, 60)
 
-        sw_8 = StraightPoint(self, 370, 250, 11, ser, type="right_up", name="SW8", name_pos="top")
+        sw_8 = StraightPoint(self.canvas, 370, 250, 11, ser, type="right_up", name="SW8", name_pos="top")
         sw_8_enter, sw_8_exit, sw_8_diverge = sw_8.get_connections()
 
-        sw_9 = StraightPoint(self, 510, 20, 12, ser, type="right_down", name="SW9")
+        sw_9 = StraightPoint(self.canvas, 510, 20, 12, ser, type="right_down", name="SW9")
         sw_9_enter, sw_9_exit, sw_9_diverge = sw_9.get_connections()
 
-        sw_10 = StraightPoint(self, 480, 320, 13, ser, type="right_up", name="SW10")
+        sw_10 = StraightPoint(self.canvas, 480, 320, 13, ser, type="right_up", name="SW10")
         sw_10_enter, sw_10_exit, sw_10_diverge = sw_10.get_connections()
 
-        sw_11 = StraightPoint(self, 440, 230, 14, ser, type="left_up", name="SW11")
+        sw_11 = StraightPoint(self.canvas, 440, 230, 14, ser, type="left_up", name="SW11")
         sw_11_enter, sw_11_exit, sw_11_diverge = sw_11.get_connections()
 
         self.points: list[Point] = [
@@ -69,25 +148,25 @@ class Layout(pygame.Surface):
             sw_11,
         ]
 
-        tr1 = Track(self, sw_10_exit, sw10_exit2)
-        tr2 = Track(self, sw_3_enter2, sw_1_enter, [(sw_1_enter[0], sw_3_enter2[1])])
-        tr3 = Track(self, sw_1_exit, sw_0_enter)
+        tr1 = Track(self.background_canvas, sw_10_exit, sw10_exit2)
+        tr2 = Track(self.background_canvas, sw_3_enter2, sw_1_enter, [(sw_1_enter[0], sw_3_enter2[1])])
+        tr3 = Track(self.background_canvas, sw_1_exit, sw_0_enter)
         tr4 = Track(
-            self,
+            self.background_canvas,
             sw_0_diverge,
             (sw_0_diverge[0] + 100, sw_9_diverge[1]),
             [(sw_0_diverge[0], sw_9_diverge[1])],
             endstop="vertical",
         )
-        tr5 = Track(self, sw_0_exit, sw_9_exit, [(sw_0_exit[0], sw_9_exit[1])])
+        tr5 = Track(self.background_canvas, sw_0_exit, sw_9_exit, [(sw_0_exit[0], sw_9_exit[1])])
         tr6 = Track(
-            self,
+            self.background_canvas,
             sw_9_enter,
             sw_10_enter,
             [(Layout.width - 20, sw_9_enter[1]), (Layout.width - 20, sw_10_enter[1])],
         )
         tr7 = Track(
-            self,
+            self.background_canvas,
             sw_10_diverge,
             sw_8_enter,
             [
@@ -96,7 +175,7 @@ class Layout(pygame.Surface):
             ],
         )
         tr8 = Track(
-            self,
+            self.background_canvas,
             sw_8_diverge,
             sw_2_diverge,
             [
@@ -104,22 +183,22 @@ class Layout(pygame.Surface):
                 (sw6_exit2[0] - 5, sw_2_diverge[1]),
             ],
         )
-        tr9 = Track(self, sw_2_exit, sw_6_enter2)
-        tr10 = Track(self, sw_1_diverge, sw_6_enter1, [(sw_1_diverge[0], sw_6_enter1[1])])
+        tr9 = Track(self.background_canvas, sw_2_exit, sw_6_enter2)
+        tr10 = Track(self.background_canvas, sw_1_diverge, sw_6_enter1, [(sw_1_diverge[0], sw_6_enter1[1])])
         tr11 = Track(
-            self,
+            self.background_canvas,
             sw_2_enter,
             sw_3_enter1,
             [(sw_2_enter[0] - 50, sw_2_enter[1]), (sw_2_enter[0] - 50, sw_3_enter1[1])],
         )
         tr12 = Track(
-            self,
+            self.background_canvas,
             sw_3_exit1,
             sw_11_enter,
             [(sw_8_enter[0] - 5, sw_3_exit1[1]), (sw_11_enter[0] - 5, sw_11_enter[1])],
         )
         tr13 = Track(
-            self,
+            self.background_canvas,
             sw_11_diverge,
             sw6_exit2,
             [
@@ -131,7 +210,7 @@ class Layout(pygame.Surface):
         self.underpass_bottom = (sw_7_enter[0] + 75, sw_7_enter[1] + 15)
         self.underpass_top = (self.underpass_bottom[0], sw_7_enter[1] - 15)
         tr14 = Track(
-            self,
+            self.background_canvas,
             sw_6_exit1,
             self.underpass_bottom,
             [
@@ -141,12 +220,12 @@ class Layout(pygame.Surface):
         )
         # little bit to make it line up neatly
         tr14_b = Track(
-            self,
+            self.background_canvas,
             (self.underpass_bottom[0] + 1, self.underpass_bottom[1] + 7),
             (self.underpass_bottom[0] + 1, self.underpass_bottom[1]),
         )
         tr15 = Track(
-            self,
+            self.background_canvas,
             sw_9_diverge,
             self.underpass_top,
             [
@@ -156,33 +235,33 @@ class Layout(pygame.Surface):
         )
         # little bit to make it line up neatly
         tr15_b = Track(
-            self,
+            self.background_canvas,
             (self.underpass_top[0] - 1, self.underpass_top[1] - 7),
             (self.underpass_top[0] - 1, self.underpass_top[1]),
         )
 
-        tr16 = Track(self, sw_8_exit, sw_5_enter)
+        tr16 = Track(self.background_canvas, sw_8_exit, sw_5_enter)
 
         slope = Track(
-            self,
+            self.background_canvas,
             sw_11_exit,
             sw_7_enter,
             [(sw_11_exit[0] + 40, sw_11_exit[1]), (sw_11_exit[0] + 40, sw_7_enter[1])],
         )
 
         platform_1 = Track(
-            self,
+            self.background_canvas,
             sw_4_diverge,
             (sw_4_diverge[0] - 110, sw_4_diverge[1]),
             endstop="vertical",
         )
-        platform_2 = Track(self, sw_4_exit, (sw_4_diverge[0] - 110, sw_4_exit[1]), endstop="vertical")
-        platform_3 = Track(self, sw_7_exit, (sw_4_diverge[0] - 110, sw_7_exit[1]), endstop="vertical")
-        platform_stub = Track(self, sw_7_diverge, sw_4_enter)
+        platform_2 = Track(self.background_canvas, sw_4_exit, (sw_4_diverge[0] - 110, sw_4_exit[1]), endstop="vertical")
+        platform_3 = Track(self.background_canvas, sw_7_exit, (sw_4_diverge[0] - 110, sw_7_exit[1]), endstop="vertical")
+        platform_stub = Track(self.background_canvas, sw_7_diverge, sw_4_enter)
 
-        siding_1 = Track(self, sw_5_top, (sw_5_top[0] - 70, sw_5_top[1]), endstop="vertical")
-        siding_2 = Track(self, sw_5_middle, (sw_5_middle[0] - 70, sw_5_middle[1]), endstop="vertical")
-        siding_3 = Track(self, sw_5_bottom, (sw_5_bottom[0] - 70, sw_5_bottom[1]), endstop="vertical")
+        siding_1 = Track(self.background_canvas, sw_5_top, (sw_5_top[0] - 70, sw_5_top[1]), endstop="vertical")
+        siding_2 = Track(self.background_canvas, sw_5_middle, (sw_5_middle[0] - 70, sw_5_middle[1]), endstop="vertical")
+        siding_3 = Track(self.background_canvas, sw_5_bottom, (sw_5_bottom[0] - 70, sw_5_bottom[1]), endstop="vertical")
 
         tr1.connections = [sw_10, sw_3]
         tr2.connections = [sw_3, sw_1]
@@ -259,34 +338,241 @@ class Layout(pygame.Surface):
 
         self.signals = [station_signal]
 
-    def update_points(self, states: list[int]):
-        for i, state in enumerate(states):
-            self.points[i].set_state(state)
+        # The topology compiled for route finding
+        self.graph = TrackGraph(self.tracks, self.points)
+
+        # Where trains are sent. Routes between these and any other dead ends are precomputed.
+        self.destinations = {
+            "Platform 1": platform_1,
+            "Platform 2": platform_2,
+            "Platform 3": platform_3,
+            "Siding 1": siding_1,
+            "Siding 2": siding_2,
+            "Siding 3": siding_3,
+            "Fiddle loop": tr6,
+        }
+        terminals = [self.tracks.index(track) for track in self.destinations.values()]
+        terminals += [
+            index for index, track in enumerate(self.tracks) if len(track.connections) == 1 and index not in terminals
+        ]
+        self.routes = RouteTable(self.graph, terminals, route_cache)
+
+        # Routes which have been set are locked so their points can't be moved or other routes set across them
+        self.interlocking = Interlocking(self.routes)
+        self.rejected: Optional[Tuple[Point, Track]] = None  # last point click rejected and the leg it would break
+
+        # Index everything that can be hovered or clicked so the mouse position resolves to a single item.
+        # Points and signals take priority over the tracks which run into them.
+        self.hit_grid = HitGrid(Layout.width, Layout.height)
+        for item in self.points + self.signals:
+            self.hit_grid.add_rect(item, item.rect, priority=0)
+        for track in self.tracks:
+            for start, end in track.geometry.segments:
+                self.hit_grid.add_segment(track, start, end, track.click_radius, priority=1)
+
+        self.hover_item = None
+
+        # Highlights the route from the track hovered over, following the points as they change.
+        self.route_tracer = RouteTracer(self.tracks, self.points)
+        for point in self.points:
+            point.on_state_change = self.route_tracer.point_changed
+
+        # First track clicked when setting a route. The route is set when a second track is clicked.
+        self.route_entry: Optional[Track] = None
+
+    def get_route(self, start: str, end: str) -> Optional[Route]:
+        """Shortest route between two destinations, e.g. get_route("Platform 2", "Siding 3").
+
+        Returns:
+            Optional[Route]: None if there isn't one.
+        """
+        routes = self.routes.get_routes(
+            self.graph.track_index[self.destinations[start]], self.graph.track_index[self.destinations[end]]
+        )
+        return routes[0] if routes else None
+
+    def plan_route(self, start: Track, end: Track) -> Tuple[Optional[Route], str]:
+        """The route between two tracks needing the fewest servo moves from the current point states.
+
+        Routes between destinations come from the route table, so the choice is made between all of them. Otherwise
+        the shortest route is searched for. Routes which conflict with a locked route are skipped.
+
+        Returns:
+            Tuple[Optional[Route], str]: The route, or None if there isn't a free one, and the commands to set it.
+        """
+        a, b = self.graph.track_index[start], self.graph.track_index[end]
+        routes = self.routes.get_routes(a, b) or (self.graph.find_route(a, b),)
 
-    def draw(self, mouse_pos: Tuple[int, int], mouse_up: bool):
-        """Iterates through the items and draws them. Calls update_state with the mouse status.
+        best = None
+        for route in routes:
+            if route is None or self.interlocking.conflicts(route):
+                continue
+            commands = "".join(self.points[point].get_commands(state) for point, state in route.point_states)
+            # fewest moves, then the shortest route. routes are sorted shortest first so ties keep the shortest.
+            if best is None or commands.count("\n") < best[1].count("\n"):
+                best = (route, commands)
+
+        return best or (None, "")
+
+    def set_route(self, start: Track, end: Track) -> Optional[Route]:
+        """Set the points for a route in one write, toggling only the servos which need to move. The route is locked.
+
+        Raises:
+            serial.SerialTimeoutException: If the commands couldn't be queued. No points are changed.
+
+        Returns:
+            Optional[Route]: The route set, or None if there isn't one.
+        """
+        route, commands = self.plan_route(start, end)
+        if commands:
+            self.ser.write(commands.encode())
+            print(commands.replace("\n", " ").strip())
+            for point, state in route.point_states:
+                if state != self.points[point].get_target_state():
+                    self.points[point].set_state(state)
+                    self.points[point].line_colour = self.points[point].colours["moving"]
+        if route is not None:
+            self.interlocking.lock(route)
+        return route
+
+    def click_track(self, track: Track):
+        """Entry/exit route setting. The first track clicked is the entry and the second the exit, which sets the
+        route between them. Clicking the entry again cancels it and releases the routes starting or ending there."""
+        if self.route_entry is None:
+            self.route_entry = track
+        elif track is self.route_entry:
+            self.route_entry = None
+            for route in self.interlocking.release(self.graph.track_index[track]):
+                print(f"Released route {route.tracks}")
+        else:
+            entry, self.route_entry = self.route_entry, None
+            if self.set_route(entry, track) is None:
+                print("No free route")
+
+    def click_point(self, point: Point):
+        """Toggle a point unless a locked route needs it, in which case the leg the route uses is marked."""
+        index = self.points.index(point)
+        route = self.interlocking.locking_route(index)
+        if route is None:
+            point.click()
+            return
+
+        state = dict(route.point_states)[index]
+        on_route = set(route.tracks)
+        track_index = self.graph.track_index
+        for leg_state, track_a, track_b in point.get_legs():
+            if leg_state == state and track_index[track_a] in on_route and track_index[track_b] in on_route:
+                self.rejected = (point, track_b)
+                point.mark_conflict(track_b)
+                break
+        print(f"{point.name} is locked by route {route.tracks}")
+
+    def get_point_states(self) -> list[int]:
+        """The state each point is in or moving to."""
+        return [point.get_target_state() for point in self.points]
+
+    def update_points(self, states: Sequence[int]) -> list[int]:
+        """Set the points from a sync. Only points which differ from the last known state are set, so points already
+        in place or moving there aren't restarted. Points with toggles the Arduino hasn't acknowledged yet are left
+        alone, as the sync was sent before it handled them.
+
+        Returns:
+            list[int]: Indices of the points changed.
+        """
+        changed = [
+            i
+            for i, (state, known) in enumerate(zip(states, self.get_point_states()))
+            if state != known and not self.is_waiting(self.points[i])
+        ]
+        for i in changed:
+            self.points[i].set_state(states[i])
+        return changed
+
+    def is_waiting(self, point: Point) -> bool:
+        """Are any of the point's toggles still to be acknowledged?"""
+        servos = (point.servo_index, point.servo_index + 1) if point is self.triple else (point.servo_index,)
+        return any(self.ser.is_pending(servo_index) for servo_index in servos)
+
+    def point_acknowledged(self, servo_index: int):
+        """Called when the Arduino reports setting a servo."""
+        self.ser.acknowledged(servo_index)
+
+    def is_animating(self) -> bool:
+        """Are any of the points moving?"""
+        return any(point.state.startswith("moving") for point in self.points)
+
+    def handle_mouse(self, mouse_pos: Tuple[int, int], mouse_up: bool):
+        """Finds the item under the mouse, updates the hover flags and clicks the item on mouse up.
+
+        Only needs calling when the mouse moves or is released.
 
         Args:
-            mouse_pos (Tuple[int, int]): Current mouse position?
+            mouse_pos (Tuple[int, int]): Current mouse position in pixels relative to the layout.
             mouse_up (bool): Mouse up event?
         """
-        self.fill((0, 0, 0))
-        pygame.draw.rect(self, (255, 255, 255), self.get_rect(), 1)
+        item = self.hit_grid.find(self.transform.to_layout(mouse_pos))
+
+        if item is not self.hover_item:
+            if self.hover_item is not None:
+                self.hover_item.hover = False
+            if item is not None:
+                item.hover = True
+            self.hover_item = item
+
+            if self.rejected:
+                self.rejected = None
+                self.route_tracer.apply_marks()
+
+        if mouse_up and isinstance(item, (Point, Signal, Track)):
+            try:
+                if isinstance(item, Track):
+                    self.click_track(item)
+                elif isinstance(item, Point):
+                    self.click_point(item)
+                else:
+                    item.click()
+            except serial.SerialTimeoutException as e:
+                # the command couldn't be queued so the point hasn't changed
+                print("Click ignored: " + str(e))
+
+    def draw(self):
+        """Iterates through the items and draws them.
+
+        The background layer is only redrawn when the route status of a track has changed.
+        The areas which have changed are collected in dirty_rects.
+        """
+        self.dirty_rects = []
+
+        if self.highlight_route() or not self.background_drawn:
+            self.draw_background()
+            self.background_drawn = True
+            self.dirty_rects.append(self.get_rect())
+
+        if self.rejected:
+            self.rejected[0].mark_conflict(self.rejected[1])  # kept over the route's own marks until the mouse moves on
+
+        self.blit(self.background, (0, 0))
 
         for signal in self.signals:
-            signal.update_state(mouse_pos, mouse_up)
             signal.draw()
-
-        for track in self.tracks:
-            track.draw(mouse_pos)
+            if signal.needs_redraw():
+                self.dirty_rects.append(self.transform.rect(signal.rect))
 
         for point in self.points:
-            point.check_mouse_click(mouse_pos, mouse_up)
             point.draw()
+            if point.needs_redraw():
+                self.dirty_rects.append(self.transform.rect(point.get_dirty_rect()).clip(self.get_rect()))
+
+    def draw_background(self):
+        """Draw the static parts of the layout (border, tracks, raised section and bridge) to the background layer."""
+        self.background.fill((0, 0, 0))
+        self.background_canvas.rect((255, 255, 255), pygame.Rect(0, 0, Layout.width, Layout.height), 1)
+
+        for track in self.tracks:
+            track.draw()
 
         # line to show raised section
-        pygame.draw.lines(
-            self,
+        self.background_canvas.lines(
             (125, 125, 125),
             False,
             [(342, 0), (342, 135), (120, 135), (120, Layout.height)],
@@ -295,8 +581,7 @@ class Layout(pygame.Surface):
 
         "bridge"
 
-        pygame.draw.lines(
-            self,
+        self.background_canvas.lines(
             (255, 255, 255),
             False,
             [
@@ -307,8 +592,7 @@ class Layout(pygame.Surface):
             ],
         )
 
-        pygame.draw.lines(
-            self,
+        self.background_canvas.lines(
             (255, 255, 255),
             False,
             [
@@ -319,91 +603,14 @@ class Layout(pygame.Surface):
             ],
         )
 
-        self.highlight_route()
-
-    def highlight_route(self):
-        """Check if any tracks are being hovered over then start a route traversal from that track."""
+    def highlight_route(self) -> bool:
+        """Highlight the route from the track hovered over, or from the entry while a route is being set.
 
-        # Clear the route status for all the tracks. If hovering, this is the route start.
-        route_start = None
-        for track in self.tracks:
-            track.in_route = False
-            if track.hover:
-                route_start = track
-
-        # Switches have flags to mark red crosses when routes enter switches set against them. Clear these flags.
-        for switch in self.points:
-            switch.mark_unoccupied = False
-
-        for crossover in self.crossovers:
-            crossover.conflict = None
-
-        self.triple.conflict = None
-
-        if route_start:
-            traverse_route(route_start)
-
-
-def traverse_route(route_start: Track):
-    """Traverse the route from the route start. Set the flag in the contained tracks to indicate they are in the route."""
-
-    # Find the connections for the route start. Build a list of 2 element tuples. Each tuple describes a connection.
-    connections_to_process = [(connection, route_start) for connection in route_start.connections]
-    route_start.in_route = True
-    route = [route_start]
-
-    # while there are still connections in the route
-    while connections_to_process:
-        # get the last connection - we add connections to the end
-        connection = connections_to_process.pop(0)
-
-        if isinstance(connection[0], Track):
-            # add it to the route
-            if not connection[0].in_route:
-                connection[0].in_route = True
-                # get the connections to this track and add them to the connections to process
-                connections_to_process += [
-                    (track_connection, connection[0]) for track_connection in connection[0].connections
-                ]
-                route += [connection]
-        elif isinstance(connection[0], StraightPoint):
-
-            switch_connections = connection[0].get_connected_tracks()
-
-            # We check if the switch reports that it is set to the track connected to it. If so add the track the other side of the switch to process.
-            if switch_connections[0] == connection[1]:
-                connections_to_process.append([switch_connections[1], connection[0]])
-            elif switch_connections[1] == connection[1]:
-                connections_to_process.append([switch_connections[0], connection[0]])
-            else:
-                connection[0].mark_unoccupied = True  # switch not set for route so set the flag to mark the red cross
-
-        elif isinstance(connection[0], CrossOver):
-            switch_connections = connection[0].get_connected_tracks()
-
-            # Is the crossover set or do we have two pairs of connections to handle?
-            if connection[0].state == "ahead" or connection[0].state == "moving_to_diverge":
-                for connection_pair in switch_connections:
-                    if connection_pair[0] == connection[1]:
-                        connections_to_process.append([connection_pair[1], connection[0]])
-                    elif connection_pair[1] == connection[1]:
-                        connections_to_process.append([connection_pair[0], connection[0]])
-            else:  # switch is in the crossover position so only one pair of connections.
-                if switch_connections[0] == connection[1]:
-                    connections_to_process.append([switch_connections[1], connection[0]])
-                elif switch_connections[1] == connection[1]:
-                    connections_to_process.append([switch_connections[0], connection[0]])
-                else:
-                    # set the cross at track which is not connected through the switch
-                    connection[0].mark_conflict(connection[1])
+        The route is traced again when the origin changes and only retraced after a point on it changes.
 
-        elif isinstance(connection[0], Triple):
-
-            switch_connections = connection[0].get_connected_tracks()
-
-            if switch_connections[0] == connection[1]:
-                connections_to_process.append([switch_connections[1], connection[0]])
-            elif switch_connections[1] == connection[1]:
-                connections_to_process.append([switch_connections[0], connection[0]])
-            else:
-                connection[0].mark_conflict(connection[1])
+        Returns:
+            bool: True if the tracks in the route have changed.
+        """
+        route_start = self.hover_item if isinstance(self.hover_item, Track) else self.route_entry
+        self.route_tracer.set_origin(route_start)
+        return self.route_tracer.update()
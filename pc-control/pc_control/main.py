@@ -2,29 +2,61 @@
 
 from pathlib import Path
 import sys
+import tomllib
 import pygame
 import pygame.freetype
 
-from pc_control.layout import Layout
-from pc_control.serial_comms import ZeroWaitSerial, read_connection_settings, DummySerial
+from pc_control.layout import Layout, route_cache_path
+from pc_control.text_cache import text_cache, get_sys_font
+from pc_control.profiler import create_profiler
+from pc_control.latency import LatencyTracker, create_latency_tracker
+from pc_control.discovery import find_arduino, read_discovery_timeout
+from pc_control.recording import ReplaySerial, SerialRecorder, read_recording_settings
+from pc_control.serial_comms import (
+    CommandQueueFull,
+    CommandWriter,
+    SerialConnection,
+    SerialLine,
+    read_connection_settings,
+)
+from pc_control.protocol import IdMessage, PointSetMessage, SyncMessage, decode_line
 from datetime import datetime
+from typing import Optional
 from pygame_widgets.button import Button
 import pygame_widgets
-from serial import SerialException
 
 resources = Path(__file__).parent / "resources"
 
+# Posted by the serial reader thread to wake the main loop when lines arrive
+SERIAL_DATA = pygame.event.custom_type()
+# Posted by the serial connection thread when the Arduino is connected or lost
+CONNECTION_CHANGED = pygame.event.custom_type()
+
+
+def read_display_settings():
+    with open(Path(__file__).parent.parent / "settings.toml", "rb") as f:
+        return tomllib.load(f)["display"]
+
 
 def main():
     """Basic pygame setup and main event loop."""
     port, baud = read_connection_settings()
+    display_settings = read_display_settings()
+    dirty_rendering = display_settings["dirty_rendering"]
     pygame.display.set_caption(f"Bowmont Town Layout PC Control ({port})")
 
     pygame.init()
     pygame.font.init()
 
-    width = 1280
-    height = 800
+    # Set up the display
+    # full screen if linux, windowed if windows
+    if sys.platform == "linux":
+        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    else:
+        screen = pygame.display.set_mode((1280, 800))
+
+    # everything is positioned relative to the actual display size
+    width, height = screen.get_size()
 
     # Title font
     title_font = pygame.font.Font(resources / "britrdn_.ttf", 39)
@@ -32,35 +64,59 @@ def main():
     sign_outline = pygame.Rect(width / 2 - title_surface.get_width() / 2 - 10, 5, title_surface.get_width() + 20, 40)
 
     # Serial Monitor Text
-    monitor_font = pygame.font.SysFont("Consolas", 12)
-    serial_monitor_buffer = [""] * 5
-
-    # Set up the display
-    # full screen if linux, windowed if windows
-    if sys.platform == "linux":
-        screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    monitor_font = get_sys_font("Consolas", 12)
+    serial_monitor_buffer = [""] * display_settings["monitor_lines"]
+    monitor_rect = pygame.Rect(0, height - 12 * len(serial_monitor_buffer), width - 60, 12 * len(serial_monitor_buffer))
+
+    # Connect the serial in the background, or play back a recording of it
+    recording_settings = read_recording_settings()
+    if recording_settings["replay_path"]:
+        ser = ReplaySerial(recording_settings["replay_path"], recording_settings["replay_speed"])
+    elif port == "auto":
+        ser = SerialConnection(
+            port,
+            baud,
+            find_port=lambda use_cache, stop: find_arduino(baud, read_discovery_timeout(), use_cache, stop),
+            identify=lambda text: isinstance(decode_line(text), IdMessage),
+        )
     else:
-        screen = pygame.display.set_mode((width, height))
+        ser = SerialConnection(port, baud)
+    connnection_message = text_cache.render(title_font, "NOT CONNECTED", (255, 0, 0))
 
-    # Connect the serial
-    try:
-        ser = ZeroWaitSerial(port, baud)
-        connected = True
-    except SerialException as e:
-        connected = False
-        connnection_message = title_font.render("NOT CONNECTED", True, (255, 0, 0))
-        ser = DummySerial()
-        print("Unable to start Serial" + str(e))
-
-    layout = Layout(ser)
+    # The layout is drawn directly at the scale which fills the space between the title and the serial monitor.
     layout_pos = (5, 50)
+    layout_scale = min(
+        (width - 2 * layout_pos[0]) / Layout.width,
+        (monitor_rect.top - layout_pos[1]) / Layout.height,
+    )
+    # Outbound commands are batched each frame and written from a background thread.
+    commands = CommandWriter(ser)
+
+    layout = Layout(commands, layout_scale, route_cache_path)
+
+    # Time from each command being written to the Arduino acknowledging it. F4 toggles the overlay.
+    latency = create_latency_tracker()
+    commands.on_sent = latency.commands_sent
+
+    recorder = None
+    if recording_settings["record_path"]:
+        recorder = SerialRecorder(recording_settings["record_path"])
+        ser.recorder = recorder
+        commands.recorder = recorder
+    latency_pos = (width - layout_pos[0] - 5, layout_pos[1] + 5)
+    servo_names = get_servo_names(layout)
+
+    ser.notify = lambda: pygame.event.post(pygame.event.Event(SERIAL_DATA))
+    ser.on_change = lambda: pygame.event.post(pygame.event.Event(CONNECTION_CHANGED))
+    if isinstance(ser, SerialConnection):
+        ser.start()
 
     image = pygame.image.load(resources / "sign_small.png")
     roundel = pygame.image.load(resources / "roundel.png")
     roundel_rect = roundel.get_rect(topleft=(width - 40 - 5, 5))
 
     # sync button
-    Button(
+    sync_button = Button(
         screen,
         width - 55,
         height - 35,
@@ -73,100 +129,210 @@ def main():
         pressedColour=(0, 200, 20),
         textColor=(100, 100, 100),
         radius=8,
-        onClick=lambda: request_sync(ser),
+        onClick=lambda: request_sync(commands),
     )
 
+    sync_rect = pygame.Rect(
+        sync_button.getX(), sync_button.getY(), sync_button.getWidth(), sync_button.getHeight()
+    )
+
+    clock = pygame.time.Clock()
+
+    # Per-phase frame timing. F3 toggles the overlay.
+    profiler = create_profiler()
+    profiler_pos = (layout_pos[0] + 5, layout_pos[1] + 5)
+
     running = True
+    full_redraw = True  # in dirty rendering mode, the first frame and any exposed window are drawn in full
 
     while running:
-        mouse_up = False
+        if full_redraw:
+            events = pygame.event.get()
+        else:
+            events = wait_for_activity(ser, layout, display_settings["serial_poll_interval"])
 
-        events = pygame.event.get()
+        profiler.start_frame()
 
         # Handle events
         for event in events:
             if event.type == pygame.QUIT:
                 running = False
-            elif event.type == pygame.MOUSEBUTTONUP:
-                mouse_up = True
+            elif event.type == pygame.MOUSEMOTION or event.type == pygame.MOUSEBUTTONUP:
+                # mouse position relative to the layout pos.
+                layout.handle_mouse(
+                    (event.pos[0] - layout_pos[0], event.pos[1] - layout_pos[1]), event.type == pygame.MOUSEBUTTONUP
+                )
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if roundel_rect.collidepoint(event.pos):
                     running = False
-
-        mouse_pos = pygame.mouse.get_pos()
-
-        screen.fill((0, 0, 0))
+            elif event.type == pygame.WINDOWEXPOSED:
+                full_redraw = True
+            elif event.type == CONNECTION_CHANGED:
+                full_redraw = True  # show or clear the not connected message
+                if ser.is_connected():
+                    request_sync(commands)  # the points may have moved while disconnected
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                profiler.toggle()
+                full_redraw = True  # clear the overlay when hiding it
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                latency.toggle()
+                full_redraw = True
+
+        profiler.mark("events")
+
+        partial_redraw = dirty_rendering and not full_redraw
+
+        if not partial_redraw:
+            screen.fill((0, 0, 0))
 
         pygame_widgets.update(events)
+        profiler.mark("widgets")
 
-        # Draw the layout with the mouse position relative to the layout pos.
-        layout.draw(((mouse_pos[0] - layout_pos[0])/2, (mouse_pos[1] - layout_pos[1])/2), mouse_up)
-
-        # Blit the layout and text
-        scaled_layout = pygame.transform.scale2x(layout)
-        screen.blit(scaled_layout, layout_pos)
-        screen.blit(title_surface, (width / 2 - title_surface.get_width() / 2, 7))
-        screen.blit(image, (5, 5))
-        screen.blit(roundel, roundel_rect)
-        pygame.draw.rect(screen, (255, 255, 255), sign_outline, 2)
+        layout.draw()
+        profiler.mark("layout")
 
-        if not connected:
-            screen.blit(connnection_message, (width / 2 - connnection_message.get_width() / 2, height - 50))
+        # send everything clicked this frame as a single write
+        commands.flush()
 
         lines = ser.read_available_lines()
+        profiler.mark("serial_read")
+
+        process_lines(lines, layout, serial_monitor_buffer, latency)
+        profiler.mark("process_lines")
+
+        if partial_redraw:
+            # Only the changed parts of the layout are blitted
+            dirty_rects = [
+                screen.blit(layout, (layout_pos[0] + rect.left, layout_pos[1] + rect.top), rect)
+                for rect in layout.dirty_rects
+            ]
+
+            # the sync button is redrawn by pygame_widgets so changes to its colour follow input events
+            if events:
+                dirty_rects.append(sync_rect)
+            profiler.mark("blit")
+
+            if lines:
+                screen.fill((0, 0, 0), monitor_rect)
+                if not ser.is_connected():
+                    screen.blit(connnection_message, (width / 2 - connnection_message.get_width() / 2, height - 50))
+                draw_serial_monitor(monitor_font, serial_monitor_buffer, height, screen)
+                dirty_rects.append(monitor_rect)
+            profiler.mark("monitor")
+
+            profiler_rect = profiler.draw(screen, profiler_pos)
+            if profiler_rect:
+                dirty_rects.append(profiler_rect)
+
+            latency_rect = latency.draw(screen, latency_pos, servo_names)
+            if latency_rect:
+                dirty_rects.append(latency_rect)
+
+            pygame.display.update(dirty_rects)
+        else:
+            # Blit the layout and text
+            screen.blit(layout, layout_pos)
+            screen.blit(title_surface, (width / 2 - title_surface.get_width() / 2, 7))
+            screen.blit(image, (5, 5))
+            screen.blit(roundel, roundel_rect)
+            pygame.draw.rect(screen, (255, 255, 255), sign_outline, 2)
+
+            if not ser.is_connected():
+                screen.blit(connnection_message, (width / 2 - connnection_message.get_width() / 2, height - 50))
+            profiler.mark("blit")
+
+            draw_serial_monitor(monitor_font, serial_monitor_buffer, height, screen)
+            profiler.mark("monitor")
+
+            profiler.draw(screen, profiler_pos)
+            latency.draw(screen, latency_pos, servo_names)
+
+            pygame.display.flip()
+            full_redraw = False
+
+        profiler.mark("display")
+        profiler.end_frame()
+
+        # limit the frame rate while there is something to draw
+        clock.tick(display_settings["max_fps"])
+
+    profiler.close()
+    latency.close()
+    ser.close()
+    if recorder:
+        recorder.close()
+    pygame.quit()
 
-        process_lines(lines, layout, serial_monitor_buffer)
-        draw_serial_monitor(monitor_font, serial_monitor_buffer, height, screen)
 
-        pygame.display.flip()
+def wait_for_activity(ser: SerialConnection, layout: Layout, poll_interval: int) -> list[pygame.event.Event]:
+    """Block until there is something to draw: an input event, serial data or a point moving.
 
-        pygame.time.wait(10)
+    While idle, the thread sleeps in pygame.event.wait. The serial reader thread posts SERIAL_DATA to wake it as soon
+    as lines arrive. It also wakes every poll_interval to check the serial port in case a notification was missed.
 
-    pygame.quit()
+    Args:
+        ser (SerialConnection): Serial connection to check for data.
+        layout (Layout): Layout to check for animations.
+        poll_interval (int): Maximum time in ms to block before checking the serial port again.
+
+    Returns:
+        list[pygame.event.Event]: The events which arrived.
+    """
+    while not layout.is_animating() and not ser.lines_waiting():
+        event = pygame.event.wait(poll_interval)
+        if event.type != pygame.NOEVENT:
+            return [event] + pygame.event.get()
+
+    return pygame.event.get()
 
 
-def request_sync(ser: ZeroWaitSerial):
+def request_sync(ser: CommandWriter):
     print("request sync")
-    ser.write(str.encode("r\n"))
+    try:
+        ser.write(str.encode("r\n"))
+    except CommandQueueFull as e:
+        # the port is behind. A sync will be requested again when the button is pressed or the port reconnects.
+        print("Sync not requested: " + str(e))
 
 
 def draw_serial_monitor(font, buffer, top, screen):
     for index, line in enumerate(buffer):
         # draw to the screen
         try:
-            rendered_line = font.render(line, True, (255, 255, 255))
+            rendered_line = text_cache.render(font, line, (255, 255, 255))
             v_pos = top - 12 * (len(buffer) - index)
             screen.blit(rendered_line, (5, v_pos))
         except ValueError:
             print("Unable to display " + line)
 
 
-def process_lines(new_lines: list[str], layout: Layout, monitor_buffer: list[str]):
-    for line in new_lines:
-        monitor_buffer.append(f"{datetime.now().strftime('%H:%M:%S')}: {line}")
+def get_servo_names(layout: Layout) -> dict[int, str]:
+    """Point name for each servo index, for showing latencies. The triple's second servo is suffixed with b."""
+    names = {}
+    for point in layout.points:
+        names[point.servo_index] = point.name
+        if point is layout.triple:
+            names[point.servo_index + 1] = point.name + "b"
+    return names
+
+
+def process_lines(
+    new_lines: list[SerialLine], layout: Layout, monitor_buffer: list[str], latency: Optional[LatencyTracker] = None
+):
+    for serial_line in new_lines:
+        line = serial_line.text
+        monitor_buffer.append(f"{datetime.fromtimestamp(serial_line.wall_time).strftime('%H:%M:%S')}: {line}")
         monitor_buffer.pop(0)
 
-        # any empty line, let's skip
-        if len(line) == 0:
-            continue
-
-        match line[0]:
-            case "S":
-                if line[1] == "0" or line[1] == "1":
-                    try:
-                        states = [int(char) for char in line[1:].strip()]
-                        states[7] = int(line[7:9], 2)  # convert the sidings into a single number
-                        # remove the doubles
-                        states.pop(8)
-                        states.pop(6)
-                        states.pop(3)
-                        layout.update_points(states)
-                    except Exception as e:
-                        print(e)
-            case "<":
-                pass
-            case _:
-                pass
+        message = decode_line(line)
+        if latency:
+            latency.message_received(message, serial_line.timestamp)
+
+        match message:
+            case PointSetMessage(servo_index=servo_index):
+                layout.point_acknowledged(servo_index)
+            case SyncMessage(states=states):
+                layout.update_points(states)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,12 @@
 import pygame
-from typing import Tuple
+import math
+import time
+from typing import Callable, Optional, Tuple
 import tomllib
-import pygame.gfxdraw
 import serial
 from pathlib import Path
+from pc_control.canvas import Canvas
+from pc_control.text_cache import text_cache
 
 
 def get_colours():
@@ -11,20 +14,25 @@ def get_colours():
         return tomllib.load(f)["point_colours"]
 
 
-def draw_red_cross(surface, center, size):
+def get_throw_time(name: str) -> float:
+    """Time in seconds for the named point to throw. Falls back to the default if the point isn't listed."""
+    with open(Path(__file__).parent.parent / "settings.toml", "rb") as f:
+        throw_times = tomllib.load(f)["point_throw_times"]
+    return throw_times.get(name, throw_times["default"])
+
+
+def draw_red_cross(canvas: Canvas, center, size):
     color = (255, 0, 0)  # Red color
     x, y = center
     half_size = size // 2
 
-    pygame.draw.line(
-        surface,
+    canvas.line(
         color,
         (x - half_size, y - half_size),
         (x + half_size, y + half_size),
         2,
     )
-    pygame.draw.line(
-        surface,
+    canvas.line(
         color,
         (x - half_size, y + half_size),
         (x + half_size, y - half_size),
@@ -41,7 +49,7 @@ class Point:
 
     def __init__(
         self,
-        display: pygame.Surface,
+        display: Canvas,
         left: int,
         top: int,
         servo_index: int,
@@ -54,7 +62,7 @@ class Point:
         """Sets up the object with key class data.
 
         Args:
-            display (pygame.Surface): Surface to draw the point on.
+            display (Canvas): Canvas to draw the point on.
             left (int): Draw position
             top (int): Draw position
             length (int, optional): Length of point. Defaults to 50.
@@ -73,15 +81,24 @@ class Point:
 
         self.line_colour = self.colours["ahead"]
 
-        self.state = "ahead"
+        # called with the point whenever its state changes, e.g. so the highlighted route can follow it
+        self.on_state_change: Optional[Callable[["Point"], None]] = None
+        self._state = "ahead"
 
         self.name = name
 
+        # Animation is driven by time so the drawing keeps pace with the servo whatever the frame rate.
+        # Position is measured in throws, e.g. 0 = ahead and 1 = diverge.
+        self.throw_time = get_throw_time(name)
+        self.position = 0.0
+        self.move_start_position = 0.0
+        self.move_start_time = 0.0
+
         self.name_pos = name_pos
 
         # label_font = pygame.font.Font("resources/britrdn_.ttf", 10)
-        label_font = pygame.font.SysFont("MS Reference Sans Serif", 14)
-        self.label_surface = label_font.render(self.name, True, self.colours["boundary"])
+        label_font = display.font("MS Reference Sans Serif", 14)
+        self.label_surface = text_cache.render(label_font, self.name, self.colours["boundary"])
 
         self.rect = pygame.Rect(0, 0, 0, 0)
 
@@ -90,57 +107,147 @@ class Point:
 
         self.mark_unoccupied = False
 
+        self.hover = False  # set by the layout when the mouse is over the point
+
+        self.last_draw_state = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @state.setter
+    def state(self, state: str):
+        if state != self._state:
+            self._state = state
+            if self.on_state_change:
+                self.on_state_change(self)
+
     def __eq__(self, other):
         """Override the equality operator to compare Track objects by their id."""
         if isinstance(other, Point):
             return self.name == other.name
         return False
 
-    def check_mouse_click(self, mouse_pos: Tuple[int, int], mouse_up: bool):
-        """Called to check if the point has been clicked and update the state if necessary
+    def __hash__(self):
+        return hash(self.name)
 
-        Args:
-            mouse_pos (Tuple[int, int]): Mouse position
-            mouse_up (bool): Mouse up event?
-        """
-        if self.rect.collidepoint(mouse_pos):  # is the mouse in the bounding rect?
-            # mouse is hovering
-            if self.state == "ahead" or self.state == "diverge":
-                self.line_colour = self.colours["hover"]
-
-            # have we clicked on the point?
-            if mouse_up:
-                self.ser.write(str.encode(f"p{self.servo_index}\n"))
-                print(f"p{self.servo_index}")
-                self.line_colour = self.colours["moving"]
-                match self.state:
-                    case "ahead":
-                        self.state = "moving_to_diverge"
-                    case "diverge":
-                        self.state = "moving_to_ahead"
-                    case "moving_to_ahead":
-                        self.state = "moving_to_diverge"
-                    case "moving_to_diverge":
-                        self.state = "moving_to_ahead"
+    def click(self):
+        """Called when the point has been clicked. Sends the toggle command and starts moving the point."""
+        self.ser.write(str.encode(f"p{self.servo_index}\n"))
+        print(f"p{self.servo_index}")
+        self.line_colour = self.colours["moving"]
+        self.start_move()
+        match self.state:
+            case "ahead":
+                self.state = "moving_to_diverge"
+            case "diverge":
+                self.state = "moving_to_ahead"
+            case "moving_to_ahead":
+                self.state = "moving_to_diverge"
+            case "moving_to_diverge":
+                self.state = "moving_to_ahead"
+
+    def update_colour(self):
+        """Set the line colour from the hover flag and the state. Moving points keep their colour."""
+        if self.hover and (self.state == "ahead" or self.state == "diverge"):
+            self.line_colour = self.colours["hover"]
         elif self.state == "ahead":
             self.line_colour = self.colours["ahead"]
         elif self.state == "diverge":
             self.line_colour = self.colours["diverge"]
 
+    def get_draw_state(self) -> tuple:
+        """Everything, other than the animation position, that changes how the point is drawn."""
+        return self.state, tuple(self.line_colour), self.mark_unoccupied
+
+    def needs_redraw(self) -> bool:
+        """Has the appearance of the point changed since the last call? Moving points always need a redraw."""
+        draw_state = self.get_draw_state()
+        changed = self.state.startswith("moving") or draw_state != self.last_draw_state
+        self.last_draw_state = draw_state
+        return changed
+
+    def get_dirty_rect(self) -> pygame.Rect:
+        """Area of the display covered by the point, including any red cross drawn at its edge."""
+        return self.rect.inflate(12, 12)
+
     def set_state(self, state: int):
         """Set the state of the point externally.
 
         Args:
             state (int): 0 = move_to_ahead, 1 = move_to_diverge
         """
+        self.start_move()
         if state:
             self.state = "moving_to_diverge"
         else:
             self.state = "moving_to_ahead"
 
+    def get_target_state(self) -> int:
+        """The state the point is in or moving to, as used by set_state."""
+        return 1 if self.state.endswith("diverge") else 0
+
+    def get_exits(self, track) -> Optional[list]:
+        """Tracks a route arriving from track continues on to, as the point is set now.
+
+        Returns:
+            Optional[list]: None if the point is set against the track.
+        """
+        connected = self.get_connected_tracks()
+        if connected[0] == track:
+            return [connected[1]]
+        if connected[1] == track:
+            return [connected[0]]
+        return None
+
+    def mark_blocked(self, track):
+        """Mark a red cross where a route arrives from track but the point is set against it."""
+        self.mark_unoccupied = True
+
+    def clear_marks(self):
+        self.mark_unoccupied = False
+
+    def get_commands(self, state: int) -> str:
+        """The toggle commands which move the point from the state it is in or moving to, to state.
+
+        Args:
+            state (int): State as used by set_state.
+
+        Returns:
+            str: Newline terminated commands. Empty if the point is already there.
+        """
+        return "" if state == self.get_target_state() else f"p{self.servo_index}\n"
+
+    def start_move(self):
+        """Start timing a move from the current position. Called whenever the point is set moving."""
+        self.move_start_position = self.position
+        self.move_start_time = time.monotonic()
+
+    def animate(self, target: float) -> bool:
+        """Set the position from the time elapsed since the move started.
+
+        Args:
+            target (float): Position the point is moving to.
+
+        Returns:
+            bool: True if the target has been reached.
+        """
+        distance = target - self.move_start_position
+        if self.throw_time <= 0:  # an instant point
+            self.position = target
+            return True
+        travelled = (time.monotonic() - self.move_start_time) / self.throw_time
+
+        if travelled >= abs(distance):
+            self.position = target
+            return True
+
+        self.position = self.move_start_position + math.copysign(travelled, distance)
+        return False
+
     def draw(self):
         """Draw the bounding box and the label"""
-        pygame.draw.rect(self.display, self.colours["boundary"], self.rect, 1)
+        self.display.rect(self.colours["boundary"], self.rect, 1)
 
         if self.name_pos == "bottom":
             self.display.blit(
@@ -175,7 +282,7 @@ class StraightPoint(Point):
 
     def __init__(
         self,
-        display: pygame.surface,
+        display: Canvas,
         left: int,
         top: int,
         servo_index: int,
@@ -189,7 +296,7 @@ class StraightPoint(Point):
         """Sets up the object.
 
         Args:
-            display (pygame.surface): Surface to draw on
+            display (Canvas): Canvas to draw on
             left (int): Draw position of point start.
             top (int): Draw position of point start.
             type (str, optional): Point type. Describes which direction to draw and throw.
@@ -208,7 +315,6 @@ class StraightPoint(Point):
 
         match type:
             case "left_up":
-                self.increment = -1
                 self.box_top = top - self.fixed_offset - throw
                 self.box_left = left
                 self.box_width = self.length + 1
@@ -220,7 +326,6 @@ class StraightPoint(Point):
                 self.diverge_coord = [self.line_end[0], self.diverge_pos]
                 self.ahead_coord = [self.line_end[0], self.ahead_pos]
             case "left_down":
-                self.increment = 1
                 self.box_top = top - self.fixed_offset
                 self.box_left = left
                 self.box_width = self.length + 1
@@ -232,7 +337,6 @@ class StraightPoint(Point):
                 self.diverge_coord = [self.line_end[0], self.diverge_pos]
                 self.ahead_coord = [self.line_end[0], self.ahead_pos]
             case "right_up":
-                self.increment = -1
                 self.box_top = top - self.fixed_offset - throw
                 self.box_left = left - self.length
                 self.box_width = self.length + 1
@@ -244,7 +348,6 @@ class StraightPoint(Point):
                 self.diverge_coord = [self.line_end[0], self.diverge_pos]
                 self.ahead_coord = [self.line_end[0], self.ahead_pos]
             case "right_down":
-                self.increment = 1
                 self.box_top = top - self.fixed_offset
                 self.box_left = left - self.length
                 self.box_width = self.length + 1
@@ -256,7 +359,6 @@ class StraightPoint(Point):
                 self.diverge_coord = [self.line_end[0], self.diverge_pos]
                 self.ahead_coord = [self.line_end[0], self.ahead_pos]
             case "up_right":
-                self.increment = 1
                 self.box_top = top - self.length
                 self.box_left = left - self.fixed_offset
                 self.box_width = throw + 2 * self.fixed_offset
@@ -268,7 +370,6 @@ class StraightPoint(Point):
                 self.diverge_coord = [self.diverge_pos, self.line_end[1]]
                 self.ahead_coord = [self.ahead_pos, self.line_end[1]]
             case "up_left":
-                self.increment = -1
                 self.box_top = top - self.length
                 self.box_left = left - self.throw - self.fixed_offset
                 self.box_width = throw + 2 * self.fixed_offset
@@ -280,7 +381,6 @@ class StraightPoint(Point):
                 self.diverge_coord = [self.diverge_pos, self.line_end[1]]
                 self.ahead_coord = [self.ahead_pos, self.line_end[1]]
             case "down_right":
-                self.increment = 1
                 self.box_top = top
                 self.box_left = left - self.fixed_offset
                 self.box_width = throw + 2 * self.fixed_offset
@@ -292,7 +392,6 @@ class StraightPoint(Point):
                 self.diverge_coord = [self.diverge_pos, self.line_end[1]]
                 self.ahead_coord = [self.ahead_pos, self.line_end[1]]
             case "down_left":
-                self.increment = -1
                 self.box_top = top
                 self.box_left = left - self.throw - self.fixed_offset
                 self.box_width = throw + 2 * self.fixed_offset
@@ -306,6 +405,24 @@ class StraightPoint(Point):
 
         self.rect = pygame.Rect(self.box_left, self.box_top, self.box_width, self.box_height)
 
+        self.conflict = None  # where to draw a red cross on one of the point's tracks, e.g. a locked route's leg
+
+    def get_draw_state(self) -> tuple:
+        return super().get_draw_state() + (self.conflict,)
+
+    def mark_conflict(self, track):
+        match track:
+            case self.enter:
+                self.conflict = self.line_start
+            case self.exit:
+                self.conflict = self.ahead_coord
+            case self.diverge:
+                self.conflict = self.diverge_coord
+
+    def clear_marks(self):
+        super().clear_marks()
+        self.conflict = None
+
     def get_connections(
         self,
     ) -> Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]:
@@ -316,6 +433,10 @@ class StraightPoint(Point):
         self.exit = exit
         self.diverge = diverge
 
+    def get_legs(self) -> list[tuple]:
+        """(state, track, track) for each pair of tracks the point can connect."""
+        return [(0, self.enter, self.exit), (1, self.enter, self.diverge)]
+
     def get_connected_tracks(self):
         match self.state:
             case "ahead":
@@ -328,20 +449,20 @@ class StraightPoint(Point):
                 return self.enter, self.exit
 
     def draw(self):
-        """Draw the point. Increment the position if moving."""
+        """Draw the point. Update the position if moving."""
 
         match self.state:
             case "moving_to_ahead":
-                if self.line_end[self.end_pos_index] == self.ahead_pos:
+                if self.animate(0):
                     self.state = "ahead"
-                else:
-                    self.line_end[self.end_pos_index] -= self.increment
 
             case "moving_to_diverge":
-                if self.line_end[self.end_pos_index] == self.diverge_pos:
+                if self.animate(1):
                     self.state = "diverge"
-                else:
-                    self.line_end[self.end_pos_index] += self.increment
+
+        self.line_end[self.end_pos_index] = self.ahead_pos + self.position * (self.diverge_pos - self.ahead_pos)
+
+        self.update_colour()
 
         # pygame.draw.line(self.display, self.line_colour, self.line_start, self.line_end, self.thickness)
 
@@ -360,8 +481,7 @@ class StraightPoint(Point):
                 (self.line_end[0] - 2, self.line_end[1]),
             ]
 
-        pygame.gfxdraw.filled_polygon(self.display, points, self.line_colour)
-        pygame.gfxdraw.aapolygon(self.display, points, self.line_colour)
+        self.display.polygon(points, self.line_colour)
 
         if self.mark_unoccupied:
             if self.state == "ahead":
@@ -369,6 +489,9 @@ class StraightPoint(Point):
             elif self.state == "diverge":
                 draw_red_cross(self.display, self.ahead_coord, 10)
 
+        if self.conflict:
+            draw_red_cross(self.display, self.conflict, 10)
+
         super().draw()
 
 
@@ -377,7 +500,7 @@ class CrossOver(Point):
 
     def __init__(
         self,
-        display: pygame.surface,
+        display: Canvas,
         left: int,
         top: int,
         servo_index: int,
@@ -391,7 +514,7 @@ class CrossOver(Point):
         """Setup the point object.
 
         Args:
-            display (pygame.surface): Display to draw on.
+            display (Canvas): Canvas to draw on.
             left (int): Draw position of point start.
             top (int): Draw position of point start.
             type (str): which direction to move the point top_bottom or bottom_top
@@ -419,6 +542,9 @@ class CrossOver(Point):
 
         self.conflict = None
 
+    def get_draw_state(self) -> tuple:
+        return super().get_draw_state() + (self.conflict,)
+
     def mark_conflict(self, track):
         match track:
             case self.top_enter:
@@ -430,6 +556,20 @@ class CrossOver(Point):
             case self.bottom_exit:
                 self.conflict = self.bottom_exit_pos
 
+    def get_exits(self, track) -> Optional[list]:
+        """Tracks a route arriving from track continues on to. Set ahead, a track not on the crossover leads nowhere
+        rather than being set against."""
+        if self.state == "ahead" or self.state == "moving_to_diverge":
+            return [b if a == track else a for a, b in self.get_connected_tracks() if track in (a, b)]
+        return super().get_exits(track)
+
+    def mark_blocked(self, track):
+        self.mark_conflict(track)
+
+    def clear_marks(self):
+        super().clear_marks()
+        self.conflict = None
+
     def get_connections(self):
         return (
             self.line1_start.copy(),
@@ -444,6 +584,14 @@ class CrossOver(Point):
         self.bottom_enter = bottom_enter
         self.bottom_exit = bottom_exit
 
+    def get_legs(self) -> list[tuple]:
+        """(state, track, track) for each pair of tracks the crossover can connect."""
+        if self.type == "top_bottom":
+            crossing = (1, self.top_enter, self.bottom_exit)
+        else:
+            crossing = (1, self.bottom_enter, self.top_exit)
+        return [(0, self.top_enter, self.top_exit), (0, self.bottom_enter, self.bottom_exit), crossing]
+
     def get_connected_tracks(self):
         match self.state:
             case "ahead":
@@ -468,34 +616,24 @@ class CrossOver(Point):
                 ]
 
     def draw(self):
-        """Draw the point. Increment the position if moving."""
+        """Draw the point. Update the position if moving."""
         match self.state:
             case "moving_to_ahead":
-                if self.type == "top_bottom":
-                    if self.line1_end[1] == self.top:
-                        self.state = "ahead"
-                    else:
-                        self.line1_end[1] -= 1
-                        self.line2_start[1] += 1
-                else:
-                    if self.line1_start[1] == self.top:
-                        self.state = "ahead"
-                    else:
-                        self.line1_start[1] -= 1
-                        self.line2_end[1] += 1
+                if self.animate(0):
+                    self.state = "ahead"
             case "moving_to_diverge":
-                if self.type == "top_bottom":
-                    if self.line1_end[1] == self.top + self.throw:
-                        self.state = "diverge"
-                    else:
-                        self.line1_end[1] += 1
-                        self.line2_start[1] -= 1
-                else:
-                    if self.line1_start[1] == self.top + self.throw:
-                        self.state = "diverge"
-                    else:
-                        self.line1_start[1] += 1
-                        self.line2_end[1] -= 1
+                if self.animate(1):
+                    self.state = "diverge"
+
+        offset = self.position * self.throw
+        if self.type == "top_bottom":
+            self.line1_end[1] = self.top + offset
+            self.line2_start[1] = self.top + self.throw - offset
+        else:
+            self.line1_start[1] = self.top + offset
+            self.line2_end[1] = self.top + self.throw - offset
+
+        self.update_colour()
 
         points1 = [
             (self.line1_start[0], self.line1_start[1] - 2),
@@ -503,8 +641,7 @@ class CrossOver(Point):
             (self.line1_end[0], self.line1_end[1] + 2),
             (self.line1_end[0], self.line1_end[1] - 2),
         ]
-        pygame.gfxdraw.filled_polygon(self.display, points1, self.line_colour)
-        pygame.gfxdraw.aapolygon(self.display, points1, self.line_colour)
+        self.display.polygon(points1, self.line_colour)
 
         points2 = [
             (self.line2_start[0], self.line2_start[1] - 2),
@@ -512,8 +649,7 @@ class CrossOver(Point):
             (self.line2_end[0], self.line2_end[1] + 2),
             (self.line2_end[0], self.line2_end[1] - 2),
         ]
-        pygame.gfxdraw.filled_polygon(self.display, points2, self.line_colour)
-        pygame.gfxdraw.aapolygon(self.display, points2, self.line_colour)
+        self.display.polygon(points2, self.line_colour)
 
         if self.conflict:
             draw_red_cross(self.display, self.conflict, 10)
@@ -524,7 +660,7 @@ class CrossOver(Point):
 class Triple(Point):
     def __init__(
         self,
-        display: pygame.surface,
+        display: Canvas,
         left: int,
         top: int,
         servo_index: int,
@@ -550,6 +686,7 @@ class Triple(Point):
         self.line_end = [self.road_2[0], self.road_2[1]]
 
         self.state = "road_2"
+        self.position = 1.0  # position is measured in roads from road 1
 
         self.conflict = None
 
@@ -559,6 +696,24 @@ class Triple(Point):
         self.road_2_track = road_2
         self.road_3_track = road_3
 
+    def get_legs(self) -> list[tuple]:
+        """(state, track, track) for each road."""
+        return [
+            (0, self.enter_track, self.road_1_track),
+            (1, self.enter_track, self.road_2_track),
+            (2, self.enter_track, self.road_3_track),
+        ]
+
+    def get_draw_state(self) -> tuple:
+        return super().get_draw_state() + (self.conflict,)
+
+    def mark_blocked(self, track):
+        self.mark_conflict(track)
+
+    def clear_marks(self):
+        super().clear_marks()
+        self.conflict = None
+
     def mark_conflict(self, track):
         match track:
             case self.road_1_track:
@@ -583,7 +738,11 @@ class Triple(Point):
             case "moving_to_road_3":
                 return self.enter_track, self.road_3_track
 
+    def get_target_state(self) -> int:
+        return int(self.state[-1]) - 1  # road_1 is 0
+
     def set_state(self, state: int):
+        self.start_move()
         match state:
             case 0:
                 self.state = "moving_to_road_1"
@@ -592,42 +751,33 @@ class Triple(Point):
             case 2:
                 self.state = "moving_to_road_3"
 
-    def check_mouse_click(self, mouse_pos: Tuple[int, int], mouse_up: bool):
-        """Called to check if the point has been clicked and update the state if necessary
+    def get_commands(self, state: int) -> str:
+        """The toggle commands which move the triple from the road it is on or moving to, to another road.
 
-        Args:
-            mouse_pos (Tuple[int, int]): Mouse position
-            mouse_up (bool): Mouse up event?
+        The triple has two servos, servo_index and servo_index + 1. Going from road 1 to 2 to 3 toggles one then the
+        other, so road 1 to 3 and back toggles both.
         """
-        if self.rect.collidepoint(mouse_pos):  # is the mouse in the bounding rect?
-            # mouse is hovering
-            if self.state in ["road_1", "road_2", "road_3"]:
-                self.line_colour = self.colours["hover"]
-
-            # have we clicked on the point?
-            if mouse_up:
-                self.line_colour = self.colours["moving"]
-                match self.state:
-                    case "road_1":
-                        self.ser.write(str.encode(f"p{self.servo_index}\n"))
-                        self.state = "moving_to_road_2"
-                    case "road_2":
-                        self.ser.write(str.encode(f"p{self.servo_index+1}\n"))
-                        self.state = "moving_to_road_3"
-                    case "road_3":
-                        self.ser.write(str.encode(f"p{self.servo_index}\n"))
-                        self.ser.write(str.encode(f"p{self.servo_index+1}\n"))
-                        self.state = "moving_to_road_1"
-                    case "moving_to_road_2":
-                        self.ser.write(str.encode(f"p{self.servo_index+1}\n"))
-                        self.state = "moving_to_road_3"
-                    case "moving_to_road_3":
-                        self.ser.write(str.encode(f"p{self.servo_index}\n"))
-                        self.ser.write(str.encode(f"p{self.servo_index+1}\n"))
-                        self.state = "moving_to_road_1"
-                    case "moving_to_road_1":
-                        self.ser.write(str.encode(f"p{self.servo_index}\n"))
-                        self.state = "moving_to_road_2"
+        target = self.get_target_state()
+        commands = ""
+        if (target >= 1) != (state >= 1):
+            commands += f"p{self.servo_index}\n"
+        if (target >= 2) != (state >= 2):
+            commands += f"p{self.servo_index + 1}\n"
+        return commands
+
+    def click(self):
+        """Called when the point has been clicked. Moves to the next road, sending a toggle for each servo."""
+        road = (self.get_target_state() + 1) % 3
+        self.ser.write(self.get_commands(road).encode())
+        self.state = f"moving_to_road_{road + 1}"
+
+        self.line_colour = self.colours["moving"]
+        self.start_move()
+
+    def update_colour(self):
+        """Set the line colour from the hover flag and the state. Moving points keep their colour."""
+        if self.hover and self.state in ["road_1", "road_2", "road_3"]:
+            self.line_colour = self.colours["hover"]
         elif self.state == "road_2":
             self.line_colour = self.colours["ahead"]
         elif self.state == "road_1" or self.state == "road_3":
@@ -639,26 +789,18 @@ class Triple(Point):
     def draw(self):
         match self.state:
             case "moving_to_road_1":
-                if self.line_end[1] == self.road_1[1]:
+                if self.animate(0):
                     self.state = "road_1"
-                elif self.line_end[1] > self.road_1[1]:
-                    self.line_end[1] -= 1
-                else:
-                    self.line_end[1] += 1
             case "moving_to_road_2":
-                if self.line_end[1] == self.road_2[1]:
+                if self.animate(1):
                     self.state = "road_2"
-                elif self.line_end[1] > self.road_2[1]:
-                    self.line_end[1] -= 1
-                else:
-                    self.line_end[1] += 1
             case "moving_to_road_3":
-                if self.line_end[1] == self.road_3[1]:
+                if self.animate(2):
                     self.state = "road_3"
-                elif self.line_end[1] > self.road_3[1]:
-                    self.line_end[1] -= 1
-                else:
-                    self.line_end[1] += 1
+
+        self.line_end[1] = self.road_1[1] + self.position * self.throw
+
+        self.update_colour()
 
         points = [
             (self.enter[0], self.enter[1] - 2),
@@ -667,9 +809,8 @@ class Triple(Point):
             (self.line_end[0], self.line_end[1] - 2),
         ]
 
-        pygame.gfxdraw.filled_polygon(self.display, points, self.line_colour)
-        pygame.gfxdraw.aapolygon(self.display, points, self.line_colour)
-        pygame.draw.rect(self.display, self.colours["boundary"], self.rect, 1)
+        self.display.polygon(points, self.line_colour)
+        self.display.rect(self.colours["boundary"], self.rect, 1)
 
         if self.conflict:
             draw_red_cross(self.display, self.conflict, 10)
@@ -0,0 +1,156 @@
+import csv
+import time
+import tomllib
+import pygame
+from collections import deque
+from pathlib import Path
+from typing import Optional, Tuple
+from pc_control.text_cache import get_sys_font
+
+
+def read_profiler_settings():
+    with open(Path(__file__).parent.parent / "settings.toml", "rb") as f:
+        return tomllib.load(f)["profiler"]
+
+
+class FrameProfiler:
+    """Times each phase of the main loop.
+
+    Call start_frame at the beginning of the frame, mark after each phase and end_frame once the frame is on screen.
+    Keeps a rolling window of samples for the on-screen overlay and can stream every frame to a CSV file.
+    """
+
+    phases = ("events", "widgets", "layout", "serial_read", "process_lines", "blit", "monitor", "display")
+
+    def __init__(self, window: int = 300, csv_path: Optional[str] = None, refresh_interval: float = 0.25):
+        """Sets up the profiler.
+
+        Args:
+            window (int, optional): Number of frames in the rolling statistics. Defaults to 300.
+            csv_path (Optional[str], optional): File to write per-frame samples to. Defaults to None.
+            refresh_interval (float, optional): Seconds between updates of the overlay text. Defaults to 0.25.
+        """
+        self.samples = {phase: deque(maxlen=window) for phase in self.phases + ("total",)}
+        self.frame_times = dict.fromkeys(self.phases, 0.0)
+        self.frame_start = 0.0
+        self.last_mark = 0.0
+        self.frame_count = 0
+
+        self.visible = False
+        self.refresh_interval = refresh_interval
+        self.last_refresh = 0.0
+        self.overlay = None
+        self.font = get_sys_font("Consolas", 12)
+
+        self.csv_file = None
+        if csv_path:
+            self.csv_file = open(csv_path, "w", newline="")
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(("frame", "time") + self.phases + ("total",))
+
+    def start_frame(self):
+        self.frame_start = self.last_mark = time.perf_counter()
+        for phase in self.phases:
+            self.frame_times[phase] = 0.0
+
+    def mark(self, phase: str):
+        """Add the time since the last mark to phase."""
+        now = time.perf_counter()
+        self.frame_times[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        """Store the timings for the frame. All times are recorded in ms."""
+        total = self.last_mark - self.frame_start
+
+        for phase in self.phases:
+            self.samples[phase].append(self.frame_times[phase] * 1000)
+        self.samples["total"].append(total * 1000)
+
+        if self.csv_file:
+            self.csv_writer.writerow(
+                [self.frame_count, f"{self.frame_start:.6f}"]
+                + [f"{self.frame_times[phase] * 1000:.3f}" for phase in self.phases]
+                + [f"{total * 1000:.3f}"]
+            )
+
+        self.frame_count += 1
+
+    def get_statistics(self) -> dict[str, Tuple[float, float]]:
+        """Rolling p50 and p99 of each phase and the total, in ms."""
+        statistics = {}
+        for phase, samples in self.samples.items():
+            if samples:
+                ordered = sorted(samples)
+                statistics[phase] = (ordered[len(ordered) // 2], ordered[int(len(ordered) * 0.99)])
+        return statistics
+
+    def toggle(self):
+        """Show or hide the overlay."""
+        self.visible = not self.visible
+
+    def draw(self, screen: pygame.Surface, pos: Tuple[int, int]) -> Optional[pygame.Rect]:
+        """Draw the overlay if it is visible. The text is only rebuilt every refresh_interval.
+
+        Returns:
+            Optional[pygame.Rect]: Area of the screen drawn to.
+        """
+        if not self.visible:
+            return None
+
+        now = time.monotonic()
+        if self.overlay is None or now - self.last_refresh > self.refresh_interval:
+            self.last_refresh = now
+            self.overlay = self.render_overlay()
+
+        return screen.blit(self.overlay, pos)
+
+    def render_overlay(self) -> pygame.Surface:
+        lines = [f"{'phase':<14}{'p50 ms':>8}{'p99 ms':>8}"]
+        for phase, (p50, p99) in self.get_statistics().items():
+            lines.append(f"{phase:<14}{p50:>8.2f}{p99:>8.2f}")
+
+        line_height = self.font.get_linesize()
+        rendered = [self.font.render(line, True, (255, 255, 255)) for line in lines]
+        overlay = pygame.Surface((max(line.get_width() for line in rendered) + 10, line_height * len(lines) + 10))
+        overlay.fill((40, 40, 40))
+        for index, line in enumerate(rendered):
+            overlay.blit(line, (5, 5 + index * line_height))
+
+        return overlay
+
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+
+
+class DisabledProfiler:
+    """Stands in for FrameProfiler when profiling is turned off. Every method does nothing."""
+
+    visible = False
+
+    def start_frame(self):
+        pass
+
+    def mark(self, phase: str):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def toggle(self):
+        pass
+
+    def draw(self, screen: pygame.Surface, pos: Tuple[int, int]) -> Optional[pygame.Rect]:
+        return None
+
+    def close(self):
+        pass
+
+
+def create_profiler():
+    """FrameProfiler if enabled in the settings, otherwise a DisabledProfiler."""
+    settings = read_profiler_settings()
+    if not settings["enabled"]:
+        return DisabledProfiler()
+    return FrameProfiler(settings["window"], settings["csv_path"] or None)
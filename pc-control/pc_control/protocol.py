@@ -0,0 +1,128 @@
+"""Decodes the lines sent by the Arduino command board into typed messages.
+
+Each line is matched against a table of compiled patterns, so adding a message is a new table entry rather than
+another branch in process_lines.
+
+    match decode_line(line.text):
+        case SyncMessage(states=states):
+            layout.update_points(states)
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional, Pattern, Sequence, Union
+
+
+class SyncMessage(NamedTuple):
+    """Position of every point, e.g. from S000001000000000. One state per point in the layout, in layout order."""
+
+    states: tuple[int, ...]
+
+
+class PointSetMessage(NamedTuple):
+    """A point has been toggled, e.g. <Setting point in Arduino, Point: 5 Val: 358>."""
+
+    servo_index: int
+    value: int
+
+
+class PointIncrementMessage(NamedTuple):
+    """A point's servo position has been increased for calibration."""
+
+    servo_index: int
+    value: int
+
+
+class PointDecrementMessage(NamedTuple):
+    """A point's servo position has been decreased for calibration."""
+
+    servo_index: int
+    value: int
+
+
+class IdMessage(NamedTuple):
+    """Heartbeat, e.g. <ID: 18/01/25 v2.3>."""
+
+    date: str
+    version: str
+
+
+class StatusMessage(NamedTuple):
+    """Any other <...> message, e.g. <Lights Toggled>. text is without the brackets."""
+
+    text: str
+
+
+class UnknownMessage(NamedTuple):
+    """Anything else, e.g. the echo of a command or a malformed sync."""
+
+    text: str
+
+
+Message = Union[
+    SyncMessage, PointSetMessage, PointIncrementMessage, PointDecrementMessage, IdMessage, StatusMessage, UnknownMessage
+]
+
+# The sync string has a character per servo. Each entry is the servo for the point at that position in the layout.
+# Paired servos (the crossovers) are set together so only the second is read. The triple is read from its two servos
+# as a binary number.
+sync_fields: tuple[Union[int, tuple[int, int]], ...] = (0, 1, 2, 4, 5, (6, 7), 9, 10, 11, 12, 13, 14)
+sync_servo_count = 15
+
+# (prefix, pattern, message type, converter for each group) tried in order. The prefix is a cheap test before the
+# pattern is matched against the whole line.
+MessageTable = list[tuple[str, Pattern[str], Callable[..., Message], Sequence[Callable[[str], object]]]]
+
+message_table: MessageTable = [
+    ("S", re.compile(rf"S([01]{{{sync_servo_count}}})"), lambda servos: SyncMessage(decode_sync(servos)), (str,)),
+    ("<Setting", re.compile(r"<Setting point in Arduino, Point: (\d+) Val: (\d+)>"), PointSetMessage, (int, int)),
+    (
+        "<Increment",
+        re.compile(r"<Increment point in Arduino, Point: (\d+) Val: (\d+)>"),
+        PointIncrementMessage,
+        (int, int),
+    ),
+    (
+        "<Decrement",
+        re.compile(r"<Decrement point in Arduino, Point: (\d+) Val: (\d+)>"),
+        PointDecrementMessage,
+        (int, int),
+    ),
+    ("<ID:", re.compile(r"<ID: (\S+) v(\S+)>"), IdMessage, (str, str)),
+    ("<", re.compile(r"<(.*)>"), StatusMessage, (str,)),
+]
+
+
+def decode_sync(servos: str) -> tuple[int, ...]:
+    """Servo states from a sync string to a state for each point."""
+    states = []
+    for field in sync_fields:
+        if isinstance(field, tuple):
+            states.append(int(servos[field[0]] + servos[field[1]], 2))
+        else:
+            states.append(int(servos[field]))
+    return tuple(states)
+
+
+@lru_cache(maxsize=1024)
+def decode_line(text: str) -> Optional[Message]:
+    """Decode a line from the Arduino. The same few lines are sent over and over, so the messages are cached.
+
+    Args:
+        text (str): Line without the newline. A trailing carriage return from println is ignored.
+
+    Returns:
+        Optional[Message]: None for an empty line.
+    """
+    text = text.rstrip("\r")
+    if not text:
+        return None
+
+    for prefix, pattern, message_type, converters in message_table:
+        if not text.startswith(prefix):
+            continue
+        match = pattern.fullmatch(text)
+        if match:
+            return message_type(*(convert(group) for convert, group in zip(converters, match.groups())))
+
+    return UnknownMessage(text)
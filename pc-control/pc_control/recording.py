@@ -0,0 +1,210 @@
+"""Records the serial stream to a binary log and replays it in place of the serial port.
+
+The log is append-only. It starts with a magic number and is followed by records of:
+    type (uint8), timestamp (float64, time.monotonic()), payload length (uint16), payload
+Received lines and sent commands are stored as their ASCII text. Every time the log is opened for recording, a session
+record is written with the wall clock time so the replayed lines can be shown with the times they arrived.
+
+Print a log:
+    python -m pc_control.recording show.pcrec
+"""
+
+import argparse
+import queue
+import struct
+import threading
+import time
+import tomllib
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional
+from pc_control.serial_comms import SerialLine
+
+magic = b"PCSERIAL"
+record_header = struct.Struct("<BdH")
+session_payload = struct.Struct("<d")
+
+RECEIVED = 0
+SENT = 1
+SESSION = 2
+
+
+def read_recording_settings():
+    with open(Path(__file__).parent.parent / "settings.toml", "rb") as f:
+        return tomllib.load(f)["recording"]
+
+
+class Record(NamedTuple):
+    kind: int  # RECEIVED, SENT or SESSION
+    timestamp: float  # time.monotonic() when recorded
+    wall_time: float  # time.time() when recorded
+    text: str  # the line received or commands sent. Empty for a session.
+
+
+class SerialRecorder:
+    """Appends every line received and every batch of commands sent to a log.
+
+    Called from the serial reader and writer threads. Writes are buffered and flushed at most every flush_interval,
+    so recording doesn't slow the threads down.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        """Opens the log and starts a session.
+
+        Args:
+            path (str): Log file. Created if it doesn't exist, otherwise appended to.
+            flush_interval (float, optional): Maximum seconds between writes to disk. Defaults to 1.0.
+        """
+        self.file = open(path, "ab")
+        self.lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+
+        if self.file.tell() == 0:
+            self.file.write(magic)
+        self.write_record(SESSION, time.monotonic(), session_payload.pack(time.time()))
+
+    def record_received(self, line: SerialLine):
+        self.write_record(RECEIVED, line.timestamp, line.text.encode("ascii"))
+
+    def record_sent(self, data: bytes, timestamp: float):
+        self.write_record(SENT, timestamp, data)
+
+    def write_record(self, kind: int, timestamp: float, payload: bytes):
+        payload = payload[:0xFFFF]
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(record_header.pack(kind, timestamp, len(payload)))
+            self.file.write(payload)
+
+            if timestamp - self.last_flush > self.flush_interval:
+                self.file.flush()
+                self.last_flush = timestamp
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+def read_log(path: str) -> Iterator[Record]:
+    """Every record in a log, in the order recorded.
+
+    Raises:
+        ValueError: If the file isn't a serial log.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(magic)) != magic:
+            raise ValueError(f"{path} is not a serial log")
+
+        session_time = 0.0
+        session_wall_time = 0.0
+
+        while True:
+            header = f.read(record_header.size)
+            if len(header) < record_header.size:
+                return  # the end, or a record cut short by the app stopping
+            kind, timestamp, length = record_header.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+
+            if kind == SESSION:
+                session_time = timestamp
+                (session_wall_time,) = session_payload.unpack(payload)
+
+            wall_time = session_wall_time + timestamp - session_time
+            yield Record(kind, timestamp, wall_time, "" if kind == SESSION else payload.decode("ascii"))
+
+
+class ReplaySerial:
+    """Plays back the lines received in a log. Has the same interface as ZeroWaitSerial, so can be used in its place.
+
+    A thread queues each line when it is due, at speed times the recorded rate. At a speed of 0 the lines are queued
+    as fast as they are read, but never dropped. Lines are timestamped when they are replayed and keep their recorded
+    wall clock time. Anything written is discarded.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, max_queued_lines: int = 1000):
+        """Opens the log and starts playing it.
+
+        Args:
+            path (str): Log to replay.
+            speed (float, optional): Multiple of the recorded speed. 0 for as fast as possible. Defaults to 1.0.
+            max_queued_lines (int, optional): Lines held for the UI. Playback waits when full. Defaults to 1000.
+        """
+        self.path = path
+        self.speed = speed
+        self.lines: queue.Queue[SerialLine] = queue.Queue(maxsize=max_queued_lines)
+        self.notify: Optional[Callable[[], None]] = None  # called from the replay thread when lines are queued
+        self.is_open = True
+        self.finished = threading.Event()
+
+        self.player = threading.Thread(target=self.play, name="serial-replay", daemon=True)
+        self.player.start()
+
+    def play(self):
+        """Replay thread."""
+        start = time.monotonic()
+        first_timestamp = None
+
+        for record in read_log(self.path):
+            if not self.is_open:
+                break
+            # Each session restarts the clock at its first line, so the gap between sessions isn't replayed, whether
+            # or not the machine was restarted in between.
+            if record.kind == SESSION:
+                first_timestamp = None
+            if record.kind != RECEIVED:
+                continue
+
+            if first_timestamp is None:
+                first_timestamp = record.timestamp
+                start = time.monotonic()
+
+            if self.speed:
+                delay = start + (record.timestamp - first_timestamp) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            was_empty = self.lines.empty()
+            while self.is_open:
+                try:
+                    self.lines.put(SerialLine(record.text, time.monotonic(), record.wall_time), timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+            if was_empty and self.notify:
+                self.notify()
+
+        self.finished.set()
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+    def is_connected(self) -> bool:
+        return True
+
+    def lines_waiting(self) -> bool:
+        return not self.lines.empty()
+
+    def read_available_lines(self) -> list[SerialLine]:
+        lines = []
+        while True:
+            try:
+                lines.append(self.lines.get_nowait())
+            except queue.Empty:
+                return lines
+
+    def close(self):
+        self.is_open = False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a serial log")
+    parser.add_argument("path")
+    args = parser.parse_args()
+
+    names = {RECEIVED: "<-", SENT: "->", SESSION: "=="}
+    for record in read_log(args.path):
+        print(f"{time.strftime('%H:%M:%S', time.localtime(record.wall_time))} {names[record.kind]} {record.text!r}")
@@ -0,0 +1,147 @@
+"""Keeps the route highlighted from an origin track up to date as the points change.
+
+The route is every track which can be reached from the origin through the points as they are set, found by flood fill.
+Each track reached remembers the track and point it was first reached through, so the tracks reached through a point
+form a subtree. Points report their state changes through point_changed. When a point on the route has changed, only
+its subtree is removed and filled again, from the point and from any other tracks on the route which join the removed
+tracks. Nothing is done for points off the route, and nothing at all when no point has changed.
+"""
+
+from collections import deque
+from typing import Optional, Sequence
+from pc_control.points import Point
+from pc_control.track import Track
+
+
+class RouteTracer:
+    """Sets Track.in_route for the route from an origin, and marks the points the route is blocked by."""
+
+    def __init__(self, tracks: Sequence[Track], points: Sequence[Point]):
+        """Sets up an empty route.
+
+        Args:
+            tracks (Sequence[Track]): Every track in the layout.
+            points (Sequence[Point]): Every point in the layout.
+        """
+        self.tracks = tracks
+        self.points = points
+
+        # tracks each point joins, to find the points leading into part of the route
+        self.point_tracks = {point: {track for _, a, b in point.get_legs() for track in (a, b)} for point in points}
+        self.changed_points: list[Point] = []  # changed since the last update, in the order they changed
+
+        self.origin: Optional[Track] = None
+        self.parents: dict[Track, tuple[Optional[Track], Optional[Point]]] = {}  # reached track -> (track, point) from
+        self.entries: dict[Point, set[Track]] = {}  # point -> tracks on the route leading into it
+        self.blocked: dict[Point, set[Track]] = {}  # point -> tracks leading into it which it is set against
+        self.changed = False
+
+    def set_origin(self, origin: Optional[Track]):
+        """Trace the route from a new origin. None clears the route. Nothing is done if the origin is the same."""
+        if origin is self.origin:
+            return
+
+        for track in self.parents:
+            track.in_route = False
+        self.parents.clear()
+        self.entries.clear()
+        self.blocked.clear()
+
+        self.origin = origin
+        if origin is not None:
+            self.parents[origin] = (None, None)
+            origin.in_route = True
+            self.fill([(connection, origin, None) for connection in origin.connections])
+
+        self.apply_marks()
+        self.changed = True
+
+    def point_changed(self, point: Point):
+        """Called by a point when its state changes. The route is retraced on the next update."""
+        if point not in self.changed_points:
+            self.changed_points.append(point)
+
+    def update(self) -> bool:
+        """Retrace the parts of the route after any points which have changed state.
+
+        Returns:
+            bool: True if the tracks in the route have changed since the last call.
+        """
+        if self.changed_points:
+            changed_points, self.changed_points = self.changed_points, []
+            for point in changed_points:
+                if point in self.entries:
+                    self.retrace(point)
+
+        changed, self.changed = self.changed, False
+        return changed
+
+    def retrace(self, point: Point):
+        """Remove the tracks reached through a point and fill from the point again."""
+        before = set(self.parents)
+
+        removed = set()
+        for track in self.parents:
+            if self.is_reached_through(track, point):
+                removed.add(track)
+
+        for track in removed:
+            del self.parents[track]
+            track.in_route = False
+        for table in (self.entries, self.blocked):
+            table.pop(point, None)
+            for entry_point in list(table):
+                table[entry_point] -= removed
+                if not table[entry_point]:
+                    del table[entry_point]
+
+        # everywhere the rest of the route leads into the point or the removed tracks
+        frontier = []
+        for track in self.parents:
+            for connection in track.connections:
+                if connection is point:
+                    frontier.append((connection, track, None))
+                elif isinstance(connection, Track):
+                    if connection in removed:
+                        frontier.append((connection, track, None))
+                elif self.point_tracks[connection] & removed:
+                    frontier.append((connection, track, None))
+        self.fill(frontier)
+
+        self.apply_marks()
+        if set(self.parents) != before:
+            self.changed = True
+
+    def is_reached_through(self, track: Track, point: Point) -> bool:
+        """Was the track first reached through the point?"""
+        while track is not None:
+            track, via = self.parents[track]
+            if via is point:
+                return True
+        return False
+
+    def fill(self, frontier: list[tuple]):
+        """Flood fill from (item, track it is reached from, point passed through) until nothing new is reached."""
+        queue = deque(frontier)
+        while queue:
+            item, source, via = queue.popleft()
+
+            if isinstance(item, Track):
+                if item not in self.parents:
+                    self.parents[item] = (source, via)
+                    item.in_route = True
+                    queue.extend((connection, item, None) for connection in item.connections)
+            else:
+                self.entries.setdefault(item, set()).add(source)
+                exits = item.get_exits(source)
+                if exits is None:
+                    self.blocked.setdefault(item, set()).add(source)
+                else:
+                    queue.extend((track, source, item) for track in exits)
+
+    def apply_marks(self):
+        """Set the red cross flags on the points from the blocked entries."""
+        for point in self.points:
+            point.clear_marks()
+            for track in self.blocked.get(point, ()):
+                point.mark_blocked(track)
@@ -1,6 +1,11 @@
+import queue
+import threading
+import time
 import tomllib
 import serial
+from collections import deque
 from pathlib import Path
+from typing import Callable, NamedTuple, Optional
 
 
 def read_connection_settings():
@@ -10,39 +15,458 @@ def read_connection_settings():
     return settings["port"], settings["baud"]
 
 
+class SerialLine(NamedTuple):
+    """A line received from the Arduino, timestamped as it arrived."""
+
+    text: str
+    timestamp: float  # time.monotonic() for measuring intervals
+    wall_time: float  # time.time() for display
+
+
+class LineFramer:
+    """Splits a byte stream into lines as it arrives.
+
+    Bytes are kept in a bytearray and each search for a newline starts where the last one stopped, so a long burst
+    without a newline costs linear time. Lines longer than max_line_length are discarded up to their next newline
+    so memory stays bounded. A line which isn't ASCII is quarantined on its own and the lines around it are kept.
+    """
+
+    def __init__(self, max_line_length: int = 256, max_quarantined: int = 20):
+        """Sets up an empty framer.
+
+        Args:
+            max_line_length (int, optional): Longest line in bytes, not counting the newline. Defaults to 256.
+            max_quarantined (int, optional): Corrupt lines kept for diagnostics. Defaults to 20.
+        """
+        self.max_line_length = max_line_length
+        self.buffer = bytearray()
+        self.scan_offset = 0  # everything before this has been searched for a newline
+        self.discarding = False  # in the middle of an overlong line
+
+        self.overlong_lines = 0
+        self.decode_errors = 0
+        self.quarantined: deque[bytes] = deque(maxlen=max_quarantined)
+
+    def feed(self, data: bytes) -> list[str]:
+        """Add the data and return the lines it completes, without their newlines."""
+        buffer = self.buffer
+        buffer += data
+
+        lines = []
+        start = 0
+        while True:
+            end = buffer.find(b"\n", self.scan_offset)
+            if end == -1:
+                break
+
+            if self.discarding:
+                self.discarding = False  # the end of the overlong line. It has already been counted.
+            elif end - start > self.max_line_length:
+                self.overlong_lines += 1
+            else:
+                line = bytes(buffer[start:end])
+                try:
+                    lines.append(line.decode("ascii"))
+                except UnicodeDecodeError:
+                    print("Unicode Decode Error: " + str(line))
+                    self.decode_errors += 1
+                    self.quarantined.append(line)
+
+            start = self.scan_offset = end + 1
+
+        del buffer[:start]
+        self.scan_offset = len(buffer)
+
+        if len(buffer) > self.max_line_length:
+            if not self.discarding:
+                self.overlong_lines += 1
+                self.discarding = True
+            buffer.clear()
+            self.scan_offset = 0
+
+        return lines
+
+    def get_statistics(self) -> dict[str, int]:
+        """Framing error counts for diagnostics."""
+        return {"overlong_lines": self.overlong_lines, "decode_errors": self.decode_errors}
+
+
 class ZeroWaitSerial(serial.Serial):
-    """A class designed to read lines with a zero timeout read."""
+    """A serial port drained by a background reader thread.
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs, timeout=0)
-        self.buffer = ""
+    The thread blocks on the port and splits the bytes into lines as soon as they arrive, timestamping each one.
+    Lines are handed over through a bounded queue, so read_available_lines never waits and slow frames can't delay
+    the port being read.
+    """
+
+    def __init__(self, *args, max_queued_lines: int = 1000, max_line_length: int = 256, **kwargs):
+        """Opens the port and starts the reader thread.
+
+        Args:
+            max_queued_lines (int, optional): Lines held for the UI. The oldest are dropped when full. Defaults to 1000.
+            max_line_length (int, optional): Longer lines are discarded as framing errors. Defaults to 256.
+        """
+        # The timeout only applies to the reader thread. It limits how long a read blocks so the thread can exit.
+        super().__init__(*args, **kwargs, timeout=0.1)
+        self.framer = LineFramer(max_line_length)
+        self.lines: queue.Queue[SerialLine] = queue.Queue(maxsize=max_queued_lines)
+        self.dropped_lines = 0
+        self.notify: Optional[Callable[[], None]] = None  # called from the reader thread when lines arrive
+        self.recorder = None  # SerialRecorder to log the lines received to
+        self.on_line: Optional[Callable[[SerialLine], None]] = None  # called from the reader thread for every line
 
-    def read_available_lines(self):
-        if self.in_waiting > 0:
+        self.reader = threading.Thread(target=self.read_loop, name="serial-reader", daemon=True)
+        self.reader.start()
+
+    def read_loop(self):
+        """Reader thread. Runs until the port is closed or fails."""
+        while self.is_open:
             try:
-                self.buffer += self.read(self.in_waiting).decode("ascii")
-                lines = self.buffer.split("\n")
-                self.buffer = lines[-1]
-                return lines[:-1]
-            except UnicodeDecodeError:
-                print("Unicode Decode Error")
-                return []
-        else:
-            return []
+                # block for the first byte then take everything else that has arrived with it
+                data = self.read(max(1, self.in_waiting))
+            except (serial.SerialException, OSError, TypeError):
+                # port closed from another thread (pyserial can raise TypeError once the fd is gone) or device removed
+                break
+
+            if data:
+                self.add_data(data, time.monotonic(), time.time())
+
+    def add_data(self, data: bytes, timestamp: float, wall_time: float):
+        """Split the data into lines and queue them with the arrival time."""
+        lines = self.framer.feed(data)
+        if not lines:
+            return
+
+        was_empty = self.lines.empty()
+
+        for line in lines:
+            serial_line = SerialLine(line, timestamp, wall_time)
+            if self.recorder:
+                self.recorder.record_received(serial_line)
+            if self.on_line:
+                self.on_line(serial_line)
+            self.queue_line(serial_line)
+
+        if was_empty and self.notify:
+            self.notify()
+
+    def queue_line(self, line: SerialLine):
+        """Queue a line for the UI, dropping the oldest if the queue is full."""
+        while True:
+            try:
+                self.lines.put_nowait(line)
+                return
+            except queue.Full:
+                try:
+                    self.lines.get_nowait()
+                    self.dropped_lines += 1
+                except queue.Empty:
+                    pass
+
+    def lines_waiting(self) -> bool:
+        """Are there lines to read?"""
+        return not self.lines.empty()
+
+    def read_available_lines(self) -> list[SerialLine]:
+        """All the lines received since the last call. Never waits."""
+        lines = []
+        while True:
+            try:
+                lines.append(self.lines.get_nowait())
+            except queue.Empty:
+                return lines
+
+
+class SerialConnection:
+    """Keeps a ZeroWaitSerial connected in the background.
+
+    The port is opened on a thread so start up never waits for it. If it can't be opened, or the device is removed,
+    the thread keeps retrying with exponential backoff. A reconnected port replaces the old one behind the same
+    interface as ZeroWaitSerial, so everything holding the connection carries on as before.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baud: int,
+        min_retry: float = 0.5,
+        max_retry: float = 10.0,
+        settle_time: float = 2.0,
+        find_port: Optional[Callable[[bool, threading.Event], Optional[str]]] = None,
+        identify: Optional[Callable[[str], bool]] = None,
+        identify_timeout: float = 3.0,
+    ):
+        """Sets up the connection. Call start once notify, on_change and recorder are set.
+
+        Args:
+            port (str): Serial port name.
+            baud (int): Baud rate.
+            min_retry (float, optional): Seconds before the first retry. Doubles on each failure. Defaults to 0.5.
+            max_retry (float, optional): Most seconds between retries. Defaults to 10.0.
+            settle_time (float, optional): Seconds to wait after opening the port, while the Arduino resets, before
+                reporting the connection. Defaults to 2.0.
+            find_port (Optional[Callable[[bool, threading.Event], Optional[str]]], optional): Looks for the port
+                before each attempt instead of using port. Passed False if the last port it found didn't work, and an
+                event which is set when the connection is closing. Defaults to None.
+            identify (Optional[Callable[[str], bool]], optional): Recognises the Arduino's heartbeat line. If given,
+                a heartbeat is requested once the port has settled and the port only works if it answers. Defaults to
+                None.
+            identify_timeout (float, optional): Seconds to wait for the heartbeat. Defaults to 3.0.
+        """
+        self.port = port
+        self.baud = baud
+        self.min_retry = min_retry
+        self.max_retry = max_retry
+        self.settle_time = settle_time
+        self.find_port = find_port
+        self.identify = identify
+        self.identify_timeout = identify_timeout
+        self.identified = threading.Event()
+
+        self.serial: Optional[ZeroWaitSerial] = None
+        self.connected = False
+        self.leftover_lines: list[SerialLine] = []  # received on a port which has since been lost
+        self.lock = threading.Lock()  # guards leftover_lines
+
+        self.notify: Optional[Callable[[], None]] = None  # called from a background thread when lines arrive
+        self.on_change: Optional[Callable[[], None]] = None  # called from the connection thread on (dis)connect
+        self.recorder = None  # SerialRecorder to log the lines received to
+
+        self.closing = threading.Event()
+        self.thread = threading.Thread(target=self.connect_loop, name="serial-connect", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def connect_loop(self):
+        """Connection thread. Opens the port, waits for it to fail then tries again."""
+        retry = self.min_retry
+        port_worked = True
+
+        while not self.closing.is_set():
+            if self.find_port:
+                port = self.find_port(port_worked, self.closing)
+                if port is None:
+                    print(f"Arduino not found, retrying in {retry:.1f}s")
+                    self.closing.wait(retry)
+                    retry = min(retry * 2, self.max_retry)
+                    continue
+                self.port = port
+
+            try:
+                ser = ZeroWaitSerial(self.port, self.baud)
+            except (serial.SerialException, OSError) as e:
+                print(f"Unable to connect to {self.port}, retrying in {retry:.1f}s: {e}")
+                port_worked = False
+                self.closing.wait(retry)
+                retry = min(retry * 2, self.max_retry)
+                continue
+
+            ser.notify = self.lines_received
+            ser.recorder = self.recorder
+            ser.on_line = self.line_received
+            self.identified.clear()
+            self.serial = ser
+
+            if self.closing.wait(self.settle_time):
+                break
+
+            port_worked = ser.reader.is_alive() and self.is_identified(ser)
+            if self.closing.is_set():
+                break
+            if port_worked:
+                retry = self.min_retry
+                print(f"Connected to {self.port}")
+                self.set_connected(True)
+
+                # The reader thread stops when the port fails, e.g. the USB cable is pulled
+                while ser.reader.is_alive() and not self.closing.wait(0.2):
+                    pass
+
+            self.serial = None
+            with self.lock:
+                self.leftover_lines += ser.read_available_lines()
+            ser.close()
+
+            if self.closing.is_set():
+                break
+            if self.connected:
+                print(f"Lost connection to {self.port}")
+                self.set_connected(False)
+            else:
+                print(f"No answer from {self.port}, retrying in {retry:.1f}s")
+                self.closing.wait(retry)
+                retry = min(retry * 2, self.max_retry)
+
+        if self.serial:
+            self.serial.close()
+
+    def is_identified(self, ser: ZeroWaitSerial) -> bool:
+        """Request a heartbeat and wait for the Arduino to answer. Always True without an identify function."""
+        if self.identify is None:
+            return True
+        try:
+            ser.write(b"c\n")
+        except (serial.SerialException, OSError):
+            return False
+
+        deadline = time.monotonic() + self.identify_timeout
+        while not self.identified.wait(0.1):
+            if self.closing.is_set() or time.monotonic() > deadline:
+                return False
+        return True
+
+    def line_received(self, line: SerialLine):
+        if self.identify and self.identify(line.text):
+            self.identified.set()
+
+    def set_connected(self, connected: bool):
+        self.connected = connected
+        if self.on_change:
+            self.on_change()
+
+    def lines_received(self):
+        if self.notify:
+            self.notify()
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def write(self, data: bytes) -> int:
+        """Write to the port.
+
+        Raises:
+            serial.SerialException: If the port isn't connected.
+        """
+        ser = self.serial
+        if ser is None:
+            raise serial.SerialException(f"{self.port} not connected")
+        return ser.write(data)
+
+    def lines_waiting(self) -> bool:
+        ser = self.serial
+        return bool(self.leftover_lines) or (ser is not None and ser.lines_waiting())
+
+    def read_available_lines(self) -> list[SerialLine]:
+        with self.lock:
+            lines, self.leftover_lines = self.leftover_lines, []
+        ser = self.serial
+        if ser is not None:
+            lines += ser.read_available_lines()
+        return lines
+
+    def close(self):
+        self.closing.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+
+class CommandQueueFull(serial.SerialTimeoutException):
+    """Raised when the command queue can't take any more commands. Nothing from the write has been queued."""
+
+
+class CommandWriter:
+    """Queues outbound commands and writes them to the port from a background thread.
+
+    Commands written during a tick are held until flush is called, then sent as a single write. Within a tick,
+    toggles of the same point (or the lights) cancel each other out and repeated sync or heartbeat requests are only
+    sent once. If the port falls behind, batches wait in a bounded queue and then in the pending list. Once the
+    pending list is full, writes raise CommandQueueFull.
+    """
+
+    toggle_commands = ("p", "l")  # sending twice leaves the layout as it was
+    repeatable_commands = ("r", "c")  # sending twice is the same as sending once
+
+    def __init__(self, ser, max_batches: int = 8, max_pending: int = 64):
+        """Sets up the queue and starts the writer thread.
+
+        Args:
+            ser (ZeroWaitSerial | DummySerial): Port to write to.
+            max_batches (int, optional): Batches waiting for the port. Defaults to 8.
+            max_pending (int, optional): Commands waiting to be batched. Defaults to 64.
+        """
+        self.serial = ser
+        self.pending: list[str] = []
+        self.max_pending = max_pending
+        self.batches: queue.Queue[bytes] = queue.Queue(maxsize=max_batches)
+        # called from the writer thread with each batch once it has been written
+        self.on_sent: Optional[Callable[[bytes, float], None]] = None
+        self.recorder = None  # SerialRecorder to log the commands sent to
+
+        self.writer = threading.Thread(target=self.write_loop, name="serial-writer", daemon=True)
+        self.writer.start()
+
+    def write(self, data: bytes) -> int:
+        """Queue newline separated commands, e.g. b"p5\n". Has the same signature as serial.Serial.write.
+
+        Raises:
+            CommandQueueFull: If there isn't room for all of the commands.
+
+        Returns:
+            int: Number of bytes accepted.
+        """
+        commands = [command for command in data.decode("ascii").split("\n") if command]
+
+        if len(self.pending) + len(commands) > self.max_pending:
+            raise CommandQueueFull(f"{len(self.pending)} commands already waiting")
+
+        for command in commands:
+            if command in self.pending:
+                if command.startswith(self.toggle_commands):
+                    self.pending.remove(command)
+                    continue
+                if command.startswith(self.repeatable_commands):
+                    continue
+            self.pending.append(command)
+
+        return len(data)
+
+    def flush(self):
+        """Hand everything written this tick to the writer thread as one buffer. Called once per frame."""
+        if not self.pending:
+            return
+
+        try:
+            self.batches.put_nowait(str.encode("".join(f"{command}\n" for command in self.pending)))
+            self.pending = []
+        except queue.Full:
+            pass  # the port is behind. Keep the commands and merge them with the next tick's.
+
+    def write_loop(self):
+        """Writer thread. Blocking writes happen here rather than on the render thread."""
+        while True:
+            batch = self.batches.get()
+            try:
+                self.serial.write(batch)
+            except (serial.SerialException, OSError) as e:
+                print("Unable to write " + str(batch) + " " + str(e))
+                continue  # never sent, so nothing will be acknowledged
+
+            timestamp = time.monotonic()
+            if self.on_sent:
+                self.on_sent(batch, timestamp)
+            if self.recorder:
+                self.recorder.record_sent(batch, timestamp)
 
 
 class DummySerial:
     """Can be used when serial is not available"""
 
     def __init__(self, *args, **kwargs):
-        pass
+        self.notify: Optional[Callable[[], None]] = None
 
     def write(self, string):
         print(f"Write: {string}")
 
-    def read_available_lines(self):
+    def lines_waiting(self) -> bool:
+        return False
+
+    def read_available_lines(self) -> list[SerialLine]:
         return []
 
+    def is_connected(self) -> bool:
+        return False
+
 
 if __name__ == "__main__":
 
@@ -54,4 +478,4 @@ if __name__ == "__main__":
         lines = ser.read_available_lines()
 
         for line in lines:
-            print(line)
+            print(line.text)
@@ -1,6 +1,5 @@
 import pygame
-import pygame.gfxdraw
-from typing import Tuple
+from pc_control.canvas import Canvas
 
 
 class Signal:
@@ -9,11 +8,11 @@ class Signal:
     The colour of the lights is set by the state.
     """
 
-    def __init__(self, display: pygame.Surface, left: int, top: int):
+    def __init__(self, display: Canvas, left: int, top: int):
         """Sets up object.
 
         Args:
-            display (pygame.Surface): Surface to draw the point on.
+            display (Canvas): Canvas to draw the signal on.
             left (int): Top left corner
             top (int): Top left corner
         """
@@ -38,48 +37,35 @@ class Signal:
 
         self.state = "stop"
 
-    def update_state(self, mouse_pos: Tuple[int, int], mouse_up: bool):
-        """Updates the state of the signal if it is clicked
+        self.hover = False  # set by the layout when the mouse is over the signal
 
-        Args:
-            mouse_pos (Tuple[int, int]): Mouse position.
-            mouse_up (bool): Mouse up event?
-        """
-        if self.rect.collidepoint(mouse_pos):
-            if mouse_up:
-                if self.state == "stop":
-                    self.red_aspect_colour = self.red_aspect_dimmed_colour
-                    self.green_aspect_colour = self.green_aspect_illuminated_colour
-                    self.state = "proceed"
-                elif self.state == "proceed":
-                    self.red_aspect_colour = self.red_aspect_illuminated_colour
-                    self.green_aspect_colour = self.green_aspect_dimmed_colour
-                    self.state = "stop"
+        self.last_draw_state = None
+
+    def click(self):
+        """Toggles the state of the signal when it is clicked."""
+        if self.state == "stop":
+            self.red_aspect_colour = self.red_aspect_dimmed_colour
+            self.green_aspect_colour = self.green_aspect_illuminated_colour
+            self.state = "proceed"
+        elif self.state == "proceed":
+            self.red_aspect_colour = self.red_aspect_illuminated_colour
+            self.green_aspect_colour = self.green_aspect_dimmed_colour
+            self.state = "stop"
+
+    def needs_redraw(self) -> bool:
+        """Has the signal aspect changed since the last call?"""
+        changed = self.state != self.last_draw_state
+        self.last_draw_state = self.state
+        return changed
 
     def draw(self):
         """Draw the boundary and the lights."""
-        pygame.draw.rect(self.display, (255, 255, 255), self.rect, 1, border_radius=8)
+        self.display.rect((255, 255, 255), self.rect, 1, border_radius=8)
 
         # draw red circle
-        pygame.gfxdraw.aacircle(
-            self.display, int(self.left + self.width / 2), int(self.top + 12), self.light_radius, self.red_aspect_colour
-        )
-        pygame.gfxdraw.filled_circle(
-            self.display, int(self.left + self.width / 2), int(self.top + 12), self.light_radius, self.red_aspect_colour
-        )
+        self.display.circle((self.left + self.width // 2, self.top + 12), self.light_radius, self.red_aspect_colour)
 
         # draw green circle
-        pygame.gfxdraw.aacircle(
-            self.display,
-            int(self.left + self.width / 2),
-            int(self.top + self.height - 12),
-            self.light_radius,
-            self.green_aspect_colour,
-        )
-        pygame.gfxdraw.filled_circle(
-            self.display,
-            int(self.left + self.width / 2),
-            int(self.top + self.height - 12),
-            self.light_radius,
-            self.green_aspect_colour,
+        self.display.circle(
+            (self.left + self.width // 2, self.top + self.height - 12), self.light_radius, self.green_aspect_colour
         )
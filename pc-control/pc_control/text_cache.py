@@ -0,0 +1,49 @@
+import pygame
+from collections import OrderedDict
+from functools import lru_cache
+
+
+class TextCache:
+    """Bounded least recently used cache of rendered text surfaces.
+
+    Rendering text is slow compared to blitting it, and most text on screen (labels, the serial monitor) stays the same
+    for many frames. Surfaces are keyed by font, text and colour.
+    """
+
+    def __init__(self, max_size: int = 256):
+        """Sets up an empty cache.
+
+        Args:
+            max_size (int, optional): Number of surfaces to keep. Defaults to 256.
+        """
+        self.max_size = max_size
+        self.surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def render(self, font: pygame.font.Font, text: str, colour, antialias: bool = True) -> pygame.Surface:
+        """Return the rendered text, only rendering it if it isn't already cached.
+
+        Raises:
+            ValueError: If pygame can't render the text, e.g. it contains a null character.
+        """
+        key = (font, text, tuple(colour), antialias)
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, antialias, colour)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+
+        return surface
+
+
+@lru_cache(maxsize=None)
+def get_sys_font(name: str, size: int) -> pygame.font.Font:
+    """Loading a font is slow, so each name and size is only loaded once and shared."""
+    return pygame.font.SysFont(name, size)
+
+
+text_cache = TextCache()
@@ -1,8 +1,8 @@
 import pygame
-from typing import Tuple
-import pygame.gfxdraw
+from typing import NamedTuple, Optional, Tuple
 import tomllib
 from pathlib import Path
+from pc_control.canvas import Canvas
 
 
 def get_colours():
@@ -10,14 +10,23 @@ def get_colours():
         return tomllib.load(f)["track_colours"]
 
 
+class TrackGeometry(NamedTuple):
+    """Pre-computed drawing and hit-test data for a track. Built once as the track never moves."""
+
+    polygons: Tuple[Tuple[Tuple[int, int], ...], ...]  # one 4 point polygon per section
+    corners: Tuple[Tuple[int, int], ...]  # circles to round the joins between sections
+    endstop: Optional[Tuple[Tuple[int, int], Tuple[int, int]]]  # start and end of the endstop line
+    segments: Tuple[Tuple[Tuple[int, int], Tuple[int, int]], ...]  # start and end of each section for hit testing
+
+
 class Track:
-    """Draw track. Uses aapolygons. Fixed width of 4 pixels."""
+    """Draw track. Uses aapolygons. Fixed width of 4 layout units."""
 
     id_counter = 1
 
     def __init__(
         self,
-        display: pygame.surface,
+        display: Canvas,
         start: Tuple[int, int],
         end: Tuple[int, int],
         corners: list[Tuple[int, int]] = [],
@@ -26,7 +35,7 @@ class Track:
         """Setup a section of track
 
         Args:
-            display (pygame.surface): Surface to draw on
+            display (Canvas): Canvas to draw on
             start (Tuple[int,int]): beginning of track
             stop (Tuple[int,int]): end of track
             corners (list[Tuple[int,int]]): any additional corners
@@ -36,12 +45,14 @@ class Track:
         self.vertices = [start] + corners + [end]
         self.endstop = endstop
         self.click_buffer = 5  # how much margin around the line for clicking
+        self.click_radius = 2 + self.click_buffer  # distance from the centre line which counts as a hit
         self.id = Track.id_counter
         Track.id_counter += 1
 
         font = pygame.font.Font(None, 18)  # Use default font and size 36
         self.label = font.render(str(self.id), True, (255, 255, 255))  # Render the ID as text
         self.in_route = False
+        self.hover = False
         self.connections = []
 
         colours = get_colours()
@@ -49,95 +60,86 @@ class Track:
         self.base_colour = colours["base_colour"]
         self.highlight_colour = colours["highlight_colour"]
 
+        self.geometry = self.build_geometry()
+
     def __eq__(self, other):
         """Override the equality operator to compare Track objects by their id."""
         if isinstance(other, Track):
             return self.id == other.id
         return False
 
-    def draw(self, mouse_pos: Tuple[int, int]):
-        """Draw the sections to the display and add the endstop if one is specified."""
-        # pygame.draw.lines(self.display, self.line_colour, False, self.vertices, self.width)
+    def __hash__(self):
+        return hash(self.id)
 
-        self.hover = False
+    def build_geometry(self) -> TrackGeometry:
+        """Build the polygons, corner circles, endstop line and hit test segments for the track.
+
+        Returns:
+            TrackGeometry: Everything needed to draw and hit-test the track.
+        """
+        polygons = []
+        segments = []
 
         for i in range(len(self.vertices) - 1):
             line_start = self.vertices[i]
             line_end = self.vertices[i + 1]
 
             if line_start[0] != line_end[0] and line_start[1] != line_end[1]:  # diagonal line
-                points = [
+                points = (
                     (line_start[0] - 3, line_start[1]),
                     (line_start[0] + 3, line_start[1]),
                     (line_end[0] + 3, line_end[1]),
                     (line_end[0] - 3, line_end[1]),
-                ]
+                )
             elif line_start[0] != line_end[0]:  # horizontal line
-                points = [
+                points = (
                     (line_start[0], line_start[1] - 2),
                     (line_start[0], line_start[1] + 2),
                     (line_end[0], line_end[1] + 2),
                     (line_end[0], line_end[1] - 2),
-                ]
+                )
             else:  # vertical line
-                points = [
+                points = (
                     (line_start[0] - 2, line_start[1]),
                     (line_start[0] + 2, line_start[1]),
                     (line_end[0] + 2, line_end[1]),
                     (line_end[0] - 2, line_end[1]),
-                ]
+                )
 
-            # Extracting the x and y coordinates
-            x_coords = [point[0] for point in points]
-            y_coords = [point[1] for point in points]
+            polygons.append(points)
+            segments.append(((line_start[0], line_start[1]), (line_end[0], line_end[1])))
 
-            # Finding the minimum and maximum coordinates
-            min_x = min(x_coords) - self.click_buffer
-            max_x = max(x_coords) + self.click_buffer
-            min_y = min(y_coords) - self.click_buffer
-            max_y = max(y_coords) + self.click_buffer
+        # if there is more than one section, draw a circle at the start of subsequent sections to round the corners.
+        corners = tuple((vertex[0], vertex[1]) for vertex in self.vertices[1:-1])
 
-            # Calculating the width and height
-            width = max_x - min_x
-            height = max_y - min_y
+        end_point = self.vertices[-1]
 
-            # Creating the Rect object
-            rect = pygame.Rect(min_x, min_y, width, height)
+        if self.endstop == "vertical":
+            endstop = ((end_point[0], end_point[1] - 5), (end_point[0], end_point[1] + 5))
+        elif self.endstop == "horizontal":
+            endstop = ((end_point[0] - 5, end_point[1]), (end_point[0] + 5, end_point[1]))
+        else:
+            endstop = None
 
-            if self.in_route:
-                colour = self.route_colour
-            else:
-                colour = self.base_colour
+        return TrackGeometry(tuple(polygons), corners, endstop, tuple(segments))
 
-            if rect.collidepoint(mouse_pos):
-                self.hover = True
+    def draw(self):
+        """Draw the sections to the display and add the endstop if one is specified."""
+        # pygame.draw.lines(self.display, self.line_colour, False, self.vertices, self.width)
 
-            pygame.gfxdraw.filled_polygon(self.display, points, colour)
-            pygame.gfxdraw.aapolygon(self.display, points, colour)
+        if self.in_route:
+            colour = self.route_colour
+        else:
+            colour = self.base_colour
 
-            # if there is more than one section, draw a circle at the start of subsequent sections to round the corners.
-            if i > 0:
-                pygame.gfxdraw.filled_circle(self.display, line_start[0], line_start[1], 2, colour)
-                pygame.gfxdraw.aacircle(self.display, line_start[0], line_start[1], 2, colour)
+        for points in self.geometry.polygons:
+            self.display.polygon(points, colour)
 
-        end_point = self.vertices[-1]
+        for corner in self.geometry.corners:
+            self.display.circle(corner, 2, colour)
 
-        if self.endstop == "vertical":
-            pygame.draw.line(
-                self.display,
-                colour,
-                (end_point[0], end_point[1] - 5),
-                (end_point[0], end_point[1] + 5),
-                4,
-            )
-        elif self.endstop == "horizontal":
-            pygame.draw.line(
-                self.display,
-                colour,
-                (end_point[0] - 5, end_point[1]),
-                (end_point[0] + 5, end_point[1]),
-                4,
-            )
+        if self.geometry.endstop:
+            self.display.line(colour, self.geometry.endstop[0], self.geometry.endstop[1], 4)
 
         # self.display.blit(
         #     self.label, (self.vertices[0][0] + 10, self.vertices[0][1] - 10)
@@ -0,0 +1,287 @@
+"""The layout's topology compiled into integer arrays for route finding.
+
+Each track is two nodes, one for each direction of travel. Node 2 * track + end is travelling along the track towards
+its connections[end]. The edges out of a node lead to the tracks joined at that end, either directly or through one
+leg of a point, i.e. a pair of tracks the point connects in one of its states. A train can't reverse on a track, so
+a route through a track always leaves by the opposite end to the one it came in.
+
+The adjacency is stored in compressed sparse row form: the edges out of node n are offsets[n] to offsets[n + 1] in
+targets and edge_legs.
+
+Every route between the terminal tracks (the platforms, sidings and so on) is enumerated into a RouteTable. The table
+is cached on disk with a hash of the compiled graph, so it is only rebuilt when the layout changes.
+"""
+
+import hashlib
+import struct
+from array import array
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+from pc_control.points import Point
+from pc_control.track import Track
+
+
+class Route(NamedTuple):
+    tracks: tuple[int, ...]  # indices of the tracks from start to end
+    point_states: tuple[tuple[int, int], ...]  # (point index, state) needed for each point on the route, in order
+
+
+class TrackGraph:
+    """Compiled track graph with route search."""
+
+    direct = 0xFFFF  # edge_legs value for tracks joined directly rather than through a point
+
+    def __init__(self, tracks: Sequence[Track], points: Sequence[Point]):
+        """Compiles the graph from the connections of the tracks and the legs of the points.
+
+        Args:
+            tracks (Sequence[Track]): Tracks. Routes refer to tracks by their index in this list.
+            points (Sequence[Point]): Points, in the same order as the point states in a sync.
+        """
+        self.track_index = {track: index for index, track in enumerate(tracks)}
+        self.node_count = 2 * len(tracks)
+
+        # legs of the points. state + 1 so 0 can mean "not set" in a route's requirements
+        self.leg_points = array("H")
+        self.leg_values = array("H")
+
+        edges: list[list[tuple[int, int]]] = [[] for _ in range(self.node_count)]  # node -> [(target, leg)]
+
+        # tracks joined directly, e.g. either side of the bridge
+        for a, track in enumerate(tracks):
+            for end, connection in enumerate(track.connections):
+                if isinstance(connection, Track):
+                    b = self.track_index[connection]
+                    edges[2 * a + end].append((self.enter(b, connection.connections.index(track)), self.direct))
+
+        for point_index, point in enumerate(points):
+            for state, track_a, track_b in point.get_legs():
+                leg = len(self.leg_points)
+                self.leg_points.append(point_index)
+                self.leg_values.append(state + 1)
+
+                a, b = self.track_index[track_a], self.track_index[track_b]
+                end_a, end_b = track_a.connections.index(point), track_b.connections.index(point)
+                edges[2 * a + end_a].append((self.enter(b, end_b), leg))
+                edges[2 * b + end_b].append((self.enter(a, end_a), leg))
+
+        self.offsets = array("H", [0])
+        self.targets = array("H")
+        self.edge_legs = array("H")
+        for node_edges in edges:
+            for target, leg in node_edges:
+                self.targets.append(target)
+                self.edge_legs.append(leg)
+            self.offsets.append(len(self.targets))
+
+    @staticmethod
+    def enter(track: int, end: int) -> int:
+        """Node for arriving on a track at an end, so travelling towards its other end."""
+        return 2 * track + 1 - end
+
+    def find_route(self, start: int, end: int) -> Optional[Route]:
+        """Shortest route from one track to another, in either direction from the start.
+
+        A route can't need a point in two states at once, so legs which conflict with the route so far are skipped.
+        The states needed are carried through the search as a bit field of 2 bits per point. Each step of the search
+        is a node together with the states needed to reach it, as a node reached first through points set one way may
+        only lead on to the end with them set another way.
+
+        Args:
+            start (int): Index of the track to start from.
+            end (int): Index of the track to reach.
+
+        Returns:
+            Optional[Route]: None if the tracks aren't connected.
+        """
+        if start == end:
+            return Route((start,), ())
+
+        offsets, targets, edge_legs = self.offsets, self.targets, self.edge_legs
+        leg_points, leg_values, direct = self.leg_points, self.leg_values, self.direct
+
+        # (node, states needed) -> the (node, states needed) it was reached from and the edge taken
+        starts = [(2 * start, 0), (2 * start + 1, 0)]
+        parents: dict[tuple[int, int], tuple[Optional[tuple[int, int]], int]] = {step: (None, -1) for step in starts}
+        queue = list(starts)
+
+        for step in queue:  # the queue grows as it is iterated
+            node, node_required = step
+            for edge in range(offsets[node], offsets[node + 1]):
+                target = targets[edge]
+                leg = edge_legs[edge]
+                if leg != direct:
+                    shift = 2 * leg_points[leg]
+                    value = leg_values[leg]
+                    current = (node_required >> shift) & 3
+                    if current and current != value:
+                        continue
+                    target_required = node_required | (value << shift)
+                else:
+                    target_required = node_required
+
+                target_step = (target, target_required)
+                if target_step in parents:
+                    continue
+                parents[target_step] = (step, edge)
+
+                if target >> 1 == end:
+                    return self.build_route(target_step, parents)
+                queue.append(target_step)
+
+        return None
+
+    def find_all_routes(self, start: int, end: int) -> list[Route]:
+        """Every route from one track to another which doesn't use a track twice, shortest first."""
+        offsets, targets, edge_legs = self.offsets, self.targets, self.edge_legs
+        leg_points, leg_values, direct = self.leg_points, self.leg_values, self.direct
+        routes = []
+
+        def search(node: int, required: int, visited: int, path: list[tuple[int, int]]):
+            """path is (track, edge) for each step so far. visited is a bit per track."""
+            for edge in range(offsets[node], offsets[node + 1]):
+                target = targets[edge]
+                track = target >> 1
+                if visited >> track & 1:
+                    continue
+
+                leg = edge_legs[edge]
+                target_required = required
+                if leg != direct:
+                    shift = 2 * leg_points[leg]
+                    current = (required >> shift) & 3
+                    if current and current != leg_values[leg]:
+                        continue
+                    target_required = required | (leg_values[leg] << shift)
+
+                if track == end:
+                    routes.append(self.path_to_route(path + [(track, edge)]))
+                else:
+                    search(target, target_required, visited | 1 << track, path + [(track, edge)])
+
+        for node in (2 * start, 2 * start + 1):
+            search(node, 0, 1 << start, [(start, -1)])
+
+        return sorted(routes, key=lambda route: len(route.tracks))
+
+    def path_to_route(self, path: list[tuple[int, int]]) -> Route:
+        """Route for a list of (track, edge taken onto it)."""
+        point_states = []
+        for _, edge in path:
+            if edge >= 0 and self.edge_legs[edge] != self.direct:
+                leg = self.edge_legs[edge]
+                point_state = (self.leg_points[leg], self.leg_values[leg] - 1)
+                if point_state not in point_states:
+                    point_states.append(point_state)
+        return Route(tuple(track for track, _ in path), tuple(point_states))
+
+    def get_hash(self) -> bytes:
+        """Digest of the compiled graph. Changes whenever a track, point or connection does."""
+        digest = hashlib.sha256()
+        for values in (self.offsets, self.targets, self.edge_legs, self.leg_points, self.leg_values):
+            digest.update(values.tobytes())
+            digest.update(b"|")
+        return digest.digest()
+
+    def build_route(self, step: tuple[int, int], parents: dict) -> Route:
+        """Walk back from the last (node, states needed) of a search to the start."""
+        tracks = []
+        point_states = []
+        while step is not None:
+            tracks.append(step[0] >> 1)
+            step, edge = parents[step]
+            if edge >= 0 and self.edge_legs[edge] != self.direct:
+                leg = self.edge_legs[edge]
+                point_state = (self.leg_points[leg], self.leg_values[leg] - 1)
+                if point_state not in point_states:  # a crossover can be passed through twice
+                    point_states.append(point_state)
+
+        return Route(tuple(reversed(tracks)), tuple(reversed(point_states)))
+
+
+class RouteTable:
+    """Every route between each pair of terminal tracks, looked up in constant time.
+
+    The table is stored on disk as:
+        magic, SHA-256 of the graph and terminals, route count (uint32)
+    followed by a record per route of:
+        start, end, track count, point count (uint16 each), the tracks (uint16 each), (point, state) pairs (uint16 each)
+    The lists are in the machine's byte order, as for the graph's arrays. The cache is only read on the machine which
+    wrote it.
+    """
+
+    magic = b"PCROUTE2"
+    header = struct.Struct("<8s32sI")
+    record = struct.Struct("<HHHH")
+
+    def __init__(self, graph: TrackGraph, terminals: Sequence[int], cache_path: Optional[Path] = None):
+        """Loads the table from the cache if it was built for the same layout, otherwise builds and caches it.
+
+        Args:
+            graph (TrackGraph): Compiled layout.
+            terminals (Sequence[int]): Indices of the tracks routes can start and end on.
+            cache_path (Optional[Path], optional): Cache file. Defaults to None, for no cache.
+        """
+        self.terminals = tuple(terminals)
+        self.routes: dict[tuple[int, int], tuple[Route, ...]] = {}
+
+        digest = hashlib.sha256(graph.get_hash() + array("H", self.terminals).tobytes()).digest()
+
+        if cache_path is None or not self.load(cache_path, digest):
+            for start in self.terminals:
+                for end in self.terminals:
+                    if start != end:
+                        self.routes[(start, end)] = tuple(graph.find_all_routes(start, end))
+            if cache_path is not None:
+                self.save(cache_path, digest)
+
+    def get_routes(self, start: int, end: int) -> tuple[Route, ...]:
+        """Routes from one terminal to another, shortest first. Empty if there are none."""
+        return self.routes.get((start, end), ())
+
+    def save(self, path: Path, digest: bytes):
+        routes = [route for pair_routes in self.routes.values() for route in pair_routes]
+        data = bytearray(self.header.pack(self.magic, digest, len(routes)))
+        for route in routes:
+            data += self.record.pack(route.tracks[0], route.tracks[-1], len(route.tracks), len(route.point_states))
+            data += array("H", route.tracks).tobytes()
+            data += array("H", [value for point_state in route.point_states for value in point_state]).tobytes()
+
+        try:
+            path.write_bytes(data)
+        except OSError as e:
+            print("Unable to cache routes: " + str(e))
+
+    def load(self, path: Path, digest: bytes) -> bool:
+        """Load the routes if the cache was built for digest.
+
+        Returns:
+            bool: False if there is no usable cache.
+        """
+        try:
+            data = path.read_bytes()
+            magic, cached_digest, count = self.header.unpack_from(data)
+            if magic != self.magic or cached_digest != digest:
+                return False
+
+            routes: dict[tuple[int, int], list[Route]] = {
+                (start, end): [] for start in self.terminals for end in self.terminals if start != end
+            }
+            offset = self.header.size
+            item_size = array("H").itemsize
+            for _ in range(count):
+                start, end, track_count, point_count = self.record.unpack_from(data, offset)
+                offset += self.record.size
+                size = (track_count + 2 * point_count) * item_size
+                if offset + size > len(data):
+                    return False  # cut short
+                values = array("H", data[offset : offset + size])
+                offset += size
+                point_values = values[track_count:]
+                point_states = tuple(zip(point_values[::2], point_values[1::2]))
+                routes[(start, end)].append(Route(tuple(values[:track_count]), point_states))
+        except (OSError, struct.error, KeyError):
+            return False
+
+        self.routes = {pair: tuple(pair_routes) for pair, pair_routes in routes.items()}
+        return True
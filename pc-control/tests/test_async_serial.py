@@ -0,0 +1,113 @@
+"""The asyncio controller against the Arduino emulator. POSIX only.
+
+    python -m unittest tests.test_async_serial
+"""
+
+import asyncio
+import os
+import unittest
+
+import serial
+
+from pc_control.protocol import IdMessage, PointSetMessage, SyncMessage
+
+if os.name == "posix":
+    from pc_control.async_serial import ArduinoController, AsyncSerialTransport
+    from pc_control.emulator import ArduinoEmulator, point_pos_1
+
+
+@unittest.skipUnless(os.name == "posix", "the emulator needs a pty")
+class TestArduinoController(unittest.TestCase):
+    def setUp(self):
+        self.emulator = ArduinoEmulator(servo_delay=0, heartbeat_interval=None)
+        self.addCleanup(self.emulator.close)
+
+    def run_with_controller(self, scenario):
+        async def run():
+            controller = ArduinoController(AsyncSerialTransport(self.emulator.port, 9600))
+            try:
+                return await scenario(controller)
+            finally:
+                controller.close()
+
+        return asyncio.run(run())
+
+    def test_throw_then_sync(self):
+        async def scenario(controller: ArduinoController):
+            return await controller.throw(5), await controller.sync()
+
+        acknowledgement, sync = self.run_with_controller(scenario)
+
+        self.assertIsInstance(acknowledgement, PointSetMessage)
+        self.assertEqual(acknowledgement.servo_index, 5)
+        self.assertIsInstance(sync, SyncMessage)
+        self.assertEqual(sync.states[4], 1)  # servo 5 is the fifth point
+        self.assertEqual(sum(sync.states), 1)
+
+    def test_heartbeat(self):
+        heartbeat = self.run_with_controller(lambda controller: controller.heartbeat())
+
+        self.assertEqual(heartbeat, IdMessage("18/01/25", "2.3"))
+
+    def test_messages_are_decoded(self):
+        async def scenario(controller: ArduinoController):
+            received = []
+
+            async def collect():
+                async for message in controller.messages():
+                    received.append(message)
+                    if isinstance(message, SyncMessage):
+                        return
+
+            collector = asyncio.create_task(collect())
+            await asyncio.sleep(0)  # subscribe before anything is sent
+            await controller.throw(2)
+            await asyncio.wait_for(collector, 2.0)
+            return received
+
+        received = self.run_with_controller(scenario)
+
+        self.assertIn(PointSetMessage(2, point_pos_1[2]), received)
+        self.assertIsInstance(received[-1], SyncMessage)
+        self.assertNotIn(None, received)
+
+
+@unittest.skipUnless(os.name == "posix", "needs a pty")
+class TestPortLost(unittest.TestCase):
+    def test_closed_pty_is_reported(self):
+        """Closing the other end of the pty is what the port sees when the Arduino is unplugged."""
+        master, slave = os.openpty()
+        port = os.ttyname(slave)
+
+        async def scenario():
+            controller = ArduinoController(AsyncSerialTransport(port, 9600))
+            transport = controller.transport
+
+            async def collect():
+                async for _ in controller.messages():
+                    pass
+
+            collector = asyncio.create_task(collect())
+            throw = asyncio.create_task(controller.throw(5))
+            await asyncio.sleep(0.05)
+            os.close(master)
+
+            for task in (collector, throw):
+                with self.assertRaises(OSError) as raised:
+                    await asyncio.wait_for(task, 2.0)
+                self.assertNotIsInstance(raised.exception, TimeoutError)  # a subclass of OSError
+
+            self.assertFalse(transport.serial.is_open)
+            self.assertFalse(asyncio.get_running_loop().remove_reader(transport.fd))  # already removed
+            with self.assertRaises(serial.SerialException):
+                await controller.sync()
+            controller.close()  # closing again does nothing
+
+        try:
+            asyncio.run(asyncio.wait_for(scenario(), 5.0))
+        finally:
+            os.close(slave)
+
+
+if __name__ == "__main__":
+    unittest.main()
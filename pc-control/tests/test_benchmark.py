@@ -0,0 +1,232 @@
+"""Headless rendering benchmarks for the layout.
+
+Runs pygame with the SDL dummy video driver so it works without a display. Each scenario is timed per frame and the
+results written to benchmark_results.json. The test fails if the median frame time of any scenario regresses past
+the stored baseline by more than the tolerance.
+
+The timings depend on the machine and what else it is doing, so they are skipped in the normal test run. Set
+BENCHMARK to run them:
+    BENCHMARK=1 python -m unittest tests.test_benchmark
+
+Store the current results as the new baseline, e.g. after an intended change or on a new machine:
+    python -m tests.test_benchmark --update-baseline
+
+Set BENCHMARK_REPLAY to a serial log (see pc_control/recording.py) to also time decoding and drawing real traffic.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+import unittest
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.layout import Layout  # noqa: E402
+from pc_control.main import process_lines  # noqa: E402
+from pc_control.recording import RECEIVED, read_log  # noqa: E402
+from pc_control.serial_comms import DummySerial, SerialLine  # noqa: E402
+
+results_path = Path(__file__).parent / "benchmark_results.json"
+baseline_path = Path(__file__).parent / "benchmark_baseline.json"
+
+# allowed slow down of the median frame time before the test fails
+tolerance = float(os.environ.get("BENCHMARK_TOLERANCE", "2.0"))
+
+frames = 500
+scale = 2.0  # a 1280x800 display
+layout_pos = (5, 50)
+
+# A sync and the acknowledgements for a point being thrown
+serial_traffic = [
+    SerialLine(text, 0.0, 0.0)
+    for text in [
+        "<Serial Recieved>",
+        "p5",
+        "<Parsing Input String>",
+        "<Setting point in Arduino, Point: 5 Val: 358>",
+        "S000001000000000",
+        "<ID: 18/01/25 v2.3>",
+        "S101100110010011",
+    ]
+]
+
+
+def time_frames(frame, count: int = frames) -> dict:
+    """Call frame count times and summarise the time per call in microseconds."""
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        frame(i)
+        samples.append((time.perf_counter() - start) * 1e6)
+
+    samples.sort()
+    return {
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p99_us": round(samples[int(len(samples) * 0.99)], 1),
+    }
+
+
+def make_layout() -> Layout:
+    return Layout(DummySerial(), scale)
+
+
+def bench_idle() -> dict:
+    """Nothing moving and the mouse away from the layout."""
+    layout = make_layout()
+    layout.draw()
+    return time_frames(lambda i: layout.draw())
+
+
+def make_animating_layout() -> Layout:
+    layout = make_layout()
+    for point in layout.points:
+        point.throw_time = 1e9  # never arrive
+    return layout
+
+
+def set_moving(layout: Layout, i: int):
+    """Every 50 frames send every point away from the state it is in or moving to, as a sync would."""
+    if i % 50 == 0:
+        layout.update_points([0 if state else 1 for state in layout.get_point_states()])
+
+
+def bench_animating() -> dict:
+    """Every point moving for the whole run."""
+    layout = make_animating_layout()
+
+    def frame(i):
+        set_moving(layout, i)
+        layout.draw()
+
+    return time_frames(frame)
+
+
+def bench_mouse_sweep() -> dict:
+    """Mouse swept across the whole layout, passing over every point, signal and track."""
+    layout = make_layout()
+    width, height = layout.get_size()
+    positions = [(x, y) for y in range(0, height, 20) for x in range(0, width, 20)]
+
+    def frame(i):
+        layout.handle_mouse(positions[i % len(positions)], False)
+        layout.draw()
+
+    return time_frames(frame, len(positions))
+
+
+def bench_blit() -> dict:
+    """Blitting the drawn layout to the screen."""
+    layout = make_layout()
+    layout.draw()
+    screen = pygame.Surface((1280, 800))
+    return time_frames(lambda i: screen.blit(layout, layout_pos))
+
+
+def bench_process_lines() -> dict:
+    """Decoding a burst of serial traffic."""
+    layout = make_layout()
+    monitor_buffer = [""] * 5
+    return time_frames(lambda i: process_lines(serial_traffic, layout, monitor_buffer))
+
+
+def bench_route_search() -> dict:
+    """Finding the route between every pair of tracks in turn."""
+    layout = make_layout()
+    count = len(layout.tracks)
+    pairs = [(start, end) for start in range(count) for end in range(count)]
+    return time_frames(lambda i: layout.graph.find_route(*pairs[i % len(pairs)]), len(pairs))
+
+
+def bench_replay() -> dict:
+    """Each line of a recorded log through process_lines and a layout draw, as fast as possible."""
+    layout = make_layout()
+    monitor_buffer = [""] * 5
+    lines = [
+        SerialLine(record.text, record.timestamp, record.wall_time)
+        for record in read_log(os.environ["BENCHMARK_REPLAY"])
+        if record.kind == RECEIVED
+    ]
+
+    def frame(i):
+        process_lines(lines[i : i + 1], layout, monitor_buffer)
+        layout.draw()
+
+    return time_frames(frame, len(lines))
+
+
+scenarios = {
+    "idle": bench_idle,
+    "animating": bench_animating,
+    "mouse_sweep": bench_mouse_sweep,
+    "blit": bench_blit,
+    "process_lines": bench_process_lines,
+    "route_search": bench_route_search,
+}
+
+if os.environ.get("BENCHMARK_REPLAY"):
+    scenarios["replay"] = bench_replay
+
+
+def run_benchmarks() -> dict:
+    pygame.init()
+    results = {name: scenario() for name, scenario in scenarios.items()}
+    results_path.write_text(json.dumps(results, indent=4))
+    return results
+
+
+class TestScenarios(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+
+    def test_every_point_animates(self):
+        layout = make_animating_layout()
+        for i in range(0, 150, 50):
+            set_moving(layout, i)
+            with self.subTest(frame=i):
+                self.assertEqual([point.name for point in layout.points if not point.state.startswith("moving")], [])
+
+
+@unittest.skipUnless(os.environ.get("BENCHMARK"), "Set BENCHMARK=1 to run the benchmarks")
+class TestBenchmark(unittest.TestCase):
+    def test_no_regression(self):
+        results = run_benchmarks()
+
+        if not baseline_path.exists():
+            self.skipTest("No baseline. Create one with: python -m tests.test_benchmark --update-baseline")
+
+        baseline = json.loads(baseline_path.read_text())
+
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            with self.subTest(scenario=name):
+                self.assertLessEqual(
+                    result["p50_us"],
+                    baseline[name]["p50_us"] * tolerance,
+                    f"{name} median frame time regressed: {result['p50_us']:.1f} us "
+                    f"against a baseline of {baseline[name]['p50_us']:.1f} us",
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Layout rendering benchmarks")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+    for name, result in results.items():
+        print(
+            f"{name:>14}: mean {result['mean_us']:8.1f} us  p50 {result['p50_us']:8.1f} us  "
+            f"p99 {result['p99_us']:8.1f} us"
+        )
+
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=4))
+        print(f"Baseline written to {baseline_path}")
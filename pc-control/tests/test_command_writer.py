@@ -0,0 +1,167 @@
+"""Batching, cancelling and queueing of outbound commands.
+
+    python -m unittest tests.test_command_writer
+"""
+
+import os
+import serial
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from pc_control.main import request_sync  # noqa: E402
+from pc_control.serial_comms import CommandQueueFull, CommandWriter  # noqa: E402
+
+
+class StubPort:
+    """Keeps every write. Writes block while blocked is clear, like a port which has fallen behind, and the next
+    fail_writes writes raise, like a port which has gone."""
+
+    def __init__(self):
+        self.writes: list[bytes] = []
+        self.blocked = threading.Event()
+        self.blocked.set()
+        self.writing = threading.Event()
+        self.fail_writes = 0
+
+    def write(self, data: bytes) -> int:
+        self.writing.set()
+        self.blocked.wait()
+        if self.fail_writes:
+            self.fail_writes -= 1
+            raise serial.SerialException("port gone")
+        self.writes.append(data)
+        return len(data)
+
+    def wait_for_writes(self, count: int, timeout: float = 2.0):
+        deadline = time.monotonic() + timeout
+        while len(self.writes) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+
+class TestCommandWriter(unittest.TestCase):
+    def setUp(self):
+        self.port = StubPort()
+
+    def test_tick_is_one_write(self):
+        writer = CommandWriter(self.port)
+        writer.write(b"p1\n")
+        writer.write(b"p2\nl\n")
+        writer.flush()
+
+        self.port.wait_for_writes(1)
+        self.assertEqual(self.port.writes, [b"p1\np2\nl\n"])
+
+    def test_toggles_cancel(self):
+        writer = CommandWriter(self.port)
+        writer.write(b"p5\n")
+        writer.write(b"p5\n")
+        writer.flush()
+
+        self.assertEqual(writer.pending, [])
+        self.assertTrue(writer.batches.empty())
+
+    def test_three_toggles_leave_one(self):
+        writer = CommandWriter(self.port)
+        for _ in range(3):
+            writer.write(b"p5\n")
+
+        self.assertEqual(writer.pending, ["p5"])
+
+    def test_repeated_requests_are_sent_once(self):
+        writer = CommandWriter(self.port)
+        writer.write(b"r\nc\n")
+        writer.write(b"r\nc\n")
+
+        self.assertEqual(writer.pending, ["r", "c"])
+
+    def test_commands_are_kept_when_the_port_is_behind(self):
+        """With the writer stuck in a write and the batch queue full, flush keeps the commands for the next tick."""
+        self.port.blocked.clear()
+        writer = CommandWriter(self.port, max_batches=1)
+
+        writer.write(b"p1\n")
+        writer.flush()
+        self.assertTrue(self.port.writing.wait(1.0))  # the writer thread is stuck writing p1
+        writer.write(b"p2\n")
+        writer.flush()  # queued
+
+        writer.write(b"r\n")
+        writer.flush()  # queue full, kept
+        writer.write(b"r\nc\n")
+        writer.flush()  # merged with the last tick, r only once
+        self.assertEqual(writer.pending, ["r", "c"])
+
+        self.port.blocked.set()
+        self.port.wait_for_writes(2)
+        writer.flush()
+        self.port.wait_for_writes(3)
+
+        self.assertEqual(self.port.writes, [b"p1\n", b"p2\n", b"r\nc\n"])
+
+    def test_sent_is_reported_after_the_write(self):
+        sent = threading.Event()
+        reported = []
+
+        def on_sent(batch, timestamp):
+            reported.append((batch, list(self.port.writes), timestamp))
+            sent.set()
+
+        writer = CommandWriter(self.port)
+        writer.on_sent = on_sent
+        start = time.monotonic()
+        writer.write(b"p5\n")
+        writer.flush()
+
+        self.assertTrue(sent.wait(2.0))
+        batch, written, timestamp = reported[0]
+        self.assertEqual(batch, b"p5\n")
+        self.assertEqual(written, [b"p5\n"])  # already written
+        self.assertGreaterEqual(timestamp, start)
+
+    def test_failed_write_is_not_reported(self):
+        self.port.fail_writes = 1
+        sent = threading.Event()
+        reported = []
+
+        def on_sent(batch, timestamp):
+            reported.append(batch)
+            sent.set()
+
+        writer = CommandWriter(self.port, max_batches=2)
+        writer.on_sent = on_sent
+        with redirect_stdout(StringIO()):
+            self.port.blocked.clear()
+            writer.write(b"p5\n")
+            writer.flush()
+            writer.write(b"p6\n")
+            writer.flush()
+            self.port.blocked.set()
+            self.assertTrue(sent.wait(2.0))
+
+        self.assertEqual(reported, [b"p6\n"])
+
+    def test_queue_full_raises_without_queueing(self):
+        writer = CommandWriter(self.port, max_pending=3)
+        writer.write(b"p1\np2\n")
+
+        with self.assertRaises(CommandQueueFull):
+            writer.write(b"p3\np4\n")
+        self.assertEqual(writer.pending, ["p1", "p2"])
+
+    def test_sync_request_with_a_full_queue(self):
+        writer = CommandWriter(self.port, max_pending=1)
+        writer.write(b"p1\n")
+
+        request_sync(writer)  # doesn't raise
+
+        self.assertEqual(writer.pending, ["p1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
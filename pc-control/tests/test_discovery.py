@@ -0,0 +1,154 @@
+"""Finding the Arduino emulator among ports which don't answer. POSIX only.
+
+    python -m unittest tests.test_discovery
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pc_control import discovery
+from pc_control.discovery import DiscoveredPort, discover_port, find_arduino, read_cached_port, write_cached_port
+from pc_control.protocol import IdMessage, decode_line
+from pc_control.serial_comms import SerialConnection
+
+if os.name == "posix":
+    from pc_control.emulator import ArduinoEmulator
+
+
+@unittest.skipUnless(os.name == "posix", "the emulator needs a pty")
+class TestDiscovery(unittest.TestCase):
+    def silent_port(self) -> str:
+        """A pty which never answers."""
+        master, slave = os.openpty()
+        self.addCleanup(os.close, master)
+        self.addCleanup(os.close, slave)
+        return os.ttyname(slave)
+
+    def test_finds_the_arduino(self):
+        emulator = ArduinoEmulator(servo_delay=0, heartbeat_interval=None)
+        self.addCleanup(emulator.close)
+        ports = [self.silent_port(), emulator.port, self.silent_port(), "/dev/does-not-exist"]
+
+        discovered = discover_port(9600, timeout=2.0, ports=ports)
+
+        self.assertEqual(discovered, DiscoveredPort(emulator.port, "2.3", "18/01/25"))
+
+    def test_probes_run_at_the_same_time(self):
+        ports = [self.silent_port() for _ in range(5)]
+
+        start = time.monotonic()
+        discovered = discover_port(9600, timeout=0.5, ports=ports)
+
+        self.assertIsNone(discovered)
+        self.assertLess(time.monotonic() - start, 1.5)
+
+    def test_stop_ends_discovery(self):
+        ports = [self.silent_port() for _ in range(3)]
+        stop = threading.Event()
+        threading.Timer(0.2, stop.set).start()
+
+        start = time.monotonic()
+        discovered = discover_port(9600, timeout=20.0, ports=ports, stop=stop)
+
+        self.assertIsNone(discovered)
+        self.assertLess(time.monotonic() - start, 2.0)
+
+
+@unittest.skipUnless(os.name == "posix", "the emulator needs a pty")
+class TestFindArduino(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        patcher = mock.patch.object(discovery, "cache_path", Path(directory.name) / "port_cache.json")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.emulator = ArduinoEmulator(servo_delay=0, heartbeat_interval=None)
+        self.addCleanup(self.emulator.close)
+
+        master, slave = os.openpty()
+        self.addCleanup(os.close, master)
+        self.addCleanup(os.close, slave)
+        self.silent = os.ttyname(slave)
+
+        patcher = mock.patch.object(discovery, "candidate_ports", return_value=[self.silent, self.emulator.port])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_port_is_used_if_it_answers(self):
+        write_cached_port(DiscoveredPort(self.emulator.port, "2.3", "18/01/25"))
+
+        with mock.patch.object(discovery, "discover_port") as discover:
+            self.assertEqual(find_arduino(9600, 2.0), self.emulator.port)
+        discover.assert_not_called()
+
+    def test_cached_port_taken_by_another_device(self):
+        write_cached_port(DiscoveredPort(self.silent, "2.3", "18/01/25"))
+
+        self.assertEqual(find_arduino(9600, 2.0, cached_timeout=0.5), self.emulator.port)
+        self.assertEqual(read_cached_port().port, self.emulator.port)
+
+    def test_stop_ends_the_cached_probe(self):
+        write_cached_port(DiscoveredPort(self.silent, "2.3", "18/01/25"))
+        stop = threading.Event()
+        threading.Timer(0.2, stop.set).start()
+
+        start = time.monotonic()
+        self.assertIsNone(find_arduino(9600, 20.0, stop=stop, cached_timeout=20.0))
+        self.assertLess(time.monotonic() - start, 2.0)
+
+
+@unittest.skipUnless(os.name == "posix", "the emulator needs a pty")
+class TestIdentify(unittest.TestCase):
+    def test_port_without_a_heartbeat_is_not_used(self):
+        emulator = ArduinoEmulator(servo_delay=0, heartbeat_interval=None)
+        self.addCleanup(emulator.close)
+        master, slave = os.openpty()
+        self.addCleanup(os.close, master)
+        self.addCleanup(os.close, slave)
+
+        calls = []
+        connected = threading.Event()
+
+        def find_port(port_worked: bool, stop: threading.Event) -> str:
+            calls.append(port_worked)
+            return os.ttyname(slave) if len(calls) == 1 else emulator.port
+
+        connection = SerialConnection(
+            "auto",
+            9600,
+            min_retry=0.01,
+            settle_time=0.05,
+            find_port=find_port,
+            identify=lambda text: isinstance(decode_line(text), IdMessage),
+            identify_timeout=0.3,
+        )
+        connection.on_change = connected.set
+        connection.start()
+        self.addCleanup(connection.close)
+
+        self.assertTrue(connected.wait(5.0))
+        self.assertEqual(connection.port, emulator.port)
+        self.assertEqual(calls[:2], [True, False])
+
+    def test_close_during_discovery(self):
+        def find_port(port_worked: bool, stop: threading.Event):
+            stop.wait(20.0)
+            return None
+
+        connection = SerialConnection("auto", 9600, find_port=find_port)
+        connection.start()
+        time.sleep(0.1)
+
+        start = time.monotonic()
+        connection.close()
+        self.assertLess(time.monotonic() - start, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
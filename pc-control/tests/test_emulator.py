@@ -0,0 +1,82 @@
+"""Round trips through ZeroWaitSerial to the Arduino emulator. POSIX only.
+
+    python -m unittest tests.test_emulator
+"""
+
+import os
+import time
+import unittest
+
+from pc_control.protocol import IdMessage, PointSetMessage, SyncMessage, decode_line
+from pc_control.serial_comms import SerialLine
+
+if os.name == "posix":
+    from pc_control.emulator import ArduinoEmulator
+    from pc_control.serial_comms import ZeroWaitSerial
+
+
+def wait_for(ser, is_wanted, timeout: float = 2.0) -> list[SerialLine]:
+    """Read lines until is_wanted returns True for one of them. Returns all the lines read."""
+    lines = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        lines += ser.read_available_lines()
+        if any(is_wanted(line.text) for line in lines):
+            return lines
+        time.sleep(0.01)
+    raise TimeoutError(f"Gave up waiting. Received {[line.text for line in lines]}")
+
+
+@unittest.skipUnless(os.name == "posix", "the emulator needs a pty")
+class TestEmulator(unittest.TestCase):
+    def start(self, **kwargs):
+        emulator = ArduinoEmulator(servo_delay=0, heartbeat_interval=None, seed=1, **kwargs)
+        self.addCleanup(emulator.close)
+        ser = ZeroWaitSerial(emulator.port, 9600)
+        self.addCleanup(ser.close)
+        return emulator, ser
+
+    def test_throw_point(self):
+        emulator, ser = self.start()
+        ser.write(b"p5\n")
+
+        messages = [decode_line(line.text) for line in wait_for(ser, lambda text: text.startswith("S"))]
+
+        self.assertIn(PointSetMessage(5, 358), messages)
+        self.assertEqual(messages[-1], SyncMessage((0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0)))
+
+    def test_point_pair_sets_both(self):
+        emulator, ser = self.start()
+        ser.write(b"p8\n")
+
+        wait_for(ser, lambda text: text.startswith("S"))
+
+        self.assertEqual(emulator.point_status[8:10], [1, 1])
+
+    def test_heartbeat(self):
+        emulator, ser = self.start()
+        ser.write(b"c\n")
+
+        messages = [decode_line(line.text) for line in wait_for(ser, lambda text: text.startswith("<ID"))]
+
+        self.assertEqual(messages[-1], IdMessage("18/01/25", "2.3"))
+
+    def test_corrupt_lines_are_quarantined(self):
+        emulator, ser = self.start(corrupt_rate=0.5)
+        for _ in range(10):
+            ser.write(b"r\n")
+
+        # each sync request is answered with 4 lines, kept or quarantined
+        lines = []
+        deadline = time.monotonic() + 5.0
+        while len(lines) + ser.framer.decode_errors < 10 * 4 and time.monotonic() < deadline:
+            lines += ser.read_available_lines()
+            time.sleep(0.01)
+
+        self.assertEqual(emulator.commands_handled, 10)
+        self.assertGreater(ser.framer.decode_errors, 0)
+        self.assertEqual(len(lines) + ser.framer.decode_errors, 10 * 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Finding the item under the mouse.
+
+    python -m unittest tests.test_hit_test
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.hit_test import HitGrid, distance_to_segment  # noqa: E402
+
+
+class TestDistanceToSegment(unittest.TestCase):
+    def test_distances(self):
+        for pos, distance in [
+            ((5, 3), 3.0),  # beside the middle
+            ((-3, 4), 5.0),  # past the start
+            ((14, 0), 4.0),  # past the end
+            ((10, 0), 0.0),  # on the end
+        ]:
+            with self.subTest(pos=pos):
+                self.assertAlmostEqual(distance_to_segment(pos, (0, 0), (10, 0)), distance)
+
+    def test_zero_length_segment(self):
+        self.assertAlmostEqual(distance_to_segment((3, 4), (0, 0), (0, 0)), 5.0)
+
+
+class TestHitGrid(unittest.TestCase):
+    def setUp(self):
+        self.grid = HitGrid(200, 100, cell_size=20)
+
+    def test_point_beats_the_track_running_into_it(self):
+        self.grid.add_segment("track", (0, 50), (100, 50), 3, priority=1)
+        self.grid.add_rect("point", pygame.Rect(40, 40, 20, 20), priority=0)
+
+        self.assertEqual(self.grid.find((50, 50)), "point")  # on the track's centre line
+        self.assertEqual(self.grid.find((30, 50)), "track")
+
+    def test_priority_beats_distance(self):
+        self.grid.add_segment("near", (0, 50), (100, 50), 5, priority=1)
+        self.grid.add_segment("far", (0, 54), (100, 54), 5, priority=0)
+
+        self.assertEqual(self.grid.find((50, 50)), "far")
+
+    def test_nearest_segment_wins(self):
+        self.grid.add_segment("upper", (0, 50), (100, 50), 5)
+        self.grid.add_segment("lower", (0, 56), (100, 56), 5)
+
+        self.assertEqual(self.grid.find((50, 52)), "upper")
+        self.assertEqual(self.grid.find((50, 54)), "lower")
+        self.assertEqual(self.grid.find((50, 59)), "lower")
+
+    def test_diagonal_is_hit_along_the_line_only(self):
+        self.grid.add_segment("diagonal", (0, 0), (80, 80), 3)
+
+        self.assertEqual(self.grid.find((41, 39)), "diagonal")
+        self.assertIsNone(self.grid.find((70, 10)))  # inside the bounding box, far from the line
+
+    def test_rect_on_cell_boundaries(self):
+        self.grid.add_rect("point", pygame.Rect(15, 15, 10, 10))  # covers the corner of 4 cells
+
+        for pos in [(15, 15), (19.9, 19.9), (20, 20), (24.9, 15), (15, 24.9), (24.9, 24.9)]:
+            with self.subTest(pos=pos):
+                self.assertEqual(self.grid.find(pos), "point")
+        for pos in [(25, 20), (20, 25), (14.9, 20)]:  # right and bottom edges are outside, as for collidepoint
+            with self.subTest(pos=pos):
+                self.assertIsNone(self.grid.find(pos))
+
+    def test_segment_on_cell_boundaries(self):
+        self.grid.add_segment("track", (30, 40), (60, 40), 3)  # along a row boundary, across a column boundary
+
+        for pos in [(40, 40), (40, 37), (40, 43), (39.9, 42.9), (60, 40), (63, 40)]:
+            with self.subTest(pos=pos):
+                self.assertEqual(self.grid.find(pos), "track")
+        self.assertIsNone(self.grid.find((40, 43.1)))
+
+    def test_fractional_radius_reaches_the_next_cell(self):
+        self.grid.add_segment("track", (0, 22), (100, 22), 2.5)
+
+        self.assertEqual(self.grid.find((50, 19.6)), "track")  # in the row above the segment's
+        self.assertEqual(self.grid.find((50, 24.4)), "track")
+
+    def test_outside_the_grid(self):
+        self.grid.add_rect("point", pygame.Rect(0, 0, 20, 20))
+
+        for pos in [(-1, 5), (5, -1), (1000, 5), (5, 1000)]:
+            with self.subTest(pos=pos):
+                self.assertIsNone(self.grid.find(pos))
+
+
+if __name__ == "__main__":
+    unittest.main()
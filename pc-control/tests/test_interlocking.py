@@ -0,0 +1,155 @@
+"""Locking routes and rejecting the clicks which would conflict with them.
+
+    python -m unittest tests.test_interlocking
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.interlocking import encode_route  # noqa: E402
+from pc_control.layout import Layout  # noqa: E402
+from pc_control.points import CrossOver, Point, StraightPoint, Triple  # noqa: E402
+from pc_control.track_graph import Route  # noqa: E402
+from tests.test_route_setting import RecordingSerial  # noqa: E402
+
+
+def leg_positions(layout: Layout, point: Point, state: int, route: Route) -> list:
+    """Where a cross can be drawn on the route's leg through the point."""
+    positions = []
+    for leg_state, track_a, track_b in point.get_legs():
+        if leg_state != state or not {layout.tracks.index(track_a), layout.tracks.index(track_b)} <= set(route.tracks):
+            continue
+        for track in (track_a, track_b):
+            if isinstance(point, StraightPoint):
+                ends = {point.enter: point.line_start, point.exit: point.ahead_coord}
+                position = ends.get(track, point.diverge_coord)
+            elif isinstance(point, CrossOver):
+                position = {
+                    point.top_enter: point.top_enter_pos,
+                    point.top_exit: point.top_exit_pos,
+                    point.bottom_enter: point.bottom_enter_pos,
+                    point.bottom_exit: point.bottom_exit_pos,
+                }[track]
+            else:
+                position = {point.road_1_track: point.road_1, point.road_2_track: point.road_2}.get(
+                    track, point.road_3 if track == point.road_3_track else None
+                )
+            if position is not None:
+                positions.append(position)
+    return positions
+
+
+class TestInterlocking(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.ser = RecordingSerial()
+        self.layout = Layout(self.ser)
+
+    def set_route(self, start: str, end: str) -> Route:
+        return self.layout.set_route(self.layout.destinations[start], self.layout.destinations[end])
+
+    def test_encoding(self):
+        masks = encode_route(Route((0, 3, 4), ((1, 1), (5, 2))))
+
+        self.assertEqual(masks.tracks, 0b11001)
+        self.assertEqual(masks.points, 0b11 << 2 | 0b11 << 10)
+        self.assertEqual(masks.states, 0b10 << 2 | 0b11 << 10)
+
+    def test_conflicts_match_a_direct_comparison(self):
+        """Every pair of routes in the table, checked with sets."""
+        interlocking = self.layout.interlocking
+        routes = list(interlocking.masks)
+
+        for locked in routes:
+            interlocking.locked = []
+            interlocking.lock(locked)
+            for route in routes:
+                if route == locked:
+                    continue
+                locked_states = dict(locked.point_states)
+                expected = bool(set(route.tracks) & set(locked.tracks)) or any(
+                    point in locked_states and locked_states[point] != state for point, state in route.point_states
+                )
+                with self.subTest(locked=locked.tracks, route=route.tracks):
+                    self.assertEqual(interlocking.conflicts(route), expected)
+
+    def test_locked_point_click_is_not_sent(self):
+        layout = self.layout
+        route = self.set_route("Platform 1", "Siding 1")
+        writes = len(self.ser.writes)
+        point = layout.points[route.point_states[0][0]]
+        state = point.state
+
+        layout.click_point(point)
+
+        self.assertEqual(len(self.ser.writes), writes)
+        self.assertEqual(point.state, state)
+        self.assertIs(layout.rejected[0], point)
+
+    def test_rejected_leg_is_marked(self):
+        """The cross is drawn on the route's leg through the point, even while the point is still moving."""
+        layout = self.layout
+        route = self.set_route("Platform 1", "Siding 1")
+        for point_index, state in route.point_states:
+            point = layout.points[point_index]
+            layout.click_point(point)
+            with self.subTest(point=point.name):
+                self.assertIn(point.conflict, leg_positions(layout, point, state, route))
+                if isinstance(point, StraightPoint):
+                    self.assertEqual(point.conflict, (point.ahead_coord, point.diverge_coord)[state])
+                elif isinstance(point, Triple):
+                    self.assertEqual(point.conflict, (point.road_1, point.road_2, point.road_3)[state])
+
+    def test_free_point_click_is_sent(self):
+        layout = self.layout
+        route = self.set_route("Platform 1", "Siding 1")
+        needed = {point for point, _ in route.point_states}
+        free = next(point for index, point in enumerate(layout.points) if index not in needed)
+
+        layout.click_point(free)
+
+        self.assertEqual(self.ser.writes[-1], f"p{free.servo_index}\n".encode())
+
+    def test_conflicting_route_is_not_set(self):
+        self.set_route("Platform 1", "Siding 1")
+        writes = len(self.ser.writes)
+
+        self.assertIsNone(self.set_route("Platform 2", "Siding 1"))
+        self.assertEqual(len(self.ser.writes), writes)
+
+    def test_release_by_clicking_the_entry_twice(self):
+        layout = self.layout
+        route = self.set_route("Platform 1", "Siding 1")
+        platform_1 = layout.destinations["Platform 1"]
+
+        layout.click_track(platform_1)
+        layout.click_track(platform_1)
+
+        self.assertEqual(layout.interlocking.locked, [])
+        self.assertIsNone(layout.interlocking.locking_route(route.point_states[0][0]))
+
+    def test_leg_marked_is_on_the_route(self):
+        layout = self.layout
+        for start in layout.destinations:
+            for end in layout.destinations:
+                route = layout.get_route(start, end)
+                if route is None:
+                    continue
+                layout.interlocking.locked = []
+                layout.interlocking.lock(route)
+                for point_index, state in route.point_states:
+                    point = layout.points[point_index]
+                    point.clear_marks()
+                    layout.click_point(point)
+                    with self.subTest(start=start, end=end, point=point.name):
+                        self.assertIn(layout.tracks.index(layout.rejected[1]), route.tracks)
+                        self.assertIn(point.conflict, leg_positions(layout, point, state, route))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Matching commands to their acknowledgements and counting the latencies.
+
+    python -m unittest tests.test_latency
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.latency import LatencyHistogram, LatencyTracker  # noqa: E402
+from pc_control.protocol import IdMessage, PointSetMessage, StatusMessage, SyncMessage  # noqa: E402
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_a_bucket(self):
+        histogram = LatencyHistogram()
+        for ms in range(1, 101):
+            histogram.add(ms)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.last_ms, 100)
+        for fraction, ms in ((0.5, 50), (0.99, 99)):
+            with self.subTest(fraction=fraction):
+                self.assertGreaterEqual(histogram.percentile(fraction), ms)
+                self.assertLessEqual(histogram.percentile(fraction), ms * histogram.growth)
+
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().percentile(0.5), 0.0)
+
+
+class TestLatencyTracker(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.tracker = LatencyTracker(timeout=10.0)
+
+    def test_point_acknowledged(self):
+        self.tracker.commands_sent(b"p5\n", 100.0)
+        self.tracker.message_received(PointSetMessage(5, 358), 100.05)
+
+        self.assertEqual(self.tracker.overall.count, 1)
+        self.assertAlmostEqual(self.tracker.servos[5].last_ms, 50.0)
+        self.assertEqual(list(self.tracker.pending[("p", 5)]), [])
+
+    def test_acknowledgements_match_in_order(self):
+        self.tracker.commands_sent(b"p5\nr\n", 100.0)
+        self.tracker.commands_sent(b"p5\n", 100.1)
+        self.tracker.message_received(PointSetMessage(5, 358), 100.2)
+        self.tracker.message_received(SyncMessage((0,) * 12), 100.3)
+        self.tracker.message_received(PointSetMessage(5, 325), 100.4)
+
+        self.assertEqual(self.tracker.servos[5].count, 2)
+        self.assertAlmostEqual(self.tracker.servos[5].last_ms, 300.0)  # the second p5, sent at 100.1
+        self.assertEqual(self.tracker.overall.count, 3)
+
+    def test_other_commands_are_counted_overall_only(self):
+        self.tracker.commands_sent(b"c\nl\n", 100.0)
+        self.tracker.message_received(IdMessage("18/01/25", "2.3"), 100.01)
+        self.tracker.message_received(StatusMessage("Lights Toggled"), 100.02)
+
+        self.assertEqual(self.tracker.overall.count, 2)
+        self.assertEqual(self.tracker.servos, {})
+
+    def test_unmatched_replies_are_ignored(self):
+        self.tracker.commands_sent(b"p5\n", 100.0)
+        for message in (PointSetMessage(6, 358), StatusMessage("Parsing Input String"), SyncMessage((0,) * 12), None):
+            with self.subTest(message=message):
+                self.tracker.message_received(message, 100.1)
+
+        self.assertEqual(self.tracker.overall.count, 0)
+        self.assertEqual(self.tracker.timeouts, 0)
+        self.assertEqual(list(self.tracker.pending[("p", 5)]), [100.0])  # still waiting
+
+    def test_unacknowledged_command_times_out(self):
+        self.tracker.commands_sent(b"p5\n", 100.0)
+        self.tracker.commands_sent(b"p5\n", 109.0)
+        self.tracker.message_received(PointSetMessage(5, 358), 111.0)
+
+        self.assertEqual(self.tracker.timeouts, 1)
+        self.assertEqual(self.tracker.servos[5].count, 1)
+        self.assertAlmostEqual(self.tracker.servos[5].last_ms, 2000.0)  # matched with the second p5
+
+    def test_every_command_timed_out(self):
+        self.tracker.commands_sent(b"p5\np5\n", 100.0)
+        self.tracker.message_received(PointSetMessage(5, 358), 120.0)
+
+        self.assertEqual(self.tracker.timeouts, 2)
+        self.assertEqual(self.tracker.overall.count, 0)
+
+    def test_lagging_servos(self):
+        tracker = LatencyTracker(warn_ms=250.0)
+        tracker.commands_sent(b"p1\np2\n", 100.0)
+        tracker.message_received(PointSetMessage(1, 358), 100.1)
+        tracker.message_received(PointSetMessage(2, 358), 100.5)
+
+        self.assertEqual(tracker.lagging_servos(), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
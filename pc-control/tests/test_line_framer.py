@@ -0,0 +1,81 @@
+"""Splitting the serial byte stream into lines.
+
+    python -m unittest tests.test_line_framer
+"""
+
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pc_control.serial_comms import LineFramer
+
+
+class TestLineFramer(unittest.TestCase):
+    def test_lines_in_one_feed(self):
+        framer = LineFramer()
+
+        self.assertEqual(framer.feed(b"p5\nS000\n"), ["p5", "S000"])
+        self.assertEqual(framer.buffer, b"")
+
+    def test_line_split_across_feeds(self):
+        framer = LineFramer()
+
+        self.assertEqual(framer.feed(b"<Setting point"), [])
+        self.assertEqual(framer.feed(b" in Arduino"), [])
+        self.assertEqual(framer.feed(b">\nS0"), ["<Setting point in Arduino>"])
+        self.assertEqual(framer.feed(b"1\n"), ["S01"])
+
+    def test_byte_at_a_time(self):
+        framer = LineFramer()
+        lines = []
+        for byte in b"one\ntwo\n":
+            lines += framer.feed(bytes([byte]))
+
+        self.assertEqual(lines, ["one", "two"])
+
+    def test_line_of_max_length(self):
+        framer = LineFramer(max_line_length=8)
+
+        self.assertEqual(framer.feed(b"12345678"), [])
+        self.assertEqual(framer.feed(b"\n"), ["12345678"])
+        self.assertEqual(framer.overlong_lines, 0)
+
+    def test_line_one_over_max_length(self):
+        framer = LineFramer(max_line_length=8)
+
+        self.assertEqual(framer.feed(b"123456789\nok\n"), ["ok"])
+        self.assertEqual(framer.overlong_lines, 1)
+
+    def test_overlong_line_ending_in_a_later_feed(self):
+        framer = LineFramer(max_line_length=8)
+
+        self.assertEqual(framer.feed(b"0123456789"), [])
+        self.assertEqual(framer.buffer, b"")  # memory stays bounded while discarding
+        self.assertEqual(framer.feed(b"abcdefghij"), [])
+        self.assertEqual(framer.feed(b"klm\nok\n"), ["ok"])
+        self.assertEqual(framer.overlong_lines, 1)
+
+    def test_decode_error_keeps_the_lines_around_it(self):
+        framer = LineFramer()
+
+        with redirect_stdout(StringIO()):
+            lines = framer.feed(b"before\nbad\xff\nafter\n")
+
+        self.assertEqual(lines, ["before", "after"])
+        self.assertEqual(framer.decode_errors, 1)
+        self.assertEqual(list(framer.quarantined), [b"bad\xff"])
+
+    def test_quarantine_is_capped(self):
+        framer = LineFramer(max_quarantined=3)
+
+        with redirect_stdout(StringIO()):
+            for index in range(5):
+                framer.feed(b"bad%d\xff\n" % index)
+
+        self.assertEqual(framer.decode_errors, 5)
+        self.assertEqual(list(framer.quarantined), [b"bad2\xff", b"bad3\xff", b"bad4\xff"])
+        self.assertEqual(framer.get_statistics(), {"overlong_lines": 0, "decode_errors": 5})
+
+
+if __name__ == "__main__":
+    unittest.main()
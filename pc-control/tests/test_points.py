@@ -0,0 +1,49 @@
+"""Animating the points as they move.
+
+    python -m unittest tests.test_points
+"""
+
+import os
+import time
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.layout import Layout  # noqa: E402
+from pc_control.serial_comms import DummySerial  # noqa: E402
+
+
+class TestPointAnimation(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.layout = Layout(DummySerial())
+
+    def test_instant_points_finish_on_the_next_draw(self):
+        for point in self.layout.points:
+            point.throw_time = 0
+            point.set_state(0 if point.get_target_state() else 1)
+            point.draw()
+
+            with self.subTest(point=point.name):
+                self.assertFalse(point.state.startswith("moving"))
+
+    def test_move_takes_the_throw_time(self):
+        point = self.layout.points[0]
+        point.throw_time = 0.2
+        point.set_state(1)
+
+        point.draw()
+        self.assertEqual(point.state, "moving_to_diverge")
+        self.assertLess(point.position, 1)
+
+        time.sleep(0.25)
+        point.draw()
+        self.assertEqual(point.state, "diverge")
+        self.assertEqual(point.position, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Decoding the lines sent by the Arduino command board.
+
+    python -m unittest tests.test_protocol
+"""
+
+import itertools
+import unittest
+
+from pc_control.protocol import (
+    IdMessage,
+    PointDecrementMessage,
+    PointIncrementMessage,
+    PointSetMessage,
+    StatusMessage,
+    SyncMessage,
+    UnknownMessage,
+    decode_line,
+)
+
+
+def baseline_sync_states(line: str) -> list[int]:
+    """The states process_lines produced from a sync line before the decoder table, kept as the reference."""
+    states = [int(char) for char in line[1:].strip()]
+    states[7] = int(line[7:9], 2)  # convert the sidings into a single number
+    # remove the doubles
+    states.pop(8)
+    states.pop(6)
+    states.pop(3)
+    return states
+
+
+# Lines as sent by arduino-command.ino. println ends lines with \r\n, and the framer removes the \n.
+decoded_lines = [
+    ("S000000000000000\r", SyncMessage((0,) * 12)),
+    ("S000001000000000\r", SyncMessage((0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0))),
+    ("S000000100000000\r", SyncMessage((0, 0, 0, 0, 0, 2, 0, 0, 0, 0, 0, 0))),
+    ("S000000010000000\r", SyncMessage((0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 0, 0))),
+    ("S111111111111111\r", SyncMessage((1, 1, 1, 1, 1, 3, 1, 1, 1, 1, 1, 1))),
+    ("<ID: 18/01/25 v2.3>", IdMessage("18/01/25", "2.3")),
+    ("<Setting point in Arduino, Point: 5 Val: 358>", PointSetMessage(5, 358)),
+    ("<Increment point in Arduino, Point: 12 Val: 341>", PointIncrementMessage(12, 341)),
+    ("<Decrement point in Arduino, Point: 0 Val: 325>", PointDecrementMessage(0, 325)),
+    ("<Lights Toggled>\r", StatusMessage("Lights Toggled")),
+    ("<Signals...>\r", StatusMessage("Signals...")),
+    ("<Parsing Input String>", StatusMessage("Parsing Input String")),
+    ("p5", UnknownMessage("p5")),
+    ("S00000", UnknownMessage("S00000")),  # cut short
+    ("S0000000000000001", UnknownMessage("S0000000000000001")),  # too long
+    ("S00000000000000x", UnknownMessage("S00000000000000x")),
+    ("", None),
+    ("\r", None),
+]
+
+
+class TestProtocol(unittest.TestCase):
+    def test_lines(self):
+        for line, message in decoded_lines:
+            with self.subTest(line=line):
+                self.assertEqual(decode_line(line), message)
+
+    def test_every_sync_matches_the_baseline(self):
+        mismatches = []
+        for servos in itertools.product("01", repeat=15):
+            line = "S" + "".join(servos) + "\r"
+            message = decode_line(line)
+            if not isinstance(message, SyncMessage) or list(message.states) != baseline_sync_states(line):
+                mismatches.append(line)
+
+        self.assertEqual(mismatches, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
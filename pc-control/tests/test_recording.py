@@ -0,0 +1,105 @@
+"""Recording the serial stream and replaying it.
+
+    python -m unittest tests.test_recording
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.layout import Layout  # noqa: E402
+from pc_control.main import process_lines  # noqa: E402
+from pc_control.recording import RECEIVED, SENT, SESSION, ReplaySerial, SerialRecorder, read_log  # noqa: E402
+from pc_control.serial_comms import DummySerial, SerialLine  # noqa: E402
+
+received = ["<Serial Recieved>", "p5", "<Parsing Input String>", "<Setting point in Arduino, Point: 5 Val: 358>"]
+
+
+def read_all(ser: ReplaySerial, timeout: float = 2.0) -> list[SerialLine]:
+    lines = []
+    deadline = time.monotonic() + timeout
+    while not (ser.finished.is_set() and not ser.lines_waiting()) and time.monotonic() < deadline:
+        lines += ser.read_available_lines()
+        time.sleep(0.001)
+    return lines
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "test.pcrec")
+
+    def record(self, lines: list[str], interval: float = 0.01, offset: float = 0.0):
+        """Record the lines as if they arrived interval seconds apart, after sending p5 offset seconds from now."""
+        recorder = SerialRecorder(self.path)
+        start = time.monotonic() + offset
+        recorder.record_sent(b"p5\n", start)
+        for index, text in enumerate(lines):
+            recorder.record_received(SerialLine(text, start + (index + 1) * interval, 0.0))
+        recorder.close()
+
+    def test_round_trip(self):
+        self.record(received)
+
+        records = list(read_log(self.path))
+
+        self.assertEqual([record.kind for record in records], [SESSION, SENT] + [RECEIVED] * len(received))
+        self.assertEqual(records[1].text, "p5\n")
+        self.assertEqual([record.text for record in records[2:]], received)
+
+    def test_sessions_are_appended(self):
+        self.record(received[:1])
+        self.record(received[1:2])
+
+        texts = [record.text for record in read_log(self.path) if record.kind == RECEIVED]
+
+        self.assertEqual(texts, received[:2])
+
+    def test_replay_at_recorded_speed(self):
+        self.record(received, interval=0.05)
+
+        start = time.monotonic()
+        lines = read_all(ReplaySerial(self.path, speed=1))
+
+        self.assertEqual([line.text for line in lines], received)
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_gap_between_sessions_is_not_replayed(self):
+        """Two sessions in the same boot, so the clock carries on across the gap."""
+        self.record(received[:2], interval=0.01)
+        self.record(received[2:], interval=0.01, offset=30.0)
+
+        start = time.monotonic()
+        lines = read_all(ReplaySerial(self.path, speed=1), timeout=5.0)
+
+        self.assertEqual([line.text for line in lines], received)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_replay_as_fast_as_possible_drops_nothing(self):
+        self.record(received * 100, interval=1.0)
+
+        ser = ReplaySerial(self.path, speed=0, max_queued_lines=10)
+        lines = read_all(ser)
+
+        self.assertEqual(len(lines), len(received) * 100)
+
+    def test_replay_through_layout(self):
+        self.record(["S000001000000000"])
+        pygame.init()
+        layout = Layout(DummySerial())
+
+        process_lines(read_all(ReplaySerial(self.path, speed=0)), layout, [""] * 5)
+
+        self.assertEqual(layout.points[4].state, "moving_to_diverge")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+"""Setting a route with an entry and exit click.
+
+    python -m unittest tests.test_route_setting
+"""
+
+import os
+import time
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.layout import Layout  # noqa: E402
+from pc_control.main import process_lines  # noqa: E402
+from pc_control.protocol import decode_line  # noqa: E402
+from pc_control.serial_comms import SerialLine  # noqa: E402
+
+
+class RecordingSerial:
+    """Keeps every write."""
+
+    def __init__(self):
+        self.writes: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.writes.append(data)
+        return len(data)
+
+
+class Firmware:
+    """The replies of arduino-command.ino to point toggles: an acknowledgement for each servo set, then a sync."""
+
+    point_pairs = {3: 4, 4: 3, 8: 9, 9: 8}  # servos set together, as point_pair in the sketch
+
+    def __init__(self):
+        self.status = [0] * 15
+
+    def sync(self) -> str:
+        return "S" + "".join(str(status) for status in self.status) + "\r"
+
+    def handle(self, data: bytes) -> list[list[str]]:
+        """The lines sent for each command."""
+        replies = []
+        for command in data.decode().split():
+            servo_index = int(command[1:])
+            lines = []
+            for servo in (servo_index, self.point_pairs.get(servo_index)):
+                if servo is not None:
+                    self.status[servo] = 1 - self.status[servo]
+                    lines.append(f"<Setting point in Arduino, Point: {servo} Val: 300>")
+            replies.append(lines + [self.sync()])
+        return replies
+
+
+class TestRouteSetting(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.ser = RecordingSerial()
+        self.layout = Layout(self.ser)
+
+    def destination(self, name: str):
+        return self.layout.destinations[name]
+
+    def test_route_is_set_in_one_write(self):
+        layout = self.layout
+        route = layout.set_route(self.destination("Platform 1"), self.destination("Siding 1"))
+
+        self.assertEqual(len(self.ser.writes), 1)
+        states = layout.get_point_states()
+        for point, state in route.point_states:
+            self.assertEqual(states[point], state)
+
+    def test_only_points_which_move_are_toggled(self):
+        layout = self.layout
+        before = layout.get_point_states()
+        route = layout.set_route(self.destination("Platform 2"), self.destination("Fiddle loop"))
+
+        commands = self.ser.writes[0].decode().split()
+        moved = [point for point, state in route.point_states if before[point] != state]
+        servos = set()
+        for point in moved:
+            servos.update(layout.points[point].get_commands(before[point]).split())
+        self.assertEqual(sorted(commands), sorted(servos))
+
+    def test_setting_a_route_again_sends_nothing(self):
+        start, end = self.destination("Platform 3"), self.destination("Siding 2")
+        self.layout.set_route(start, end)
+        self.layout.set_route(start, end)
+
+        self.assertEqual(len(self.ser.writes), 1)
+
+    def test_fewest_moves_are_chosen(self):
+        layout = self.layout
+        start, end = self.destination("Platform 1"), self.destination("Fiddle loop")
+        routes = layout.routes.get_routes(layout.tracks.index(start), layout.tracks.index(end))
+        longer = routes[-1]
+        required = dict(longer.point_states)
+        layout.update_points([required.get(i, state) for i, state in enumerate(layout.get_point_states())])
+
+        route, commands = layout.plan_route(start, end)
+
+        self.assertEqual(route, longer)
+        self.assertEqual(commands, "")
+
+    def test_entry_and_exit_clicks(self):
+        layout = self.layout
+        layout.click_track(self.destination("Platform 1"))
+        self.assertEqual(self.ser.writes, [])
+
+        layout.click_track(self.destination("Siding 3"))
+
+        self.assertEqual(len(self.ser.writes), 1)
+        self.assertIsNone(layout.route_entry)
+
+    def test_clicking_the_entry_again_cancels(self):
+        layout = self.layout
+        layout.click_track(self.destination("Platform 1"))
+        layout.click_track(self.destination("Platform 1"))
+
+        self.assertIsNone(layout.route_entry)
+        self.assertEqual(self.ser.writes, [])
+
+    def test_triple_toggles(self):
+        triple = self.layout.triple
+        servo = triple.servo_index
+        triple.state = "road_1"
+
+        self.assertEqual(triple.get_commands(0), "")
+        self.assertEqual(triple.get_commands(1), f"p{servo}\n")
+        self.assertEqual(triple.get_commands(2), f"p{servo}\np{servo + 1}\n")
+
+    def test_triple_click_cycles_roads(self):
+        triple = self.layout.triple
+        servo = triple.servo_index
+        triple.state = "road_1"
+
+        for _ in range(3):
+            triple.click()
+
+        self.assertEqual(
+            self.ser.writes, [f"p{servo}\n".encode(), f"p{servo + 1}\n".encode(), f"p{servo}\np{servo + 1}\n".encode()]
+        )
+        self.assertEqual(triple.state, "moving_to_road_1")
+
+
+class TestIntermediateSyncs(unittest.TestCase):
+    """The Arduino sends a sync after each toggle, before it has handled the rest of a write."""
+
+    def setUp(self):
+        pygame.init()
+        self.ser = RecordingSerial()
+        self.layout = Layout(self.ser)
+        self.firmware = Firmware()
+        self.monitor_buffer = [""] * 5
+        self.feed([self.firmware.sync()])  # the layout starts in step with the Arduino
+
+    def feed(self, lines: list[str]):
+        process_lines([SerialLine(line, 0.0, 0.0) for line in lines], self.layout, self.monitor_buffer)
+
+    def test_route_points_never_move_back(self):
+        layout = self.layout
+        route = layout.set_route(layout.destinations["Platform 1"], layout.destinations["Fiddle loop"])
+        replies = self.firmware.handle(self.ser.writes[-1])
+        self.assertGreater(len(replies), 2)
+        points = [point for point, _ in route.point_states]
+        required = [state for _, state in route.point_states]
+
+        for lines in replies:
+            for line in lines:
+                self.feed([line])
+                states = layout.get_point_states()
+                with self.subTest(line=line):
+                    self.assertEqual([states[point] for point in points], required)
+
+        self.assertEqual(layout.ser.pending, {})
+
+    def test_triple_waits_for_both_servos(self):
+        triple = self.layout.triple
+        servo = triple.servo_index
+        road_3, road_1 = "S000000100000000\r", "S000000000000000\r"
+        self.feed([road_3])
+
+        triple.click()
+        self.assertEqual(self.ser.writes[-1], f"p{servo}\np{servo + 1}\n".encode())
+
+        # the sync after the first servo, sent before the second has been handled
+        self.feed([f"<Setting point in Arduino, Point: {servo} Val: 300>", road_3])
+        self.assertEqual(triple.state, "moving_to_road_1")
+
+        self.feed([f"<Setting point in Arduino, Point: {servo + 1} Val: 300>", road_1])
+        self.assertEqual(triple.get_target_state(), 0)
+        self.assertEqual(self.layout.ser.pending, {})
+
+        self.feed([road_3])  # all acknowledged, so a sync is followed again
+        self.assertEqual(triple.state, "moving_to_road_3")
+
+    def test_other_points_follow_the_sync(self):
+        """Only the points waiting for a toggle ignore the sync."""
+        layout = self.layout
+        layout.points[0].click()
+        self.firmware.status[12] = 1  # moved by hand at the Arduino
+        moved = [i for i, state in enumerate(decode_line(self.firmware.sync()).states) if state][0]
+
+        self.feed([self.firmware.sync()])
+
+        self.assertEqual(layout.get_point_states()[moved], 1)
+        self.assertEqual(layout.get_point_states()[0], 1)  # still waiting for p0
+
+    def test_lost_acknowledgement_times_out(self):
+        layout = self.layout
+        layout.ser.timeout = 0.05
+        layout.points[0].click()
+
+        time.sleep(0.1)
+        self.feed([self.firmware.sync()])
+
+        self.assertEqual(layout.get_point_states()[0], 0)
+        self.assertEqual(layout.ser.pending, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
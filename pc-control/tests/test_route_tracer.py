@@ -0,0 +1,195 @@
+"""The incremental route tracer against a full traversal.
+
+    python -m unittest tests.test_route_tracer
+"""
+
+import os
+import random
+import unittest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.layout import Layout  # noqa: E402
+from pc_control.points import CrossOver, StraightPoint, Triple  # noqa: E402
+from pc_control.serial_comms import DummySerial  # noqa: E402
+from pc_control.track import Track  # noqa: E402
+
+point_states = ["ahead", "diverge", "moving_to_ahead", "moving_to_diverge"]
+triple_states = ["road_1", "road_2", "road_3", "moving_to_road_1", "moving_to_road_2", "moving_to_road_3"]
+
+
+def traverse_route(route_start: Track):
+    """Traverse the whole route from the route start, as the layout did before RouteTracer. Sets in_route on the tracks
+    and the red cross flags on the points. Kept as the reference the tracer and the route search are checked against.
+    """
+
+    # Find the connections for the route start. Build a list of 2 element tuples. Each tuple describes a connection.
+    connections_to_process = [(connection, route_start) for connection in route_start.connections]
+    route_start.in_route = True
+    route = [route_start]
+
+    # while there are still connections in the route
+    while connections_to_process:
+        # get the last connection - we add connections to the end
+        connection = connections_to_process.pop(0)
+
+        if isinstance(connection[0], Track):
+            # add it to the route
+            if not connection[0].in_route:
+                connection[0].in_route = True
+                # get the connections to this track and add them to the connections to process
+                connections_to_process += [
+                    (track_connection, connection[0]) for track_connection in connection[0].connections
+                ]
+                route += [connection]
+        elif isinstance(connection[0], StraightPoint):
+
+            switch_connections = connection[0].get_connected_tracks()
+
+            # We check if the switch reports that it is set to the track connected to it. If so add the track the other side of the switch to process.
+            if switch_connections[0] == connection[1]:
+                connections_to_process.append([switch_connections[1], connection[0]])
+            elif switch_connections[1] == connection[1]:
+                connections_to_process.append([switch_connections[0], connection[0]])
+            else:
+                connection[0].mark_unoccupied = True  # switch not set for route so set the flag to mark the red cross
+
+        elif isinstance(connection[0], CrossOver):
+            switch_connections = connection[0].get_connected_tracks()
+
+            # Is the crossover set or do we have two pairs of connections to handle?
+            if connection[0].state == "ahead" or connection[0].state == "moving_to_diverge":
+                for connection_pair in switch_connections:
+                    if connection_pair[0] == connection[1]:
+                        connections_to_process.append([connection_pair[1], connection[0]])
+                    elif connection_pair[1] == connection[1]:
+                        connections_to_process.append([connection_pair[0], connection[0]])
+            else:  # switch is in the crossover position so only one pair of connections.
+                if switch_connections[0] == connection[1]:
+                    connections_to_process.append([switch_connections[1], connection[0]])
+                elif switch_connections[1] == connection[1]:
+                    connections_to_process.append([switch_connections[0], connection[0]])
+                else:
+                    # set the cross at track which is not connected through the switch
+                    connection[0].mark_conflict(connection[1])
+
+        elif isinstance(connection[0], Triple):
+
+            switch_connections = connection[0].get_connected_tracks()
+
+            if switch_connections[0] == connection[1]:
+                connections_to_process.append([switch_connections[1], connection[0]])
+            elif switch_connections[1] == connection[1]:
+                connections_to_process.append([switch_connections[0], connection[0]])
+            else:
+                connection[0].mark_conflict(connection[1])
+
+
+class TestRouteTracer(unittest.TestCase):
+    def setUp(self):
+        pygame.init()
+        self.layout = Layout(DummySerial())
+        self.tracer = self.layout.route_tracer
+
+    def snapshot(self) -> tuple:
+        """The tracks on the route and the red crosses."""
+        layout = self.layout
+        in_route = frozenset(track for track in layout.tracks if track.in_route)
+        # A crossover shows one cross however many of its tracks are blocked, and which depends on the order they are
+        # reached in, so only whether there is a cross is compared.
+        marks = tuple((point.mark_unoccupied, getattr(point, "conflict", None) is not None) for point in layout.points)
+        return in_route, marks
+
+    def full_traversal(self, origin) -> tuple:
+        """Snapshot from traversing the whole route, then restore the tracer's flags."""
+        layout = self.layout
+        for track in layout.tracks:
+            track.in_route = False
+        for point in layout.points:
+            point.clear_marks()
+        traverse_route(origin)
+        expected = self.snapshot()
+
+        for track in layout.tracks:
+            track.in_route = track in self.tracer.parents
+        self.tracer.apply_marks()
+        return expected
+
+    def test_matches_full_traversal(self):
+        rng = random.Random(1)
+        layout = self.layout
+
+        for origin in layout.tracks:
+            self.tracer.set_origin(origin)
+            self.tracer.update()
+            for step in range(30):
+                point = rng.choice(layout.points)
+                point.state = rng.choice(triple_states if isinstance(point, Triple) else point_states)
+                self.tracer.update()
+
+                with self.subTest(origin=origin.id, step=step):
+                    self.assertEqual(self.snapshot(), self.full_traversal(origin))
+
+    def test_only_points_on_the_route_cause_a_retrace(self):
+        layout = self.layout
+        siding_1 = layout.destinations["Siding 1"]
+        layout.triple.state = "road_2"  # siding 1 is cut off from the rest of the layout
+        self.tracer.set_origin(siding_1)
+        self.tracer.update()
+        self.assertEqual(set(self.tracer.parents), {siding_1})
+
+        retraced = []
+        self.tracer.retrace = retraced.append
+        layout.points[0].state = "diverge"
+
+        self.assertFalse(self.tracer.update())
+        self.assertEqual(retraced, [])
+
+    def test_points_report_their_changes(self):
+        layout = self.layout
+        self.tracer.set_origin(layout.destinations["Platform 1"])
+        self.tracer.update()
+
+        layout.points[3].set_state(1)
+        layout.triple.click()
+
+        self.assertEqual(self.tracer.changed_points, [layout.points[3], layout.triple])
+        self.tracer.update()
+        self.assertEqual(self.tracer.changed_points, [])
+
+    def test_nothing_is_done_without_a_change(self):
+        layout = self.layout
+        self.tracer.set_origin(layout.destinations["Platform 1"])
+        self.tracer.update()
+
+        retraced = []
+        self.tracer.retrace = retraced.append
+        for _ in range(3):
+            self.assertFalse(self.tracer.update())
+
+        self.assertEqual(retraced, [])
+
+    def test_change_is_reported_once(self):
+        layout = self.layout
+        self.tracer.set_origin(layout.destinations["Siding 1"])
+        self.assertTrue(self.tracer.update())
+        self.assertFalse(self.tracer.update())
+
+        layout.triple.state = "road_1"
+
+        self.assertTrue(self.tracer.update())
+        self.assertFalse(self.tracer.update())
+
+    def test_clearing_the_origin(self):
+        layout = self.layout
+        self.tracer.set_origin(layout.destinations["Platform 1"])
+        self.tracer.set_origin(None)
+
+        self.assertFalse(any(track.in_route for track in layout.tracks))
+
+
+if __name__ == "__main__":
+    unittest.main()
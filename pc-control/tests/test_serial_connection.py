@@ -0,0 +1,156 @@
+"""Reconnecting to the Arduino with backoff, against fake ports.
+
+    python -m unittest tests.test_serial_connection
+"""
+
+import queue
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import serial
+
+from pc_control import serial_comms
+from pc_control.serial_comms import SerialConnection
+
+
+class RecordingEvent(threading.Event):
+    """Logs the timeout of every wait but only waits a moment, so the backoff can be checked without waiting for it.
+    The 0.2s polls while connected aren't logged."""
+
+    def __init__(self, log: list):
+        super().__init__()
+        self.log = log
+
+    def wait(self, timeout=None) -> bool:
+        if timeout != 0.2:
+            self.log.append(("wait", timeout))
+        return super().wait(0.001)
+
+
+class FakeReader:
+    def __init__(self, lost: threading.Event):
+        self.lost = lost
+
+    def is_alive(self) -> bool:
+        return not self.lost.is_set()
+
+
+class FakePort:
+    """Stands in for ZeroWaitSerial. Set lost to act as if the cable has been pulled."""
+
+    def __init__(self):
+        self.notify = None
+        self.recorder = None
+        self.on_line = None
+        self.lost = threading.Event()
+        self.reader = FakeReader(self.lost)
+        self.closed = False
+
+    def read_available_lines(self) -> list:
+        return []
+
+    def close(self):
+        self.closed = True
+
+
+class PortFactory:
+    """Replaces ZeroWaitSerial. Opening fails the next failures times, then gives a FakePort."""
+
+    def __init__(self, log: list, failures: int):
+        self.log = log
+        self.failures = failures
+        self.ports: list[FakePort] = []
+
+    def __call__(self, port: str, baud: int) -> FakePort:
+        if self.failures:
+            self.failures -= 1
+            self.log.append("fail")
+            raise serial.SerialException(f"could not open port {port}")
+        self.log.append("open")
+        self.ports.append(FakePort())
+        return self.ports[-1]
+
+
+class TestReconnect(unittest.TestCase):
+    def setUp(self):
+        self.log = []
+        self.changes: queue.Queue[bool] = queue.Queue()
+        self.factory = PortFactory(self.log, failures=5)
+        patcher = mock.patch.object(serial_comms, "ZeroWaitSerial", self.factory)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.connection = SerialConnection("COM3", 9600, min_retry=0.5, max_retry=2.0, settle_time=1.5)
+        self.connection.closing = RecordingEvent(self.log)
+
+        def on_change():
+            self.log.append(("connected", self.connection.connected))
+            self.changes.put(self.connection.connected)
+
+        self.connection.on_change = on_change
+
+        self.enterContext(redirect_stdout(StringIO()))
+        self.connection.start()
+        self.addCleanup(self.connection.close)
+
+    def test_backoff_grows_to_max_retry_then_connects_after_settling(self):
+        self.assertTrue(self.changes.get(timeout=5.0))
+
+        self.assertEqual(
+            self.log,
+            [
+                "fail",
+                ("wait", 0.5),
+                "fail",
+                ("wait", 1.0),
+                "fail",
+                ("wait", 2.0),
+                "fail",
+                ("wait", 2.0),
+                "fail",
+                ("wait", 2.0),
+                "open",
+                ("wait", 1.5),  # settle before reporting the connection
+                ("connected", True),
+            ],
+        )
+        self.assertIs(self.connection.serial, self.factory.ports[0])
+
+    def test_lost_connection_is_reported_and_reconnected(self):
+        self.assertTrue(self.changes.get(timeout=5.0))
+        del self.log[:]
+        self.factory.failures = 1
+
+        self.factory.ports[0].lost.set()
+
+        self.assertFalse(self.changes.get(timeout=5.0))
+        self.assertTrue(self.changes.get(timeout=5.0))
+        self.assertEqual(
+            self.log,
+            [
+                ("connected", False),
+                "fail",
+                ("wait", 0.5),  # the backoff starts again after a connection which worked
+                "open",
+                ("wait", 1.5),
+                ("connected", True),
+            ],
+        )
+        self.assertTrue(self.factory.ports[0].closed)
+        self.assertIs(self.connection.serial, self.factory.ports[1])
+
+    def test_write_while_disconnected_raises(self):
+        self.assertTrue(self.changes.get(timeout=5.0))
+        self.factory.failures = 100
+        self.factory.ports[0].lost.set()
+        self.assertFalse(self.changes.get(timeout=5.0))
+
+        with self.assertRaises(serial.SerialException):
+            self.connection.write(b"p5\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
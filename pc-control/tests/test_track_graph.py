@@ -0,0 +1,218 @@
+"""The compiled track graph against the reference route traversal.
+
+    python -m unittest tests.test_track_graph
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame  # noqa: E402
+
+from pc_control.canvas import Canvas, Transform  # noqa: E402
+from pc_control.layout import Layout  # noqa: E402
+from pc_control.points import Triple  # noqa: E402
+from pc_control.serial_comms import DummySerial  # noqa: E402
+from pc_control.track import Track  # noqa: E402
+from pc_control.track_graph import Route, RouteTable, TrackGraph  # noqa: E402
+from tests.test_route_tracer import traverse_route  # noqa: E402
+
+
+def set_points_at_rest(layout: Layout, point_states: dict[int, int]):
+    """Set the points to the states without animating. Points not given are set to state 0, or road 2 for the triple."""
+    for index, point in enumerate(layout.points):
+        if isinstance(point, Triple):
+            point.state = f"road_{point_states.get(index, 1) + 1}"
+        else:
+            point.state = ("ahead", "diverge")[point_states.get(index, 0)]
+
+
+def make_tracks(count: int) -> list[Track]:
+    canvas = Canvas(pygame.Surface((10, 10)), Transform(1.0))
+    return [Track(canvas, (index, 0), (index + 1, 0)) for index in range(count)]
+
+
+class LegPoint:
+    """A point reduced to the pairs of tracks it joins in each state."""
+
+    def __init__(self, legs: list[tuple]):
+        self.legs = legs
+
+    def get_legs(self) -> list[tuple]:
+        return self.legs
+
+
+class TestTrackGraph(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        cls.layout = Layout(DummySerial())
+
+    def test_routes_are_followed_by_traversal(self):
+        """Setting the points for any route found and highlighting from its start covers every track in it."""
+        layout = self.layout
+        count = len(layout.tracks)
+
+        for start in range(count):
+            for end in range(count):
+                route = layout.graph.find_route(start, end)
+                if route is None:
+                    continue
+
+                with self.subTest(start=start, end=end):
+                    self.assertEqual((route.tracks[0], route.tracks[-1]), (start, end))
+                    set_points_at_rest(layout, dict(route.point_states))
+                    for track in layout.tracks:
+                        track.in_route = False
+
+                    traverse_route(layout.tracks[start])
+
+                    self.assertTrue(all(layout.tracks[track].in_route for track in route.tracks))
+
+    def test_platform_to_siding(self):
+        layout = self.layout
+        platform_1 = layout.tracks.index(layout.points[4].diverge)
+        siding_1 = layout.tracks.index(layout.triple.road_1_track)
+
+        route = layout.graph.find_route(platform_1, siding_1)
+
+        self.assertIn((layout.points.index(layout.triple), 0), route.point_states)
+
+    def test_no_reversing_on_a_dead_end(self):
+        layout = self.layout
+        siding_1 = layout.tracks.index(layout.triple.road_1_track)
+        siding_2 = layout.tracks.index(layout.triple.road_2_track)
+
+        self.assertIsNone(layout.graph.find_route(siding_1, siding_2))
+
+
+class TestPointNeededTwice(unittest.TestCase):
+    """The shorter way to Y sets point P against the only way on from Y, so the route has to take the longer way.
+
+    start -P0- X -Q0- Y -P1- end
+      |               |
+      T1 --- T2 ---- Q1
+    """
+
+    def test_longer_way_round(self):
+        pygame.init()
+        start, x, y, end, t1, t2 = make_tracks(6)
+        p = LegPoint([(0, start, x), (1, y, end)])
+        q = LegPoint([(0, x, y), (1, t2, y)])
+        start.connections = [t1, p]
+        x.connections = [p, q]
+        y.connections = [q, p]
+        end.connections = [p]
+        t1.connections = [start, t2]
+        t2.connections = [t1, q]
+        graph = TrackGraph([start, x, y, end, t1, t2], [p, q])
+
+        route = graph.find_route(0, 3)
+
+        self.assertEqual(route, Route((0, 4, 5, 2, 3), ((1, 1), (0, 1))))
+        self.assertEqual(graph.find_all_routes(0, 3), [route])
+
+
+class TestRouteTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        cls.layout = Layout(DummySerial())
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "routes.bin"
+
+    def test_shortest_route_matches_search(self):
+        table = self.layout.routes
+        for start in table.terminals:
+            for end in table.terminals:
+                if start == end:
+                    continue
+                with self.subTest(start=start, end=end):
+                    routes = table.get_routes(start, end)
+                    shortest = self.layout.graph.find_route(start, end)
+                    if shortest is None:
+                        self.assertEqual(routes, ())
+                    else:
+                        self.assertEqual(len(routes[0].tracks), len(shortest.tracks))
+                        self.assertEqual(len(set(routes[0].tracks)), len(routes[0].tracks))
+
+    def test_fiddle_loop_both_ways(self):
+        self.assertEqual(len(self.layout.routes.get_routes(*self.terminals("Platform 1", "Fiddle loop"))), 2)
+
+    def terminals(self, start: str, end: str) -> tuple[int, int]:
+        return tuple(self.layout.tracks.index(self.layout.destinations[name]) for name in (start, end))
+
+    def test_cache_round_trip(self):
+        built = RouteTable(self.layout.graph, self.layout.routes.terminals, self.path)
+        loaded = RouteTable(self.layout.graph, self.layout.routes.terminals, self.path)
+
+        self.assertEqual(loaded.routes, built.routes)
+
+    def test_cache_is_rebuilt_for_another_layout(self):
+        terminals = self.layout.routes.terminals
+        RouteTable(self.layout.graph, terminals[:2], self.path)
+
+        table = RouteTable(self.layout.graph, terminals, self.path)
+
+        self.assertEqual(table.routes, self.layout.routes.routes)
+
+    def test_corrupt_cache_is_rebuilt(self):
+        self.path.write_bytes(RouteTable.magic + b"\x00" * 10)
+
+        table = RouteTable(self.layout.graph, self.layout.routes.terminals, self.path)
+
+        self.assertEqual(table.routes, self.layout.routes.routes)
+
+    def test_cache_cut_short_is_rebuilt(self):
+        terminals = self.layout.routes.terminals
+        RouteTable(self.layout.graph, terminals, self.path)
+        self.path.write_bytes(self.path.read_bytes()[:-3])
+
+        table = RouteTable(self.layout.graph, terminals, self.path)
+
+        self.assertEqual(table.routes, self.layout.routes.routes)
+
+
+class TestLargeLayout(unittest.TestCase):
+    """More tracks than fit in a byte."""
+
+    track_count = 300
+
+    def setUp(self):
+        pygame.init()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "routes.bin"
+
+        self.tracks = make_tracks(self.track_count)
+        for index, track in enumerate(self.tracks):
+            track.connections = self.tracks[max(0, index - 1) : index] + self.tracks[index + 1 : index + 2]
+        self.graph = TrackGraph(self.tracks, [])
+
+    def test_route_along_the_line(self):
+        self.assertGreater(self.graph.node_count, 255)
+
+        route = self.graph.find_route(0, self.track_count - 1)
+
+        self.assertEqual(route, Route(tuple(range(self.track_count)), ()))
+
+    def test_cache_round_trip(self):
+        terminals = (0, 10, self.track_count - 1)
+        built = RouteTable(self.graph, terminals, self.path)
+        with mock.patch.object(self.graph, "find_all_routes", side_effect=AssertionError("not loaded from the cache")):
+            loaded = RouteTable(self.graph, terminals, self.path)
+
+        self.assertEqual(built.get_routes(0, self.track_count - 1), (Route(tuple(range(self.track_count)), ()),))
+        self.assertEqual(loaded.routes, built.routes)
+
+
+if __name__ == "__main__":
+    unittest.main()